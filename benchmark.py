@@ -0,0 +1,61 @@
+import argparse
+import glob
+import sys
+import time
+
+from src.benchmark import ALGORITHMS, run_benchmark, write_report
+from src.config import Config
+from src.heuristics import CONSTRUCTION_METHODS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark a VRP algorithm over a set of instances')
+    parser.add_argument('instances', type=str, nargs='+',
+                       help='Instance files or glob patterns (e.g. "data/cvrplib/Vrp-Set-Solomon/C1*.txt")')
+    parser.add_argument('--algorithm', type=str, default='sa', choices=ALGORITHMS,
+                       help='Metaheuristic: simulated annealing, ALNS or hybrid genetic search')
+    parser.add_argument('--method', type=str, default='clarke_wright',
+                       choices=list(CONSTRUCTION_METHODS),
+                       help='Initial solution method')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0],
+                       help='Seeds; every instance is solved once per seed')
+    parser.add_argument('--time-limit', type=float, default=None,
+                       help='Seconds per run, construction included')
+    parser.add_argument('--iterations', type=int, default=None,
+                       help='Iterations per run (default: config value, unbounded with --time-limit)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Process pool size (default: CPU count)')
+    parser.add_argument('--config', type=str, default='config/config.yaml',
+                       help='Path to YAML configuration file')
+    parser.add_argument('--cache', action='store_true',
+                       help='Load instances through the binary instance cache')
+    parser.add_argument('--output', type=str, default='results/benchmark.csv',
+                       help='Report file, CSV or JSON (by extension)')
+    
+    args = parser.parse_args()
+    config = Config(args.config)
+    
+    paths = []
+    for pattern in args.instances:
+        paths.extend(path for path in sorted(glob.glob(pattern, recursive=True)) if path not in paths)
+    if not paths:
+        sys.exit(f"No instance matches {' '.join(args.instances)}")
+    
+    print(f"Benchmark: {args.algorithm} on {len(paths)} instances x {len(args.seeds)} seeds")
+    start = time.time()
+    rows = run_benchmark(paths, seeds=args.seeds, algorithm=args.algorithm, config=config.config,
+                         time_limit=args.time_limit, max_iter=args.iterations, method=args.method,
+                         workers=args.workers, cache=args.cache, verbose=True)
+    write_report(rows, args.output)
+    
+    gaps = [row['gap'] for row in rows if row['gap'] is not None]
+    print(f"\n{len(rows)} runs in {time.time() - start:.1f}s, "
+          f"{sum(row['feasible'] is False for row in rows)} infeasible, "
+          f"{sum(row['error'] is not None for row in rows)} failed")
+    if gaps:
+        print(f"Gap to BKS: mean {sum(gaps) / len(gaps):+.2f}%, worst {max(gaps):+.2f}% ({len(gaps)} runs)")
+    print(f"Report: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: cost evaluation through the precomputed distance matrix versus
+recomputing Euclidean distances from Client coordinates.
+
+Usage:
+    python benchmarks/bench_distance_matrix.py [instance] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.parser import load_instance
+from src.heuristics import generate_random_solution
+from src.models import euclidean_distance
+
+
+def legacy_cost(solution) -> float:
+    total_distance = 0.0
+    for vehicle in solution.vehicles:
+        if len(vehicle.route) == 0:
+            continue
+        route_distance = euclidean_distance(solution.depot, vehicle.route[0])
+        for i in range(len(vehicle.route) - 1):
+            route_distance += euclidean_distance(vehicle.route[i], vehicle.route[i + 1])
+        route_distance += euclidean_distance(vehicle.route[-1], solution.depot)
+        total_distance += route_distance
+    return total_distance
+
+
+def time_it(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distance matrix evaluation benchmark')
+    parser.add_argument('instance', nargs='?', default='data/X-n101-k25.vrp')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    instance = load_instance(args.instance)
+    load_time = time.perf_counter() - start
+
+    num_vehicles = max(1, -(-int(instance.demands.sum()) // instance.capacity))
+    solution = generate_random_solution(instance.clients, instance.depot, num_vehicles,
+                                        instance.capacity, instance)
+
+    assert abs(legacy_cost(solution) - solution.calculate_cost()) < 1e-6
+
+    legacy_time = time_it(lambda: legacy_cost(solution), args.repeat)
+    matrix_time = time_it(solution.calculate_cost, args.repeat)
+
+    print(f"Instance: {instance.name} ({len(instance.clients)} clients)")
+    print(f"Load + matrix build: {load_time * 1000:.1f} ms")
+    print(f"Legacy (euclidean_distance): {args.repeat / legacy_time:10.0f} evaluations/s")
+    print(f"Distance matrix:             {args.repeat / matrix_time:10.0f} evaluations/s")
+    print(f"Speedup: {legacy_time / matrix_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
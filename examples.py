@@ -19,9 +19,10 @@ def example_basic():
     print("EXAMPLE 1: Basic Usage")
     print("="*60)
     
-    clients, depot, capacity = load_instance("instance/VRPLIB/tests/data/A-n32-k5.vrp")
+    instance = load_instance("instance/VRPLIB/tests/data/A-n32-k5.vrp")
+    clients, depot, capacity = instance.clients, instance.depot, instance.capacity
     
-    initial = generate_clarke_wright_solution(clients, depot, capacity)
+    initial = generate_clarke_wright_solution(clients, depot, capacity, instance)
     print(f"Initial solution: {initial.cost:.2f}")
     
     best = simulated_annealing(initial, verbose=False)
@@ -37,13 +38,14 @@ def example_compare_methods():
     print("EXAMPLE 2: Comparing Initial Solution Methods")
     print("="*60)
     
-    clients, depot, capacity = load_instance("instance/VRPLIB/tests/data/A-n32-k5.vrp")
+    instance = load_instance("instance/VRPLIB/tests/data/A-n32-k5.vrp")
+    clients, depot, capacity = instance.clients, instance.depot, instance.capacity
     num_vehicles = 5
     
     methods = {
-        'Random': lambda: generate_random_solution(clients, depot, num_vehicles, capacity),
-        'Nearest Neighbor': lambda: generate_nearest_neighbor_solution(clients, depot, num_vehicles, capacity),
-        'Clarke-Wright': lambda: generate_clarke_wright_solution(clients, depot, capacity)
+        'Random': lambda: generate_random_solution(clients, depot, num_vehicles, capacity, instance),
+        'Nearest Neighbor': lambda: generate_nearest_neighbor_solution(clients, depot, num_vehicles, capacity, instance),
+        'Clarke-Wright': lambda: generate_clarke_wright_solution(clients, depot, capacity, instance)
     }
     
     results = {}
@@ -62,9 +64,10 @@ def example_with_local_search():
     print("EXAMPLE 3: SA + Local Search")
     print("="*60)
     
-    clients, depot, capacity = load_instance("instance/VRPLIB/tests/data/A-n32-k5.vrp")
+    instance = load_instance("instance/VRPLIB/tests/data/A-n32-k5.vrp")
+    clients, depot, capacity = instance.clients, instance.depot, instance.capacity
     
-    initial = generate_clarke_wright_solution(clients, depot, capacity)
+    initial = generate_clarke_wright_solution(clients, depot, capacity, instance)
     print(f"Initial: {initial.cost:.2f}")
     
     after_sa = simulated_annealing(initial, max_iter=20000, verbose=False)
@@ -83,9 +86,10 @@ def example_custom_parameters():
     print("EXAMPLE 4: Custom Parameters")
     print("="*60)
     
-    clients, depot, capacity = load_instance("instance/VRPLIB/tests/data/E-n13-k4.vrp")
+    instance = load_instance("instance/VRPLIB/tests/data/E-n13-k4.vrp")
+    clients, depot, capacity = instance.clients, instance.depot, instance.capacity
     
-    initial = generate_clarke_wright_solution(clients, depot, capacity)
+    initial = generate_clarke_wright_solution(clients, depot, capacity, instance)
     
     configs = [
         {'temp': 1000, 'cooling': 0.99, 'iter': 10000, 'name': 'Fast'},
@@ -118,8 +122,9 @@ def example_multiple_instances():
     
     for instance_path in instances:
         try:
-            clients, depot, capacity = load_instance(instance_path)
-            initial = generate_clarke_wright_solution(clients, depot, capacity)
+            instance = load_instance(instance_path)
+            clients, depot, capacity = instance.clients, instance.depot, instance.capacity
+            initial = generate_clarke_wright_solution(clients, depot, capacity, instance)
             best = simulated_annealing(initial, max_iter=20000, verbose=False)
             
             instance_name = instance_path.split('/')[-1].replace('.vrp', '')
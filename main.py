@@ -1,85 +1,284 @@
 import argparse
 import os
+import random
 import time
 from datetime import datetime
-from src.parser import load_instance
-from src.heuristics import generate_random_solution, generate_nearest_neighbor_solution, generate_clarke_wright_solution
-from src.solver import simulated_annealing, local_search
-from src.visualization import plot_solution, print_solution_details, export_solution
+from src.parser import load_instance, load_solution
+from src.heuristics import CONSTRUCTION_METHODS, construct_solution
+from src.solver import OPERATOR_SELECTIONS, simulated_annealing, local_search, GranularNeighborhood
+from src.alns import alns, repair_greedy
+from src.hgs import hybrid_genetic_search
+from src.parallel import TOPOLOGIES, parallel_simulated_annealing, island_simulated_annealing
+from src.telemetry import ConvergenceTrace, Telemetry
+from src.visualization import (plot_convergence, plot_solution, plot_solution_plotly, print_solution_details,
+                               export_solution)
 from src.config import Config
 
 
 def main():
     parser = argparse.ArgumentParser(description='VRP Solver using Metaheuristics')
     parser.add_argument('instance', type=str, help='Path to VRP instance file')
+    parser.add_argument('--algorithm', type=str, default='sa', choices=['sa', 'alns', 'hgs'],
+                       help='Improvement metaheuristic (simulated annealing, ALNS or hybrid genetic search)')
     parser.add_argument('--method', type=str, default='clarke_wright', 
-                       choices=['random', 'nearest_neighbor', 'clarke_wright'],
+                       choices=list(CONSTRUCTION_METHODS),
                        help='Initial solution generation method')
+    parser.add_argument('--init-solution', type=str, default=None, metavar='SOL',
+                       help='Warm start from a solution file (VRPLIB .sol or exported), repaired if needed')
     parser.add_argument('--vehicles', type=int, default=None, 
                        help='Number of vehicles (auto-detected if not specified)')
     parser.add_argument('--temp', type=float, default=2000, 
                        help='Initial temperature for simulated annealing')
     parser.add_argument('--cooling', type=float, default=0.999, 
                        help='Cooling rate')
-    parser.add_argument('--iterations', type=int, default=50000, 
-                       help='Maximum iterations')
+    parser.add_argument('--iterations', type=int, default=None, 
+                       help='Maximum iterations (default: 50000, unbounded with --time-limit)')
+    parser.add_argument('--time-limit', type=float, default=None,
+                       help='Wall-clock budget in seconds for construction, SA and local search')
+    parser.add_argument('--tw-penalty', type=float, default=None,
+                       help='Cost per unit of time-window violation (time-window instances)')
     parser.add_argument('--local-search', action='store_true', 
                        help='Apply local search after SA')
     parser.add_argument('--no-plot', action='store_true', 
                        help='Disable visualization')
     parser.add_argument('--save', action='store_true', 
                        help='Save results and plots')
+    parser.add_argument('--plotly', action='store_true',
+                       help='Plot with Plotly WebGL (interactive HTML with --save; requires plotly)')
     parser.add_argument('--verbose', action='store_true', 
                        help='Verbose output')
+    parser.add_argument('--config', type=str, default='config/config.yaml',
+                       help='Path to YAML configuration file')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                       help='Binary instance cache directory (default: config instance.cache_dir, '
+                            'or .vrp_cache next to the instance when instance.cache is set)')
+    parser.add_argument('--operator-selection', type=str, default=None, choices=OPERATOR_SELECTIONS,
+                       help='SA operator selection: uniform or adaptive roulette (default: config)')
+    parser.add_argument('--telemetry', type=str, nargs='?', const='', default=None, metavar='JSONL',
+                       help='Collect per-operator statistics (SA), optionally streamed to a JSONL file')
+    parser.add_argument('--no-granular', action='store_true',
+                       help='Sample moves uniformly instead of from k-nearest candidate lists')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Run independent SA chains on N processes (default: config parallel.workers)')
+    parser.add_argument('--islands', type=int, default=None,
+                       help='Run the island model on N processes with elite migration (default: config parallel.islands)')
+    parser.add_argument('--migration-interval', type=int, default=None,
+                       help='Iterations between migrations in the island model')
+    parser.add_argument('--topology', type=str, default=None, choices=list(TOPOLOGIES),
+                       help='Island migration topology')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Seed of the construction and of the search streams (default: config solver.seed)')
+    parser.add_argument('--checkpoint', type=str, default=None, metavar='PATH',
+                       help='Periodically save the SA state to PATH (every solver.checkpoint_interval seconds)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue the SA run saved in --checkpoint (starts afresh if it does not exist)')
     
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
+    config = Config(args.config)
     
     print("\n" + "="*70)
     print("VRP SOLVER - Vehicle Routing Problem Optimizer")
     print("="*70)
     
     print(f"\nLoading instance: {args.instance}")
-    clients, depot, capacity = load_instance(args.instance)
+    instance_config = config.get('instance')
+    instance = load_instance(args.instance, cache=bool(instance_config.get('cache', False)),
+                             cache_dir=args.cache_dir or instance_config.get('cache_dir'))
+    clients, depot, capacity = instance.clients, instance.depot, instance.capacity
     print(f"✓ Loaded {len(clients)} clients, capacity: {capacity}")
+    if instance.has_time_windows:
+        print(f"✓ Time windows: horizon {instance.horizon:.0f}")
+        if args.tw_penalty is not None:
+            instance.time_warp_penalty = args.tw_penalty
     
     if args.vehicles:
         num_vehicles = args.vehicles
+    elif instance.num_vehicles:
+        num_vehicles = instance.num_vehicles
     else:
         total_demand = sum(c.demand for c in clients)
         num_vehicles = max(5, (total_demand + capacity - 1) // capacity)
     
     print(f"✓ Using {num_vehicles} vehicles\n")
     
-    print(f"Generating initial solution using: {args.method}")
+    if args.init_solution:
+        print(f"Loading initial solution: {args.init_solution}")
+    else:
+        print(f"Generating initial solution using: {args.method}")
     start_time = time.time()
     
-    if args.method == 'random':
-        initial_solution = generate_random_solution(clients, depot, num_vehicles, capacity)
-    elif args.method == 'nearest_neighbor':
-        initial_solution = generate_nearest_neighbor_solution(clients, depot, num_vehicles, capacity)
+    seed = args.seed if args.seed is not None else config.get('solver').get('seed')
+    if seed is not None:
+        random.seed(seed)
+    
+    time_limit = args.time_limit or config.get('solver', 'time_limit') or None
+    max_iterations = args.iterations or (None if time_limit else 50000)
+    
+    def remaining_time(share: float = 1.0):
+        if time_limit is None:
+            return None
+        return max(0.0, start_time + time_limit - time.time()) * share
+    
+    cw_config = config.get('heuristics', 'clarke_wright')
+    if args.init_solution:
+        initial_solution, unrouted = load_solution(args.init_solution, instance, num_vehicles)
+        if unrouted:
+            print(f"  {len(unrouted)} customers missing or unloaded: reinserted by cheapest insertion")
+            repair_greedy(initial_solution, unrouted)
+            initial_solution.calculate_cost()
     else:
-        initial_solution = generate_clarke_wright_solution(clients, depot, capacity)
+        initial_solution = construct_solution(instance, args.method, num_vehicles, cw_config,
+                                              time_limit=remaining_time())
     
     init_time = time.time() - start_time
     print(f"✓ Initial solution cost: {initial_solution.cost:.2f} (in {init_time:.2f}s)")
     
-    print(f"\nRunning Simulated Annealing...")
-    print(f"  Temperature: {args.temp} → {0.1}")
-    print(f"  Cooling rate: {args.cooling}")
-    print(f"  Max iterations: {args.iterations}")
+    if args.algorithm == 'alns':
+        alns_config = config.get('alns')
+        alns_iterations = args.iterations or (None if time_limit else alns_config.get('max_iterations', 5000))
+        print(f"\nRunning ALNS...")
+        print(f"  Max iterations: {alns_iterations if alns_iterations else 'unbounded'}")
+        if time_limit:
+            print(f"  Time limit: {time_limit:.1f}s")
+    elif args.algorithm == 'hgs':
+        hgs_config = config.get('hgs')
+        hgs_iterations = args.iterations or (None if time_limit else hgs_config.get('max_iterations', 500))
+        print(f"\nRunning Hybrid Genetic Search...")
+        print(f"  Population: {hgs_config.get('population_size', 25)} + {hgs_config.get('generation_size', 40)}")
+        print(f"  Max offspring: {hgs_iterations if hgs_iterations else 'unbounded'}")
+        if time_limit:
+            print(f"  Time limit: {time_limit:.1f}s")
+    else:
+        print(f"\nRunning Simulated Annealing...")
+        print(f"  Temperature: {args.temp} → {0.1}")
+        print(f"  Cooling rate: {args.cooling}")
+        print(f"  Max iterations: {max_iterations if max_iterations else 'unbounded'}")
+        if time_limit:
+            print(f"  Time limit: {time_limit:.1f}s (adaptive cooling)")
+        print(f"  Operator selection: {args.operator_selection or config.get('solver', 'operator_selection') or 'uniform'}")
     
+    neighborhood_options = None
+    neighborhood_config = config.get('neighborhood')
+    if neighborhood_config.get('granular', False) and not args.no_granular:
+        neighborhood_options = {
+            'k': neighborhood_config.get('k', 20),
+            'time_window_weight': neighborhood_config.get('time_window_weight', 0.0),
+            'max_k': neighborhood_config.get('max_k'),
+            'refresh': neighborhood_config.get('refresh', 'static'),
+        }
+        print(f"  Granular neighbourhood: k={neighborhood_options['k']} ({neighborhood_options['refresh']})")
+    
+    parallel_config = config.get('parallel')
+    workers = args.workers or parallel_config.get('workers') or 1
+    
+    islands = args.islands or parallel_config.get('islands') or 0
+    methods = parallel_config.get('methods') or [args.method]
+    # With local search enabled, keep a tenth of the remaining budget for it.
+    solver_config = config.get('solver')
+    annealing = dict(initial_temp=args.temp, cooling_rate=args.cooling, max_iter=max_iterations,
+                     min_temp=0.1, verbose=args.verbose,
+                     time_limit=remaining_time(0.9 if args.local_search else 1.0),
+                     operator_selection=args.operator_selection or solver_config.get('operator_selection', 'uniform'),
+                     reaction_factor=solver_config.get('reaction_factor', 0.1),
+                     selection_segment=solver_config.get('selection_segment', 500))
+    if args.checkpoint and (args.algorithm != 'sa' or islands > 1 or workers > 1):
+        parser.error('--checkpoint is only supported by single-process simulated annealing')
+    
+    # Bounded current/best cost log, saved with the results (single-process runs).
+    trace = ConvergenceTrace()
     sa_start = time.time()
-    best_solution = simulated_annealing(
-        initial_solution,
-        initial_temp=args.temp,
-        cooling_rate=args.cooling,
-        max_iter=args.iterations,
-        min_temp=0.1,
-        verbose=args.verbose
-    )
+    if args.algorithm == 'alns':
+        best_solution = alns(
+            initial_solution,
+            max_iter=alns_iterations,
+            destroy_operators=alns_config.get('destroy_operators'),
+            repair_operators=alns_config.get('repair_operators'),
+            min_destroy=alns_config.get('min_destroy', 0.05),
+            max_destroy=alns_config.get('max_destroy', 0.3),
+            max_removed=alns_config.get('max_removed', 100),
+            scores=tuple(alns_config.get('scores', (10, 5, 1, 0))),
+            reaction_factor=alns_config.get('reaction_factor', 0.1),
+            time_limit=annealing['time_limit'],
+            verbose=args.verbose,
+            trace=trace
+        )
+    elif args.algorithm == 'hgs':
+        best_solution = hybrid_genetic_search(
+            initial_solution,
+            max_iter=hgs_iterations,
+            population_size=hgs_config.get('population_size', 25),
+            generation_size=hgs_config.get('generation_size', 40),
+            n_elite=hgs_config.get('n_elite', 4),
+            n_closest=hgs_config.get('n_closest', 5),
+            max_iter_no_improvement=hgs_config.get('max_iterations_no_improvement', 1000),
+            education_iterations=hgs_config.get('education_iterations'),
+            time_limit=annealing['time_limit'],
+            verbose=args.verbose,
+            trace=trace
+        )
+    elif islands > 1:
+        migration_interval = args.migration_interval or parallel_config.get('migration_interval', 1000)
+        topology = args.topology or parallel_config.get('topology', 'ring')
+        print(f"  Islands: {islands} ({topology}, migration every {migration_interval} iterations)")
+        best_solution, chain_stats = island_simulated_annealing(
+            instance,
+            num_vehicles,
+            islands=islands,
+            migration_interval=migration_interval,
+            topology=topology,
+            methods=methods,
+            seed=seed if seed is not None else parallel_config.get('seed'),
+            neighborhood=neighborhood_options,
+            clarke_wright=cw_config,
+            **annealing
+        )
+        print(f"    seed {chain_stats[0]['seed']}")
+        for stats in chain_stats:
+            print(f"    island {stats['chain']:>2} [{stats['method']}]: "
+                  f"{stats['initial_cost']:.2f} → {stats['best_cost']:.2f} in {stats['time']:.2f}s "
+                  f"(sent {stats['migrants_sent']}, adopted {stats['migrants_received']})")
+    elif workers > 1:
+        print(f"  Workers: {workers} (methods: {', '.join(methods)})")
+        best_solution, chain_stats = parallel_simulated_annealing(
+            instance,
+            num_vehicles,
+            workers=workers,
+            chains=parallel_config.get('chains'),
+            methods=methods,
+            seed=seed if seed is not None else parallel_config.get('seed'),
+            neighborhood=neighborhood_options,
+            clarke_wright=cw_config,
+            **annealing
+        )
+        print(f"    seed {chain_stats[0]['seed']}")
+        for stats in chain_stats:
+            print(f"    chain {stats['chain']:>2} [{stats['method']}]: "
+                  f"{stats['initial_cost']:.2f} → {stats['best_cost']:.2f} in {stats['time']:.2f}s")
+    else:
+        neighborhood = None
+        if neighborhood_options is not None:
+            neighborhood = GranularNeighborhood(instance, **neighborhood_options)
+        telemetry = None
+        telemetry_config = config.get('telemetry')
+        if args.telemetry is not None or telemetry_config.get('enabled', False):
+            telemetry = Telemetry(path=args.telemetry or telemetry_config.get('path'),
+                                  sample_interval=telemetry_config.get('sample_interval', 1000))
+        best_solution = simulated_annealing(initial_solution, neighborhood=neighborhood,
+                                            telemetry=telemetry, trace=trace, checkpoint=args.checkpoint,
+                                            checkpoint_interval=solver_config.get('checkpoint_interval', 5.0),
+                                            resume=args.resume, seed=seed, **annealing)
+        if args.checkpoint:
+            print(f"✓ Checkpoint written to {args.checkpoint}")
+        if telemetry is not None:
+            print(telemetry.report())
+            if telemetry.path:
+                print(f"✓ Telemetry written to {telemetry.path}")
     sa_time = time.time() - sa_start
     
-    print(f"✓ Simulated annealing completed in {sa_time:.2f}s")
+    algorithm_name = {'sa': 'Simulated annealing', 'alns': 'ALNS', 'hgs': 'Hybrid genetic search'}[args.algorithm]
+    print(f"✓ {algorithm_name} completed in {sa_time:.2f}s")
     print(f"✓ Best solution cost: {best_solution.cost:.2f}")
     
     improvement = ((initial_solution.cost - best_solution.cost) / initial_solution.cost) * 100
@@ -88,13 +287,18 @@ def main():
     if args.local_search:
         print(f"\nApplying local search...")
         ls_start = time.time()
-        best_solution = local_search(best_solution, max_iterations=100)
+        heuristics_config = config.get('heuristics')
+        best_solution = local_search(best_solution,
+                                     max_iterations=heuristics_config.get('local_search_iterations'),
+                                     time_limit=remaining_time(),
+                                     policy=heuristics_config.get('local_search_policy', 'first'))
         ls_time = time.time() - ls_start
         print(f"✓ Local search completed in {ls_time:.2f}s")
         print(f"✓ Final cost: {best_solution.cost:.2f}")
     
     print_solution_details(best_solution)
     
+    plot = plot_solution_plotly if args.plotly else plot_solution
     if args.save:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         instance_name = os.path.splitext(os.path.basename(args.instance))[0]
@@ -103,16 +307,20 @@ def main():
         os.makedirs("results/plots", exist_ok=True)
         
         result_file = f"results/{instance_name}_{timestamp}.txt"
-        plot_file = f"results/plots/{instance_name}_{timestamp}.png"
+        plot_file = f"results/plots/{instance_name}_{timestamp}.{'html' if args.plotly else 'png'}"
         
         export_solution(best_solution, result_file)
-        plot_solution(best_solution, 
-                     title=f"{instance_name} - {args.method}", 
-                     save_path=plot_file, 
-                     show=not args.no_plot)
+        if len(trace):
+            trace.to_csv(f"results/{instance_name}_{timestamp}_convergence.csv")
+            plot_convergence(trace, title=f"{instance_name} - {algorithm_name}",
+                             save_path=f"results/plots/{instance_name}_{timestamp}_convergence.png", show=False)
+        plot(best_solution, 
+             title=f"{instance_name} - {args.method}", 
+             save_path=plot_file, 
+             show=not args.no_plot)
     elif not args.no_plot:
-        plot_solution(best_solution, 
-                     title=f"{os.path.basename(args.instance)} - {args.method}")
+        plot(best_solution, 
+             title=f"{os.path.basename(args.instance)} - {args.method}")
     
     total_time = time.time() - start_time
     print(f"\nTotal execution time: {total_time:.2f}s")
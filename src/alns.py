@@ -0,0 +1,394 @@
+"""
+Adaptive Large Neighbourhood Search (Ropke & Pisinger 2006), promoted from
+the notebook prototypes.
+
+Each iteration removes ``q`` customers with a destroy operator and
+reinserts them with a repair operator; operators are drawn by roulette
+wheel on adaptive weights and the result is accepted with the simulated
+annealing criterion. Destroy and repair work in place on node-id routes:
+a rejected candidate is reset from the current solution by
+``Solution.restore``, which only copies the routes that changed.
+"""
+
+import math
+import random
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from src.models import Solution, Vehicle
+from src.solver import CLOCK_CHECK_INTERVAL, acceptance_probability
+from src.telemetry import ConvergenceTrace
+
+
+def _routed_nodes(solution: Solution) -> List[int]:
+    return [node for vehicle in solution.vehicles for node in vehicle.sequence]
+
+
+def remove_nodes(solution: Solution, nodes: Sequence[int]):
+    """Remove ``nodes`` from their routes (one pass per route touched)."""
+    removed = set(nodes)
+    demands = solution.instance.demands
+    for vehicle in solution.vehicles:
+        if removed.isdisjoint(vehicle.sequence):
+            continue
+        kept = [node for node in vehicle.sequence if node not in removed]
+        vehicle.load -= int(demands[[node for node in vehicle.sequence if node in removed]].sum())
+        vehicle.sequence = kept
+        vehicle.touch()
+    solution.invalidate_owners()
+
+
+# Destroy operators: remove customers in place and return their ids.
+
+def destroy_random(solution: Solution, q: int) -> List[int]:
+    """Remove ``q`` customers drawn uniformly."""
+    routed = _routed_nodes(solution)
+    removed = random.sample(routed, min(q, len(routed)))
+    remove_nodes(solution, removed)
+    return removed
+
+
+def destroy_worst(solution: Solution, q: int, randomness: float = 3.0) -> List[int]:
+    """
+    Remove ``q`` customers with the largest removal gains
+    ``d(p, u) + d(u, n) - d(p, n)``, drawn as rank ``y ** randomness`` of
+    the sorted list (``y`` uniform) so the choice is biased, not fixed.
+    """
+    D = solution.instance.distance_matrix
+    depot = solution.depot.id
+    nodes, gains = [], []
+    for vehicle in solution.vehicles:
+        if not vehicle.sequence:
+            continue
+        path = np.array([depot] + vehicle.sequence + [depot])
+        prev, node, after = path[:-2], path[1:-1], path[2:]
+        nodes.extend(vehicle.sequence)
+        gains.append(D[prev, node] + D[node, after] - D[prev, after])
+    if not nodes:
+        return []
+    ranked = [nodes[k] for k in np.argsort(-np.concatenate(gains), kind='stable')]
+    
+    removed = []
+    while ranked and len(removed) < q:
+        removed.append(ranked.pop(int(random.random() ** randomness * len(ranked))))
+    remove_nodes(solution, removed)
+    return removed
+
+
+def destroy_shaw(solution: Solution, q: int, randomness: float = 6.0) -> List[int]:
+    """
+    Shaw (relatedness) removal: starting from a random customer, repeatedly
+    remove a customer related to one already removed. Relatedness is the
+    distance, plus the gap between window openings on time-window instances.
+    """
+    instance = solution.instance
+    D = instance.distance_matrix
+    remaining = np.array(_routed_nodes(solution))
+    if len(remaining) == 0:
+        return []
+    
+    removed = [int(remaining[random.randrange(len(remaining))])]
+    remaining = remaining[remaining != removed[0]]
+    while len(remaining) and len(removed) < q:
+        reference = random.choice(removed)
+        relatedness = np.asarray(D[reference, remaining], dtype=float)
+        if instance.has_time_windows:
+            relatedness = relatedness + np.abs(instance.ready_times[remaining] - instance.ready_times[reference])
+        order = np.argsort(relatedness, kind='stable')
+        chosen = order[int(random.random() ** randomness * len(order))]
+        removed.append(int(remaining[chosen]))
+        remaining = np.delete(remaining, chosen)
+    remove_nodes(solution, removed)
+    return removed
+
+
+def route_removal(solution: Solution, q: int) -> List[int]:
+    """Empty a whole random route (``q`` is ignored)."""
+    routed = [vehicle for vehicle in solution.vehicles if vehicle.sequence]
+    if not routed:
+        return []
+    removed = list(random.choice(routed).sequence)
+    remove_nodes(solution, removed)
+    return removed
+
+
+class InsertionCache:
+    """
+    Cheapest insertion of each pending customer into each route.
+    
+    ``costs[i, c]`` / ``positions[i, c]`` hold the best insertion of
+    ``pending[i]`` into ``vehicles[columns[c]]`` (``inf`` when capacity
+    forbids it). Columns cover the non-empty routes plus one empty vehicle,
+    all empty vehicles being equivalent. After an insertion only the column
+    of the route that changed is recomputed, so a repair of ``q`` customers
+    costs one full fill plus ``q`` single-route updates rather than ``q``
+    full scans.
+    
+    Distance and time-warp deltas of all (customer, position) pairs of a
+    route come from one vectorised pass (``Instance.insertion_time_warp``).
+    """
+    
+    def __init__(self, solution: Solution, customers: Sequence[int]):
+        self.solution = solution
+        self.instance = solution.instance
+        self.pending = np.array(customers, dtype=np.int64)
+        if not any(not vehicle.sequence for vehicle in solution.vehicles):
+            self._add_vehicle()
+        self.columns = [idx for idx, vehicle in enumerate(solution.vehicles) if vehicle.sequence]
+        self.columns.append(self._empty_vehicle())
+        self.costs = np.empty((len(self.pending), len(self.columns)))
+        self.positions = np.zeros((len(self.pending), len(self.columns)), dtype=np.int64)
+        for column in range(len(self.columns)):
+            self._fill(column)
+    
+    def _add_vehicle(self):
+        vehicles = self.solution.vehicles
+        vehicles.append(Vehicle(self.instance.capacity, len(vehicles), self.instance.nodes))
+    
+    def _empty_vehicle(self) -> int:
+        return next(idx for idx, vehicle in enumerate(self.solution.vehicles) if not vehicle.sequence)
+    
+    def _fill(self, column: int):
+        instance = self.instance
+        vehicle = self.solution.vehicles[self.columns[column]]
+        customers = self.pending
+        D = instance.distance_matrix
+        depot = self.solution.depot.id
+        path = np.array([depot] + vehicle.sequence + [depot], dtype=np.int64)
+        before, after = path[:-1], path[1:]
+        
+        deltas = (D[before[None, :], customers[:, None]] + D[customers[:, None], after[None, :]]
+                  - D[before, after][None, :])
+        fits = instance.demands[customers] + vehicle.load <= vehicle.capacity
+        
+        if instance.has_time_windows:
+            warp = instance.insertion_time_warp(vehicle, customers)
+            deltas = deltas + instance.time_warp_penalty * (warp - instance.route_segments(vehicle)[2])
+        positions = deltas.argmin(axis=1)
+        costs = deltas[np.arange(len(customers)), positions]
+        
+        self.costs[:, column] = np.where(fits, costs, math.inf)
+        self.positions[:, column] = positions
+    
+    def cheapest(self) -> Tuple[int, int]:
+        """(row, column) of the cheapest pending insertion."""
+        flat = int(np.argmin(self.costs))
+        return divmod(flat, len(self.columns))
+    
+    def most_regretted(self, k: int) -> Tuple[int, int]:
+        """
+        (row, column) for the customer with the largest regret-k value:
+        the summed extra cost of its 2nd..k-th best routes over its best.
+        Customers with fewer than ``k`` feasible routes come first.
+        """
+        k = min(k, len(self.columns))
+        best_columns = self.costs.argmin(axis=1)
+        best = self.costs[np.arange(len(self.pending)), best_columns]
+        if k < 2:
+            return int(np.argmin(best)), int(best_columns[np.argmin(best)])
+        nearest = np.sort(np.partition(self.costs, k - 1, axis=1)[:, :k], axis=1)
+        regret = (nearest[:, 1:] - nearest[:, :1]).sum(axis=1)
+        row = int(np.lexsort((best, -regret))[0])
+        return row, int(best_columns[row])
+    
+    def insert(self, row: int, column: int):
+        """Insert ``pending[row]`` at its best position in ``columns[column]`` and update the cache."""
+        customer = int(self.pending[row])
+        vehicle_index = self.columns[column]
+        vehicle = self.solution.vehicles[vehicle_index]
+        vehicle.sequence.insert(int(self.positions[row, column]), customer)
+        vehicle.load += int(self.instance.demands[customer])
+        vehicle.touch()
+        
+        self.pending = np.delete(self.pending, row)
+        self.costs = np.delete(self.costs, row, axis=0)
+        self.positions = np.delete(self.positions, row, axis=0)
+        if len(self.pending) == 0:
+            return
+        
+        if len(vehicle.sequence) == 1:
+            # The spare empty vehicle was used: give the cache a new one.
+            if not any(not v.sequence for v in self.solution.vehicles):
+                self._add_vehicle()
+            self.columns.append(self._empty_vehicle())
+            self.costs = np.hstack([self.costs, np.empty((len(self.pending), 1))])
+            self.positions = np.hstack([self.positions, np.zeros((len(self.pending), 1), dtype=np.int64)])
+            self._fill(len(self.columns) - 1)
+        self._fill(column)
+
+
+# Repair operators: insert every removed customer in place.
+
+def repair_greedy(solution: Solution, removed: List[int]):
+    """Repeatedly perform the cheapest insertion over all pending customers."""
+    if not removed:
+        return
+    cache = InsertionCache(solution, removed)
+    while len(cache.pending):
+        cache.insert(*cache.cheapest())
+    solution.invalidate_owners()
+
+
+def repair_regret(solution: Solution, removed: List[int], k: int = 2):
+    """Regret-k insertion: insert first the customer that has most to lose by waiting."""
+    if not removed:
+        return
+    cache = InsertionCache(solution, removed)
+    while len(cache.pending):
+        cache.insert(*cache.most_regretted(k))
+    solution.invalidate_owners()
+
+
+def repair_regret_3(solution: Solution, removed: List[int]):
+    repair_regret(solution, removed, k=3)
+
+
+DESTROY_OPERATORS = {
+    'random': destroy_random,
+    'worst': destroy_worst,
+    'shaw': destroy_shaw,
+    'route': route_removal,
+}
+
+REPAIR_OPERATORS = {
+    'greedy': repair_greedy,
+    'regret': repair_regret,
+    'regret_3': repair_regret_3,
+}
+
+
+# Operator weights never decay below this, so every operator stays selectable.
+MIN_WEIGHT = 0.01
+
+
+def _roulette(weights: List[float]) -> int:
+    return random.choices(range(len(weights)), weights=weights)[0]
+
+
+def alns(
+    initial_solution: Solution,
+    max_iter: Optional[int] = 5000,
+    destroy_operators: Optional[List[str]] = None,
+    repair_operators: Optional[List[str]] = None,
+    min_destroy: float = 0.05,
+    max_destroy: float = 0.3,
+    max_removed: int = 100,
+    start_worsening: float = 0.05,
+    final_temp_ratio: float = 1e-3,
+    scores: Tuple[float, float, float, float] = (10.0, 5.0, 1.0, 0.0),
+    reaction_factor: float = 0.1,
+    time_limit: Optional[float] = None,
+    verbose: bool = False,
+    stats: Optional[Dict] = None,
+    trace: Optional[ConvergenceTrace] = None
+) -> Solution:
+    """
+    Adaptive Large Neighbourhood Search.
+    
+    Args:
+        initial_solution: Starting solution (not modified)
+        max_iter: Iteration budget (None: until ``time_limit``)
+        destroy_operators: Names from ``DESTROY_OPERATORS`` (default: all)
+        repair_operators: Names from ``REPAIR_OPERATORS`` (default: greedy, regret)
+        min_destroy, max_destroy: Bounds of the number of removed customers,
+            as fractions of the customers; at most ``max_removed``
+        start_worsening: The initial temperature accepts a solution this much
+            worse (relative) with probability 1/2
+        final_temp_ratio: Final / initial temperature, reached at the end of
+            the iteration or time budget
+        scores: Rewards for a new best, an improvement of the current
+            solution, an accepted and a rejected candidate
+        reaction_factor: Weight given to the latest score when updating an
+            operator weight
+        time_limit: Wall-clock budget in seconds
+        stats: Filled with ``iterations``, ``elapsed`` and ``time_to_best``
+            (seconds) when given
+        trace: Receives a bounded log of the current and best cost
+    
+    Returns:
+        Best solution found
+    """
+    if max_iter is None and time_limit is None:
+        raise ValueError("alns needs max_iter or time_limit")
+    destroy_names = list(destroy_operators or DESTROY_OPERATORS)
+    repair_names = list(repair_operators or ('greedy', 'regret'))
+    destroys = [DESTROY_OPERATORS[name] for name in destroy_names]
+    repairs = [REPAIR_OPERATORS[name] for name in repair_names]
+    destroy_weights = [1.0] * len(destroys)
+    repair_weights = [1.0] * len(repairs)
+    
+    current = initial_solution.copy()
+    candidate = current.copy()
+    best = current.copy()
+    
+    customers = len(initial_solution.instance.clients)
+    low = max(1, min(max_removed, int(min_destroy * customers)))
+    high = max(low, min(max_removed, int(max_destroy * customers)))
+    
+    initial_temp = max(start_worsening * current.cost / math.log(2), 1e-9)
+    final_temp = initial_temp * final_temp_ratio
+    temperature = initial_temp
+    cooling_rate = final_temp_ratio ** (1.0 / max_iter) if max_iter else 1.0
+    start = best_time = time.perf_counter()
+    deadline = start + time_limit if time_limit is not None else None
+    
+    iteration = 0
+    last_improvement = 0
+    next_trace = 0 if trace is not None else None
+    while max_iter is None or iteration < max_iter:
+        if deadline is not None and iteration % CLOCK_CHECK_INTERVAL == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # Same time-driven geometric schedule as simulated_annealing.
+            fraction = (now - start) / time_limit
+            if max_iter is not None:
+                fraction = max(fraction, iteration / max_iter)
+            temperature = initial_temp * final_temp_ratio ** fraction
+        if iteration == next_trace:
+            next_trace = trace.record(iteration, current.cost, best.cost)
+        
+        d, r = _roulette(destroy_weights), _roulette(repair_weights)
+        removed = destroys[d](candidate, random.randint(low, high))
+        repairs[r](candidate, removed)
+        candidate.calculate_cost()
+        
+        if candidate.cost < best.cost - 1e-9:
+            score = scores[0]
+            best.restore(candidate)
+            current.restore(candidate)
+            best_time = time.perf_counter()
+            last_improvement = iteration
+            if verbose:
+                print(f"Iteration {iteration}: New best = {best.cost:.2f}")
+        elif candidate.cost < current.cost - 1e-9:
+            score = scores[1]
+            current.restore(candidate)
+        elif acceptance_probability(current.cost, candidate.cost, temperature) > random.random():
+            score = scores[2]
+            current.restore(candidate)
+        else:
+            score = scores[3]
+            candidate.restore(current)
+        
+        destroy_weights[d] = max((1 - reaction_factor) * destroy_weights[d] + reaction_factor * score, MIN_WEIGHT)
+        repair_weights[r] = max((1 - reaction_factor) * repair_weights[r] + reaction_factor * score, MIN_WEIGHT)
+        if deadline is None:
+            temperature = max(temperature * cooling_rate, final_temp)
+        iteration += 1
+    
+    best.calculate_cost()
+    if trace is not None:
+        trace.record(iteration, current.cost, best.cost)
+    if stats is not None:
+        stats.update(iterations=iteration, elapsed=time.perf_counter() - start,
+                     time_to_best=best_time - start)
+    if verbose:
+        print(f"ALNS completed: {iteration} iterations, best cost {best.cost:.2f} "
+              f"(last improvement at iteration {last_improvement})")
+        for name, weight in zip(destroy_names, destroy_weights):
+            print(f"  destroy {name:<8} weight {weight:.2f}")
+        for name, weight in zip(repair_names, repair_weights):
+            print(f"  repair  {name:<8} weight {weight:.2f}")
+    return best
@@ -0,0 +1,288 @@
+"""
+Batch benchmark: run one algorithm over a set of instances and seeds in a
+process pool, and compare the results with the best known solutions (BKS)
+shipped next to the instances.
+
+Every (instance, seed) run reports its cost, gap to the BKS, number of
+vehicles, time to best and iterations per second; a run that fails (e.g. an
+unreadable instance) reports its ``error`` instead, without stopping the
+batch. ``write_report`` stores the rows as CSV or JSON.
+"""
+
+import csv
+import glob
+import json
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from src.alns import alns
+from src.heuristics import construct_solution
+from src.hgs import hybrid_genetic_search
+from src.parallel import pool_context
+from src.parser import load_instance
+from src.solver import GranularNeighborhood, simulated_annealing
+
+
+ALGORITHMS = ('sa', 'alns', 'hgs')
+
+# Searched for ``<name>.sol`` after the instance's own directory.
+BKS_DIRECTORIES = tuple(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), directory)
+    for directory in ('data', 'data/cvrplib/Vrp-Set-Solomon', 'data/lkh-3/CVRP/SOLUTIONS')
+)
+
+# Report columns, in order.
+FIELDS = ('instance', 'seed', 'algorithm', 'customers', 'cost', 'bks', 'gap', 'vehicles',
+          'feasible', 'time', 'time_to_best', 'iterations', 'iterations_per_second', 'error')
+
+_NUMBER = re.compile(r'[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?')
+
+
+def solution_file_cost(path: str) -> Optional[float]:
+    """Cost of a ``.sol`` file: its ``Cost`` line, else the number in its name (LKH-3)."""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith('Cost'):
+                    return float(line.split()[-1])
+    except (OSError, ValueError):
+        return None
+    # LKH-3 solutions are named <instance>.<cost>.sol
+    suffix = os.path.basename(path)[:-len('.sol')].rsplit('.', 1)
+    if len(suffix) == 2 and _NUMBER.fullmatch(suffix[1]):
+        return float(suffix[1])
+    return None
+
+
+def reference_cost(instance_path: str, directories: Sequence[str] = BKS_DIRECTORIES) -> Optional[float]:
+    """
+    Best known cost of an instance, or None.
+    
+    Looks for ``<name>.sol`` (or LKH-3's ``<name>.<cost>.sol``) next to the
+    instance, in a sibling ``SOLUTIONS`` directory, then in ``directories``.
+    """
+    directory = os.path.dirname(os.path.abspath(instance_path))
+    name = os.path.splitext(os.path.basename(instance_path))[0]
+    searched = [directory, os.path.join(os.path.dirname(directory), 'SOLUTIONS'), *directories]
+    for candidate in searched:
+        exact = os.path.join(candidate, name + '.sol')
+        paths = [exact] if os.path.exists(exact) else []
+        paths += sorted(glob.glob(os.path.join(glob.escape(candidate), glob.escape(name) + '.*.sol')))
+        for path in paths:
+            cost = solution_file_cost(path)
+            if cost is not None:
+                return cost
+    return None
+
+
+def algorithm_options(config: Dict, algorithm: str) -> Dict:
+    """Keyword arguments of the solver of ``algorithm`` from a configuration dict."""
+    if algorithm == 'alns':
+        section = config.get('alns') or {}
+        return {
+            'max_iter': section.get('max_iterations', 5000),
+            'destroy_operators': section.get('destroy_operators'),
+            'repair_operators': section.get('repair_operators'),
+            'min_destroy': section.get('min_destroy', 0.05),
+            'max_destroy': section.get('max_destroy', 0.3),
+            'max_removed': section.get('max_removed', 100),
+            'scores': tuple(section.get('scores', (10, 5, 1, 0))),
+            'reaction_factor': section.get('reaction_factor', 0.1),
+        }
+    if algorithm == 'hgs':
+        section = config.get('hgs') or {}
+        return {
+            'max_iter': section.get('max_iterations', 500),
+            'population_size': section.get('population_size', 25),
+            'generation_size': section.get('generation_size', 40),
+            'n_elite': section.get('n_elite', 4),
+            'n_closest': section.get('n_closest', 5),
+            'max_iter_no_improvement': section.get('max_iterations_no_improvement', 1000),
+            'education_iterations': section.get('education_iterations'),
+        }
+    if algorithm == 'sa':
+        section = config.get('solver') or {}
+        return {
+            'initial_temp': section.get('initial_temperature', 2000),
+            'cooling_rate': section.get('cooling_rate', 0.999),
+            'max_iter': section.get('max_iterations', 50000),
+            'min_temp': section.get('min_temperature', 0.1),
+            'operator_selection': section.get('operator_selection', 'uniform'),
+            'reaction_factor': section.get('reaction_factor', 0.1),
+            'selection_segment': section.get('selection_segment', 500),
+        }
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+
+def _run(task: Dict) -> Dict:
+    try:
+        return _solve(task)
+    except Exception as error:
+        row = dict.fromkeys(FIELDS)
+        row.update(instance=os.path.splitext(os.path.basename(task['path']))[0], seed=task['seed'],
+                   algorithm=task['algorithm'], bks=task['bks'], error=f"{type(error).__name__}: {error}")
+        return row
+
+
+def _solve(task: Dict) -> Dict:
+    random.seed(task['seed'])
+    start = time.perf_counter()
+    instance = load_instance(task['path'], cache=task['cache'])
+    if instance.capacity <= 0:
+        raise ValueError(f"{task['path']}: no positive vehicle capacity (CAPACITY {instance.capacity})")
+    
+    if instance.num_vehicles:
+        num_vehicles = instance.num_vehicles
+    else:
+        total_demand = int(instance.demands.sum())
+        num_vehicles = max(5, -(-total_demand // instance.capacity))
+    
+    options = dict(task['options'])
+    time_limit = task['time_limit']
+    if task['max_iter'] is not None or time_limit is not None:
+        # An explicit budget replaces the configured iteration count.
+        options['max_iter'] = task['max_iter']
+    initial = construct_solution(instance, task['method'], num_vehicles, task['clarke_wright'],
+                                 time_limit=time_limit)
+    if time_limit is not None:
+        # The budget covers the whole run, construction included.
+        options['time_limit'] = max(0.0, time_limit - (time.perf_counter() - start))
+    construction = time.perf_counter() - start
+    
+    stats = {}
+    if task['algorithm'] == 'alns':
+        best = alns(initial, stats=stats, **options)
+    elif task['algorithm'] == 'hgs':
+        best = hybrid_genetic_search(initial, stats=stats, **options)
+    else:
+        neighborhood = None
+        if task['neighborhood'] is not None:
+            neighborhood = GranularNeighborhood(instance, **task['neighborhood'])
+        best = simulated_annealing(initial, neighborhood=neighborhood, stats=stats, seed=task['seed'], **options)
+    
+    bks = task['bks']
+    elapsed = stats.get('elapsed', 0.0)
+    return {
+        'instance': instance.name or os.path.basename(task['path']),
+        'seed': task['seed'],
+        'algorithm': task['algorithm'],
+        'customers': len(instance.clients),
+        'cost': round(best.cost, 4),
+        'bks': bks,
+        'gap': round(100.0 * (best.cost - bks) / bks, 4) if bks else None,
+        'vehicles': sum(1 for vehicle in best.vehicles if vehicle.sequence),
+        'feasible': best.is_feasible(),
+        'time': round(time.perf_counter() - start, 3),
+        'time_to_best': round(construction + stats.get('time_to_best', 0.0), 3),
+        'iterations': stats.get('iterations', 0),
+        'iterations_per_second': round(stats.get('iterations', 0) / elapsed, 1) if elapsed > 0 else None,
+        'error': None,
+    }
+
+
+def run_benchmark(
+    paths: Sequence[str],
+    seeds: Sequence[int] = (0,),
+    algorithm: str = 'sa',
+    config: Optional[Dict] = None,
+    time_limit: Optional[float] = None,
+    max_iter: Optional[int] = None,
+    method: str = 'clarke_wright',
+    workers: Optional[int] = None,
+    cache: bool = False,
+    verbose: bool = False
+) -> List[Dict]:
+    """
+    Solve every instance of ``paths`` once per seed, in a process pool.
+    
+    Args:
+        paths: Instance files
+        seeds: Each instance is solved once per seed
+        algorithm: One of ``ALGORITHMS``
+        config: Configuration dict (``Config.config``) supplying the solver,
+            neighbourhood and construction parameters; defaults when None
+        time_limit: Seconds per run, construction included
+        max_iter: Iterations per run (default: the configured budget, or
+            unbounded with a time limit)
+        method: Construction method of the initial solution
+        workers: Pool size (defaults to the CPU count); 1 runs in-process
+        cache: Load instances through the binary instance cache, so that
+            runs of the same instance share its distance matrix pages
+        verbose: Print every row as it completes
+    
+    Returns:
+        One report row per (instance, seed), ordered by instance then seed;
+        failed runs have an ``error`` message and no results
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    config = config or {}
+    neighborhood = None
+    section = config.get('neighborhood') or {}
+    if section.get('granular', False):
+        neighborhood = {
+            'k': section.get('k', 20),
+            'time_window_weight': section.get('time_window_weight', 0.0),
+            'max_k': section.get('max_k'),
+            'refresh': section.get('refresh', 'static'),
+        }
+    options = algorithm_options(config, algorithm)
+    clarke_wright = (config.get('heuristics') or {}).get('clarke_wright')
+    
+    tasks = [{
+        'path': path,
+        'seed': seed,
+        'algorithm': algorithm,
+        'options': options,
+        'neighborhood': neighborhood,
+        'clarke_wright': clarke_wright,
+        'method': method,
+        'time_limit': time_limit,
+        'max_iter': max_iter,
+        'cache': cache,
+        'bks': reference_cost(path),
+    } for path in paths for seed in seeds]
+    
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=pool_context())
+    rows = []
+    try:
+        for row in (pool.map if pool is not None else map)(_run, tasks):
+            rows.append(row)
+            if verbose:
+                print(format_row(row))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return rows
+
+
+def format_row(row: Dict) -> str:
+    if row['error'] is not None:
+        return f"{row['instance']:<24} seed {row['seed']:<4} failed: {row['error']}"
+    gap = f"{row['gap']:+7.2f}%" if row['gap'] is not None else '      —'
+    rate = f"{row['iterations_per_second']:.0f} it/s" if row['iterations_per_second'] else '—'
+    return (f"{row['instance']:<24} seed {row['seed']:<4} {row['cost']:>12.2f} {gap} "
+            f"{row['vehicles']:>4} veh  best at {row['time_to_best']:.2f}s  {rate}"
+            f"{'' if row['feasible'] else '  (infeasible)'}")
+
+
+def write_report(rows: List[Dict], path: str):
+    """Write the rows to ``path``: JSON for a ``.json`` extension, CSV otherwise."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,44 @@
+"""
+Checkpoints of long searches.
+
+The search state (solutions as node-id routes, schedule position, RNG
+state...) is pickled to a temporary file in the target directory, flushed to
+disk and renamed over the previous checkpoint, so a run killed at any point
+leaves either the old or the new checkpoint, never a partial one.
+"""
+
+import os
+import pickle
+import tempfile
+from typing import Dict, Optional
+
+# Stored in every checkpoint; bump it when the state layout changes.
+CHECKPOINT_VERSION = 2
+
+
+def write_checkpoint(path: str, state: Dict):
+    """Atomically replace ``path`` with the pickled ``state``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'version': CHECKPOINT_VERSION, **state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_checkpoint(path: str) -> Optional[Dict]:
+    """The state stored at ``path``, or None when there is no checkpoint yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path}: checkpoint version {state.get('version')} is not {CHECKPOINT_VERSION}")
+    return state
@@ -22,15 +22,69 @@ class Config:
                 'cooling_rate': 0.999,
                 'max_iterations': 50000,
                 'min_temperature': 0.1,
+                'time_limit': None,
+                'operator_selection': 'uniform',
+                'reaction_factor': 0.1,
+                'selection_segment': 500,
+                'checkpoint_interval': 5.0,
+                'seed': None,
                 'verbose': True
             },
             'heuristics': {
                 'initial_solution_method': 'clarke_wright',
-                'local_search_iterations': 100,
-                'operators': ['swap', 'relocate', 'two_opt', 'or_opt', 'cross_exchange']
+                'local_search_iterations': None,
+                'local_search_policy': 'first',
+                'clarke_wright': {
+                    'variant': 'parallel',
+                    'savings_neighbors': None
+                },
+                'operators': ['swap', 'relocate', 'two_opt', 'or_opt', 'cross_exchange',
+                              'two_opt_star', 'inter_or_opt']
+            },
+            'neighborhood': {
+                'granular': True,
+                'k': 20,
+                'max_k': 80,
+                'time_window_weight': 0.0,
+                'refresh': 'adaptive'
+            },
+            'parallel': {
+                'workers': 1,
+                'chains': None,
+                'methods': None,
+                'seed': None,
+                'islands': 0,
+                'migration_interval': 1000,
+                'topology': 'ring'
+            },
+            'alns': {
+                'max_iterations': 5000,
+                'destroy_operators': None,
+                'repair_operators': None,
+                'min_destroy': 0.05,
+                'max_destroy': 0.3,
+                'max_removed': 100,
+                'scores': [10, 5, 1, 0],
+                'reaction_factor': 0.1
+            },
+            'hgs': {
+                'max_iterations': 500,
+                'population_size': 25,
+                'generation_size': 40,
+                'n_elite': 4,
+                'n_closest': 5,
+                'max_iterations_no_improvement': 1000,
+                'education_iterations': None
+            },
+            'telemetry': {
+                'enabled': False,
+                'path': None,
+                'sample_interval': 1000
             },
             'instance': {
                 'default_num_vehicles': 5,
+                'cache': False,
+                'cache_dir': None,
                 'data_path': 'instance/VRPLIB/tests/data/'
             },
             'output': {
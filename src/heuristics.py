@@ -1,9 +1,30 @@
 import random
-from typing import List
-from src.models import Client, Vehicle, Solution, euclidean_distance
+import time
+from collections import deque
+from typing import List, Optional
 
+import numpy as np
+from src.models import Client, Vehicle, Solution, Instance, TIME_WARP_TOLERANCE
 
-def generate_random_solution(clients: List[Client], depot: Client, num_vehicles: int, vehicle_capacity: int) -> Solution:
+
+# Savings pairs scanned between two clock reads under a time limit.
+_SAVINGS_CLOCK_INTERVAL = 4096
+
+
+def _deadline(time_limit: Optional[float]) -> Optional[float]:
+    return time.perf_counter() + time_limit if time_limit is not None else None
+
+
+def _resolve_instance(clients: List[Client], depot: Client, vehicle_capacity: int,
+                      instance: Optional[Instance]) -> Instance:
+    if instance is None:
+        instance = Instance(clients, depot, vehicle_capacity)
+    return instance
+
+
+def generate_random_solution(clients: List[Client], depot: Client, num_vehicles: int, vehicle_capacity: int,
+                             instance: Optional[Instance] = None) -> Solution:
+    instance = _resolve_instance(clients, depot, vehicle_capacity, instance)
     vehicles = [Vehicle(vehicle_capacity, i) for i in range(num_vehicles)]
     unassigned_clients = clients[:]
     random.shuffle(unassigned_clients)
@@ -24,13 +45,20 @@ def generate_random_solution(clients: List[Client], depot: Client, num_vehicles:
             vehicles.append(new_vehicle)
             vehicles[-1].add_client(client)
     
-    return Solution(vehicles, depot)
+    return Solution(vehicles, depot, instance)
 
 
-def generate_nearest_neighbor_solution(clients: List[Client], depot: Client, num_vehicles: int, vehicle_capacity: int) -> Solution:
+def generate_nearest_neighbor_solution(clients: List[Client], depot: Client, num_vehicles: int, vehicle_capacity: int,
+                                       instance: Optional[Instance] = None) -> Solution:
+    instance = _resolve_instance(clients, depot, vehicle_capacity, instance)
+    distances = instance.distance_matrix
+    time_windows = instance.has_time_windows
+    node_segments = instance.node_segments
+    depot_segment = node_segments[depot.id]
     vehicles = [Vehicle(vehicle_capacity, i) for i in range(num_vehicles)]
     unassigned = clients[:]
     current_vehicle_idx = 0
+    route_segment = depot_segment
     
     while unassigned:
         vehicle = vehicles[current_vehicle_idx]
@@ -45,82 +73,329 @@ def generate_nearest_neighbor_solution(clients: List[Client], depot: Client, num
         
         for client in unassigned:
             if vehicle.load + client.demand <= vehicle.capacity:
-                distance = euclidean_distance(current_position, client)
+                distance = distances[current_position.id, client.id]
                 if distance < best_distance:
+                    # Time windows only restrict extending a started route, so a
+                    # fresh vehicle always takes someone and the loop terminates.
+                    if time_windows and len(vehicle.route) > 0 and instance.concatenate(
+                            route_segment, node_segments[client.id], depot_segment)[3] > TIME_WARP_TOLERANCE:
+                        continue
                     best_distance = distance
                     best_client = client
         
         if best_client:
             vehicle.add_client(best_client)
             unassigned.remove(best_client)
+            if time_windows:
+                route_segment = instance.concatenate(route_segment, node_segments[best_client.id])
         else:
+            route_segment = depot_segment
             current_vehicle_idx += 1
             if current_vehicle_idx >= len(vehicles):
                 new_vehicle = Vehicle(vehicle_capacity, len(vehicles))
                 vehicles.append(new_vehicle)
     
-    return Solution(vehicles, depot)
+    return Solution(vehicles, depot, instance)
+
+
+def _merge_route_segments(instance: Instance, segments_i: tuple, segments_j: tuple, orientation: str) -> tuple:
+    """Forward and reversed time-window segments of two routes joined at the given ends."""
+    forward_i, backward_i = segments_i
+    forward_j, backward_j = segments_j
+    if orientation == 'end-start':
+        parts = (forward_i, forward_j), (backward_j, backward_i)
+    elif orientation == 'start-end':
+        parts = (forward_j, forward_i), (backward_i, backward_j)
+    elif orientation == 'end-end':
+        parts = (forward_i, backward_j), (forward_j, backward_i)
+    else:
+        parts = (backward_i, forward_j), (backward_j, forward_i)
+    return instance.concatenate(*parts[0]), instance.concatenate(*parts[1])
 
 
-def generate_clarke_wright_solution(clients: List[Client], depot: Client, vehicle_capacity: int) -> Solution:
-    savings = []
+def _route_cost(instance: Instance, sequence: List[int]) -> float:
+    path = [instance.depot.id] + sequence + [instance.depot.id]
+    cost = float(np.sum(instance.distance_matrix[path[:-1], path[1:]]))
+    if instance.has_time_windows:
+        time_warp = instance.concatenate(*[instance.node_segments[node] for node in path])[3]
+        cost += instance.time_warp_penalty * time_warp
+    return cost
+
+
+def compute_savings(instance: Instance, clients: List[Client], granular_k: Optional[int] = None):
+    """
+    Clarke-Wright savings s(i, j) = d(0, i) + d(0, j) - d(i, j), computed vectorised
+    (on asymmetric matrices each distance is the mean of both directions).
     
-    for i, client_i in enumerate(clients):
-        for j, client_j in enumerate(clients[i+1:], i+1):
-            saving = (euclidean_distance(depot, client_i) + 
-                     euclidean_distance(depot, client_j) - 
-                     euclidean_distance(client_i, client_j))
-            savings.append((saving, client_i, client_j))
+    Args:
+        instance: Instance providing the distance matrix
+        clients: Customers, addressed below by their index in this list
+        granular_k: If set, only pairs where one customer is among the other's
+            ``granular_k`` nearest neighbours are kept
+        
+    Returns:
+        (first, second, savings) arrays of client indices (first < second) and
+        savings, sorted by decreasing saving (ties in pair order)
+    """
+    D = instance.distance_matrix
+    ids = np.array([client.id for client in clients], dtype=np.int64)
+    n = len(ids)
     
-    savings.sort(reverse=True, key=lambda x: x[0])
+    if granular_k is not None:
+        index_of = np.full(len(instance.coords), -1, dtype=np.int64)
+        index_of[ids] = np.arange(n)
+        candidates = index_of[instance.candidate_lists(granular_k)[ids]]
+        rows = np.repeat(np.arange(n), candidates.shape[1])
+        cols = candidates.ravel()
+        pairs = np.unique(np.stack([np.minimum(rows, cols), np.maximum(rows, cols)], axis=1), axis=0)
+        first, second = pairs[:, 0], pairs[:, 1]
+    else:
+        first, second = np.triu_indices(n, 1)
     
-    routes = {client: [client] for client in clients}
-    loads = {client: client.demand for client in clients}
+    depot_distances = np.asarray(D[np.full(n, instance.depot.id), ids], dtype=float)
+    links = np.asarray(D[ids[first], ids[second]], dtype=float)
+    if not instance.symmetric:
+        # Routes are merged as undirected chains: average both directions.
+        depot_distances = (depot_distances + np.asarray(D[ids, np.full(n, instance.depot.id)], dtype=float)) / 2
+        links = (links + np.asarray(D[ids[second], ids[first]], dtype=float)) / 2
+    savings = depot_distances[first] + depot_distances[second] - links
+    order = np.argsort(-savings, kind='stable')
+    return first[order], second[order], savings[order]
+
+
+def generate_clarke_wright_solution(clients: List[Client], depot: Client, vehicle_capacity: int,
+                                    instance: Optional[Instance] = None,
+                                    granular_k: Optional[int] = None,
+                                    variant: str = 'parallel',
+                                    time_limit: Optional[float] = None) -> Solution:
+    """
+    Clarke-Wright savings construction.
     
-    for saving_value, client_i, client_j in savings:
-        route_i = routes[client_i]
-        route_j = routes[client_j]
-        
-        if route_i == route_j:
-            continue
-        
-        if client_i != route_i[0] and client_i != route_i[-1]:
+    ``variant='parallel'`` merges any two routes at their ends in savings
+    order; ``'sequential'`` grows one route at a time from both of its ends
+    before opening the next. ``granular_k`` restricts savings to
+    k-nearest-neighbour pairs, which keeps large instances near-linear.
+    When ``time_limit`` runs out, merging stops and the routes built so far
+    (unmerged clients on their own route) are returned. On asymmetric
+    instances each route is finally driven in its cheaper direction.
+    """
+    instance = _resolve_instance(clients, depot, vehicle_capacity, instance)
+    deadline = _deadline(time_limit)
+    if variant not in ('parallel', 'sequential'):
+        raise ValueError(f"Unknown Clarke-Wright variant: {variant}")
+    
+    first, second, savings = compute_savings(instance, clients, granular_k)
+    if variant == 'sequential':
+        routes = _sequential_savings(instance, clients, vehicle_capacity,
+                                     first.tolist(), second.tolist(), savings.tolist(), deadline)
+    else:
+        routes = _parallel_savings(instance, clients, vehicle_capacity, first.tolist(), second.tolist(),
+                                   deadline)
+    
+    vehicles = []
+    for idx, (route, load) in enumerate(routes):
+        vehicle = Vehicle(vehicle_capacity, idx, instance.nodes)
+        vehicle.sequence = [clients[k].id for k in route]
+        if not instance.symmetric and _route_cost(instance, vehicle.sequence[::-1]) < _route_cost(instance, vehicle.sequence):
+            vehicle.sequence.reverse()
+        vehicle.load = load
+        vehicle.touch()
+        vehicles.append(vehicle)
+    
+    return Solution(vehicles, depot, instance)
+
+
+def _parallel_savings(instance: Instance, clients: List[Client], capacity: int,
+                      first: List[int], second: List[int], deadline: Optional[float] = None) -> List[tuple]:
+    # Routes are undirected chains: each client keeps up to two chain
+    # neighbours, so it is a route end iff it has fewer than two. Route
+    # identity, load, ends and time-window segments live on a union-find
+    # root, which makes every merge O(1) amortised with no list copying.
+    n = len(clients)
+    parent = list(range(n))
+    size = [1] * n
+    loads = [client.demand for client in clients]
+    head = list(range(n))
+    tail = list(range(n))
+    links = [[] for _ in range(n)]
+    
+    time_windows = instance.has_time_windows
+    if time_windows:
+        node_segments = instance.node_segments
+        depot_segment = node_segments[instance.depot.id]
+        segments = [(node_segments[c.id], node_segments[c.id]) for c in clients]
+    
+    def find(k: int) -> int:
+        root = k
+        while parent[root] != root:
+            root = parent[root]
+        while parent[k] != root:
+            parent[k], k = root, parent[k]
+        return root
+    
+    for scanned, (i, j) in enumerate(zip(first, second)):
+        if deadline is not None and scanned % _SAVINGS_CLOCK_INTERVAL == 0 and time.perf_counter() >= deadline:
+            break
+        if len(links[i]) == 2 or len(links[j]) == 2:
             continue
-        if client_j != route_j[0] and client_j != route_j[-1]:
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
             continue
         
-        combined_load = loads[client_i] + loads[client_j]
-        if combined_load > vehicle_capacity:
+        combined_load = loads[root_i] + loads[root_j]
+        if combined_load > capacity:
             continue
         
-        if client_i == route_i[-1] and client_j == route_j[0]:
-            new_route = route_i + route_j
-        elif client_i == route_i[0] and client_j == route_j[-1]:
-            new_route = route_j + route_i
-        elif client_i == route_i[-1] and client_j == route_j[-1]:
-            new_route = route_i + route_j[::-1]
-        elif client_i == route_i[0] and client_j == route_j[0]:
-            new_route = route_i[::-1] + route_j
+        if i == tail[root_i] and j == head[root_j]:
+            orientation, new_head, new_tail = 'end-start', head[root_i], tail[root_j]
+        elif i == head[root_i] and j == tail[root_j]:
+            orientation, new_head, new_tail = 'start-end', head[root_j], tail[root_i]
+        elif i == tail[root_i] and j == tail[root_j]:
+            orientation, new_head, new_tail = 'end-end', head[root_i], head[root_j]
         else:
+            orientation, new_head, new_tail = 'start-start', tail[root_i], tail[root_j]
+        
+        if time_windows:
+            new_segments = _merge_route_segments(instance, segments[root_i], segments[root_j], orientation)
+            if instance.concatenate(depot_segment, new_segments[0], depot_segment)[3] > TIME_WARP_TOLERANCE:
+                continue
+        
+        links[i].append(j)
+        links[j].append(i)
+        if size[root_i] < size[root_j]:
+            root_i, root_j = root_j, root_i
+        parent[root_j] = root_i
+        size[root_i] += size[root_j]
+        loads[root_i] = combined_load
+        head[root_i], tail[root_i] = new_head, new_tail
+        if time_windows:
+            segments[root_i] = new_segments
+    
+    routes = []
+    for k in range(n):
+        if find(k) != k:
             continue
+        route = [head[k]]
+        previous = -1
+        while len(route) < size[k]:
+            current = route[-1]
+            following = links[current][0] if links[current][0] != previous else links[current][1]
+            previous = current
+            route.append(following)
+        routes.append((route, loads[k]))
+    return routes
+
+
+def _sequential_savings(instance: Instance, clients: List[Client], capacity: int,
+                        first: List[int], second: List[int], savings: List[float],
+                        deadline: Optional[float] = None) -> List[tuple]:
+    # Each client's savings partners in decreasing order, consumed through a
+    # pointer while the client is an end of the route being grown. A partner
+    # skipped for capacity or time windows can only get worse as the route
+    # grows, so every list is scanned at most once overall.
+    n = len(clients)
+    partners = [[] for _ in range(n)]
+    partner_savings = [[] for _ in range(n)]
+    for i, j, saving in zip(first, second, savings):
+        partners[i].append(j)
+        partner_savings[i].append(saving)
+        partners[j].append(i)
+        partner_savings[j].append(saving)
+    pointer = [0] * n
+    routed = [False] * n
+    demand = [client.demand for client in clients]
+    
+    time_windows = instance.has_time_windows
+    if time_windows:
+        node_segments = instance.node_segments
+        depot_segment = node_segments[instance.depot.id]
+        client_segments = [node_segments[c.id] for c in clients]
+    
+    def extend(segments, k: int, at_tail: bool):
+        forward, backward = segments
+        if at_tail:
+            merged = instance.concatenate(forward, client_segments[k]), \
+                instance.concatenate(client_segments[k], backward)
+        else:
+            merged = instance.concatenate(client_segments[k], forward), \
+                instance.concatenate(backward, client_segments[k])
+        if instance.concatenate(depot_segment, merged[0], depot_segment)[3] > TIME_WARP_TOLERANCE:
+            return None
+        return merged
+    
+    def best_extension(end: int, load: int, segments, at_tail: bool):
+        candidates = partners[end]
+        while pointer[end] < len(candidates):
+            k = candidates[pointer[end]]
+            if not routed[k] and load + demand[k] <= capacity:
+                merged = extend(segments, k, at_tail) if time_windows else None
+                if not time_windows or merged is not None:
+                    return k, partner_savings[end][pointer[end]], merged
+            pointer[end] += 1
+        return None, None, None
+    
+    routes = []
+    for scanned, (i, j) in enumerate(zip(first, second)):
+        if deadline is not None and scanned % _SAVINGS_CLOCK_INTERVAL == 0 and time.perf_counter() >= deadline:
+            break
+        if routed[i] or routed[j] or demand[i] + demand[j] > capacity:
+            continue
+        segments = None
+        if time_windows:
+            segments = extend((client_segments[i], client_segments[i]), j, at_tail=True)
+            if segments is None:
+                continue
         
-        for client in new_route:
-            routes[client] = new_route
-            loads[client] = combined_load
-    
-    unique_routes = []
-    seen = set()
-    for route in routes.values():
-        route_id = id(route)
-        if route_id not in seen:
-            seen.add(route_id)
-            unique_routes.append(route)
+        route = deque([i, j])
+        routed[i] = routed[j] = True
+        load = demand[i] + demand[j]
+        
+        while True:
+            head_k, head_saving, head_segments = best_extension(route[0], load, segments, at_tail=False)
+            tail_k, tail_saving, tail_segments = best_extension(route[-1], load, segments, at_tail=True)
+            if head_k is None and tail_k is None:
+                break
+            if head_k is None or (tail_k is not None and tail_saving >= head_saving):
+                route.append(tail_k)
+                routed[tail_k] = True
+                load += demand[tail_k]
+                segments = tail_segments
+            else:
+                route.appendleft(head_k)
+                routed[head_k] = True
+                load += demand[head_k]
+                segments = head_segments
+        routes.append((list(route), load))
     
-    vehicles = []
-    for idx, route in enumerate(unique_routes):
-        vehicle = Vehicle(vehicle_capacity, idx)
-        for client in route:
-            vehicle.add_client(client)
-        vehicles.append(vehicle)
+    for k in range(n):
+        if not routed[k]:
+            routes.append(([k], demand[k]))
+    return routes
+
+
+CONSTRUCTION_METHODS = ('random', 'nearest_neighbor', 'clarke_wright')
+
+
+def construct_solution(instance: Instance, method: str, num_vehicles: int,
+                       clarke_wright_options: Optional[dict] = None,
+                       time_limit: Optional[float] = None) -> Solution:
+    """
+    Build an initial solution with one of ``CONSTRUCTION_METHODS``.
     
-    return Solution(vehicles, depot)
+    ``clarke_wright_options`` holds the ``heuristics.clarke_wright`` config
+    section (``variant``, ``savings_neighbors``). ``time_limit`` bounds the
+    Clarke-Wright merge phase; the random and nearest-neighbour
+    constructions always complete.
+    """
+    clients, depot, capacity = instance.clients, instance.depot, instance.capacity
+    if method == 'random':
+        return generate_random_solution(clients, depot, num_vehicles, capacity, instance)
+    if method == 'nearest_neighbor':
+        return generate_nearest_neighbor_solution(clients, depot, num_vehicles, capacity, instance)
+    if method == 'clarke_wright':
+        options = clarke_wright_options or {}
+        return generate_clarke_wright_solution(clients, depot, capacity, instance,
+                                               granular_k=options.get('savings_neighbors'),
+                                               variant=options.get('variant', 'parallel'),
+                                               time_limit=time_limit)
+    raise ValueError(f"Unknown construction method: {method}")
@@ -0,0 +1,400 @@
+"""
+Hybrid Genetic Search (Vidal et al. 2012, Vidal 2022).
+
+Individuals are giant tours (all customers, no depot) decoded into routes
+by ``split``. Offspring are bred by order crossover on the giant tours,
+decoded, then educated by ``local_search``. The population keeps diversity
+through a biased fitness mixing the cost rank with the rank of the
+broken-pairs distance to the closest individuals.
+"""
+
+import bisect
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from src.models import Instance, Solution, join_segments
+from src.solver import local_search
+from src.alns import repair_greedy, repair_regret
+from src.telemetry import ConvergenceTrace
+
+
+def split(instance: Instance, tour: np.ndarray) -> List[List[int]]:
+    """
+    Optimal partition of a giant tour into capacity-feasible routes, for
+    the solution cost (distance plus penalised time warp). The fleet is
+    unlimited, as in the other engines.
+    
+    Without time windows this is the linear Split of Vidal (2016): the cost
+    of the route serving ``tour[i:j]`` is ``value[i]`` plus a term that
+    depends only on ``j``, so the best predecessor of ``j`` is a
+    sliding-window minimum over the ``i`` whose load fits, kept in a
+    monotone deque. Time warp breaks that decomposition; time-window
+    instances use ``_split_time_windows`` instead.
+    """
+    if instance.has_time_windows:
+        return _split_time_windows(instance, tour)
+    D = instance.distance_matrix
+    depot = instance.depot.id
+    n = len(tour)
+    load = np.concatenate(([0], np.cumsum(instance.demands[tour]))).tolist()
+    along = np.concatenate(([0.0], np.cumsum(D[tour[:-1], tour[1:]]))).tolist()
+    leave = D[depot, tour].tolist()
+    back = D[tour, depot].tolist()
+    capacity = instance.capacity
+    
+    potential = [0.0] * (n + 1)
+    predecessor = [0] * (n + 1)
+    value = [0.0] * n
+    window = deque()
+    for j in range(1, n + 1):
+        i = j - 1
+        value[i] = potential[i] + leave[i] - along[i]
+        while window and value[window[-1]] >= value[i]:
+            window.pop()
+        window.append(i)
+        while load[j] - load[window[0]] > capacity:
+            window.popleft()
+            if not window:
+                raise ValueError(f"Customer {int(tour[i])} exceeds the vehicle capacity")
+        front = window[0]
+        potential[j] = value[front] + along[j - 1] + back[j - 1]
+        predecessor[j] = front
+    
+    return _routes(tour, predecessor)
+
+
+def _split_time_windows(instance: Instance, tour: np.ndarray) -> List[List[int]]:
+    """
+    Bellman Split pricing every capacity-feasible route ``tour[i:i + k]``
+    with its time warp. Routes of length ``k`` are extended to ``k + 1``
+    for all starts ``i`` at once with one array segment join, so the cost
+    table takes O(L) vectorised passes, ``L`` being the longest route
+    the capacity allows, and the shortest path over it O(n) small ones.
+    """
+    D = instance.distance_matrix
+    depot = instance.depot.id
+    n = len(tour)
+    load = np.concatenate(([0], np.cumsum(instance.demands[tour])))
+    along = np.concatenate(([0.0], np.cumsum(D[tour[:-1], tour[1:]])))
+    leave = np.asarray(D[depot, tour], dtype=float)
+    back = np.asarray(D[tour, depot], dtype=float)
+    reach = np.searchsorted(load, load[:-1] + instance.capacity, side='right') - 1
+    longest = int((reach - np.arange(n)).max())
+    
+    _, _, depot_duration, _, depot_ready, depot_due = instance.node_segments[depot]
+    service = instance.service_times[tour]
+    ready, due = instance.ready_times[tour], instance.due_dates[tour]
+    
+    # cost[i, k]: route serving tour[i:i + k] (inf when it overloads or overruns the tour).
+    cost = np.full((n, longest + 1), np.inf)
+    segment = join_segments(depot_duration, 0.0, depot_ready, depot_due,
+                            service, 0.0, ready, due, leave)
+    for k in range(1, longest + 1):
+        starts = np.arange(n - k + 1)
+        ends = starts + k - 1
+        if k > 1:
+            segment = join_segments(*(part[:n - k + 1] for part in segment),
+                                    service[ends], 0.0, ready[ends], due[ends],
+                                    np.asarray(D[tour[ends - 1], tour[ends]], dtype=float))
+        time_warp = join_segments(*segment, depot_duration, 0.0, depot_ready, depot_due, back[ends])[1]
+        fits = reach[starts] >= ends + 1
+        cost[starts[fits], k] = (leave[starts] + along[ends] - along[starts] + back[ends]
+                                 + instance.time_warp_penalty * time_warp)[fits]
+    
+    potential = np.zeros(n + 1)
+    predecessor = [0] * (n + 1)
+    for j in range(1, n + 1):
+        lengths = np.arange(1, min(j, longest) + 1)
+        candidates = potential[j - lengths] + cost[j - lengths, lengths]
+        best = int(np.argmin(candidates))
+        if not np.isfinite(candidates[best]):
+            raise ValueError(f"Customer {int(tour[j - 1])} exceeds the vehicle capacity")
+        potential[j] = candidates[best]
+        predecessor[j] = j - int(lengths[best])
+    return _routes(tour, predecessor)
+
+
+def _routes(tour: np.ndarray, predecessor: List[int]) -> List[List[int]]:
+    routes = []
+    j = len(tour)
+    tour = tour.tolist()
+    while j > 0:
+        routes.append(tour[predecessor[j]:j])
+        j = predecessor[j]
+    routes.reverse()
+    return routes
+
+
+def order_crossover(parent1: np.ndarray, parent2: np.ndarray, start: int, end: int) -> np.ndarray:
+    """
+    OX: the child copies ``parent1[start:end + 1]`` in place and takes the
+    remaining customers in the order of ``parent2``, starting after ``end``.
+    """
+    n = len(parent1)
+    child = np.empty_like(parent1)
+    segment = parent1[start:end + 1]
+    child[start:end + 1] = segment
+    taken = np.zeros(int(max(parent1.max(), parent2.max())) + 1, dtype=bool)
+    taken[segment] = True
+    rotated = np.roll(parent2, -(end + 1))
+    rest = rotated[~taken[rotated]]
+    child[(end + 1 + np.arange(len(rest))) % n] = rest
+    return child
+
+
+def random_solution(instance: Instance, seeds: int) -> Solution:
+    """
+    ``seeds`` random customers open one route each; the others are added by
+    cheapest or regret insertion (drawn at random). Random giant tours would
+    diversify as well, but their education is far slower on time-window
+    instances.
+    """
+    customers = [client.id for client in instance.clients]
+    random.shuffle(customers)
+    seeds = min(seeds, len(customers))
+    solution = Solution.from_routes(instance, [[customer] for customer in customers[:seeds]])
+    random.choice((repair_greedy, repair_regret))(solution, customers[seeds:])
+    solution.calculate_cost()
+    return solution
+
+
+def giant_tour(solution: Solution) -> np.ndarray:
+    """Concatenation of the routes of ``solution``."""
+    return np.array([node for vehicle in solution.vehicles for node in vehicle.sequence], dtype=np.int64)
+
+
+def neighbours(solution: Solution) -> Tuple[np.ndarray, np.ndarray]:
+    """Successor and predecessor of every node (the depot when at a route end)."""
+    depot = solution.depot.id
+    path = [depot]
+    for vehicle in solution.vehicles:
+        if vehicle.sequence:
+            path.extend(vehicle.sequence)
+            path.append(depot)
+    path = np.array(path, dtype=np.int64)
+    inner = np.flatnonzero(path != depot)
+    successor = np.full(len(solution.instance.demands), depot, dtype=np.int64)
+    predecessor = successor.copy()
+    successor[path[inner]] = path[inner + 1]
+    predecessor[path[inner]] = path[inner - 1]
+    return successor, predecessor
+
+
+def broken_pairs_distance(successor1: np.ndarray, predecessor1: np.ndarray,
+                          successor2: np.ndarray, predecessor2: np.ndarray,
+                          customers: np.ndarray) -> float:
+    """Fraction of customers whose edges in the first solution are missing from the second."""
+    s1, p1 = successor1[customers], predecessor1[customers]
+    s2, p2 = successor2[customers], predecessor2[customers]
+    broken = ((s1 != s2) & (s1 != p2)) | ((p1 != p2) & (p1 != s2))
+    return float(broken.mean())
+
+
+class _Individual:
+    __slots__ = ('solution', 'tour', 'successor', 'predecessor', 'cost', 'proximity')
+    
+    def __init__(self, solution: Solution):
+        self.solution = solution
+        self.tour = giant_tour(solution)
+        self.successor, self.predecessor = neighbours(solution)
+        self.cost = solution.cost
+        # (distance, id(other), other) sorted by distance.
+        self.proximity = []
+    
+    def diversity(self, n_closest: int) -> float:
+        closest = self.proximity[:n_closest]
+        return sum(entry[0] for entry in closest) / len(closest) if closest else 0.0
+
+
+class Population:
+    """
+    Individuals with broken-pairs proximity lists and biased fitness.
+    
+    When the population reaches ``size + generation_size`` individuals it
+    is cut back to ``size``, removing clones first, then the individual of
+    worst biased fitness, one at a time.
+    """
+    
+    def __init__(self, instance: Instance, size: int = 25, generation_size: int = 40,
+                 n_elite: int = 4, n_closest: int = 5):
+        self.customers = np.array([client.id for client in instance.clients], dtype=np.int64)
+        self.size = size
+        self.generation_size = generation_size
+        self.n_elite = n_elite
+        self.n_closest = n_closest
+        self.individuals: List[_Individual] = []
+        self.fitness: List[float] = []
+    
+    def __len__(self) -> int:
+        return len(self.individuals)
+    
+    def add(self, solution: Solution):
+        individual = _Individual(solution)
+        for other in self.individuals:
+            distance = broken_pairs_distance(individual.successor, individual.predecessor,
+                                             other.successor, other.predecessor, self.customers)
+            bisect.insort(individual.proximity, (distance, id(other), other))
+            bisect.insort(other.proximity, (distance, id(individual), individual))
+        self.individuals.append(individual)
+        if len(self.individuals) >= self.size + self.generation_size:
+            self._select_survivors()
+        self._update_fitness()
+    
+    def _remove(self, individual: _Individual):
+        self.individuals.remove(individual)
+        for other in self.individuals:
+            other.proximity = [entry for entry in other.proximity if entry[2] is not individual]
+    
+    def _update_fitness(self):
+        n = len(self.individuals)
+        if n == 1:
+            self.fitness = [0.0]
+            return
+        by_cost = sorted(range(n), key=lambda idx: self.individuals[idx].cost)
+        by_diversity = sorted(range(n), key=lambda idx: -self.individuals[idx].diversity(self.n_closest))
+        diversity_rank = [0] * n
+        for rank, idx in enumerate(by_diversity):
+            diversity_rank[idx] = rank
+        weight = 1.0 - min(self.n_elite, n) / n
+        self.fitness = [0.0] * n
+        for rank, idx in enumerate(by_cost):
+            self.fitness[idx] = (rank + weight * diversity_rank[idx]) / (n - 1)
+    
+    def _select_survivors(self):
+        while len(self.individuals) > self.size:
+            self._update_fitness()
+            clones = [idx for idx, ind in enumerate(self.individuals)
+                      if ind.proximity and ind.proximity[0][0] == 0.0]
+            candidates = clones or range(len(self.individuals))
+            worst = max(candidates, key=lambda idx: self.fitness[idx])
+            self._remove(self.individuals[worst])
+    
+    def tournament(self) -> _Individual:
+        """Binary tournament on biased fitness."""
+        first, second = random.randrange(len(self)), random.randrange(len(self))
+        return self.individuals[first if self.fitness[first] <= self.fitness[second] else second]
+    
+    def average_diversity(self) -> float:
+        if len(self) < 2:
+            return 0.0
+        return sum(ind.diversity(self.n_closest) for ind in self.individuals) / len(self)
+
+
+def hybrid_genetic_search(
+    initial_solution: Solution,
+    max_iter: Optional[int] = 2000,
+    population_size: int = 25,
+    generation_size: int = 40,
+    n_elite: int = 4,
+    n_closest: int = 5,
+    max_iter_no_improvement: int = 1000,
+    education_iterations: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    verbose: bool = False,
+    stats: Optional[Dict] = None,
+    trace: Optional[ConvergenceTrace] = None
+) -> Solution:
+    """
+    Hybrid Genetic Search.
+    
+    Args:
+        initial_solution: Seeds the population (not modified)
+        max_iter: Number of offspring (None: until ``time_limit``)
+        population_size: Individuals kept after survivor selection
+        generation_size: Offspring added before the next survivor selection
+        n_elite: Best individuals protected from the diversity term
+        n_closest: Neighbours averaged for the diversity contribution
+        max_iter_no_improvement: Offspring without a new best before the
+            population is rebuilt from ``random_solution`` individuals (random
+            seed routes completed by insertion)
+        education_iterations: Cap on the improving moves of the local search
+            educating each offspring (None: local optimum)
+        time_limit: Wall-clock budget in seconds
+        stats: Filled with the number of offspring (``iterations``),
+            ``elapsed`` and ``time_to_best`` (seconds) when given
+        trace: Receives a bounded log of the offspring and best cost, one
+            row per offspring before downsampling
+    
+    Returns:
+        Best solution found
+    """
+    if max_iter is None and time_limit is None:
+        raise ValueError("hybrid_genetic_search needs max_iter or time_limit")
+    instance = initial_solution.instance
+    start = best_time = time.perf_counter()
+    deadline = start + time_limit if time_limit is not None else None
+    max_routes = max(1, sum(1 for vehicle in initial_solution.vehicles if vehicle.sequence))
+    
+    def remaining() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.perf_counter())
+    
+    def expired() -> bool:
+        return deadline is not None and time.perf_counter() >= deadline
+    
+    def educate(tour: np.ndarray) -> Solution:
+        solution = Solution.from_routes(instance, split(instance, tour))
+        solution.calculate_cost()
+        return local_search(solution, max_iterations=education_iterations, time_limit=remaining())
+    
+    def populate(population: Population):
+        while len(population) < population_size and not expired():
+            solution = random_solution(instance, random.randint(1, max_routes))
+            population.add(local_search(solution, max_iterations=education_iterations,
+                                        time_limit=remaining()))
+    
+    best = initial_solution.copy()
+    best.calculate_cost()
+    population = Population(instance, population_size, generation_size, n_elite, n_closest)
+    population.add(local_search(best, max_iterations=education_iterations, time_limit=remaining()))
+    populate(population)
+    for individual in population.individuals:
+        if individual.cost < best.cost - 1e-9:
+            best = individual.solution.copy()
+            best_time = time.perf_counter()
+    
+    iteration = 0
+    last_improvement = 0
+    restarts = 0
+    next_trace = 0
+    if trace is not None:
+        next_trace = trace.record(0, best.cost, best.cost)
+    while (max_iter is None or iteration < max_iter) and not expired():
+        parent1, parent2 = population.tournament(), population.tournament()
+        n = len(parent1.tour)
+        cut1, cut2 = sorted(random.sample(range(n), 2)) if n > 1 else (0, 0)
+        offspring = educate(order_crossover(parent1.tour, parent2.tour, cut1, cut2))
+        population.add(offspring)
+        iteration += 1
+        
+        if offspring.cost < best.cost - 1e-9:
+            best = offspring.copy()
+            best_time = time.perf_counter()
+            last_improvement = iteration
+            if verbose:
+                print(f"Offspring {iteration}: New best = {best.cost:.2f}")
+        elif iteration - last_improvement >= max_iter_no_improvement:
+            population = Population(instance, population_size, generation_size, n_elite, n_closest)
+            population.add(best.copy())
+            populate(population)
+            last_improvement = iteration
+            restarts += 1
+        
+        if trace is not None and iteration == next_trace:
+            next_trace = trace.record(iteration, offspring.cost, best.cost)
+        
+        if verbose and iteration % 100 == 0:
+            print(f"Offspring {iteration}: best {best.cost:.2f}, population {len(population)}, "
+                  f"diversity {population.average_diversity():.3f}")
+    
+    best.calculate_cost()
+    if trace is not None:
+        trace.record(iteration, offspring.cost if iteration else best.cost, best.cost)
+    if stats is not None:
+        stats.update(iterations=iteration, elapsed=time.perf_counter() - start,
+                     time_to_best=best_time - start)
+    if verbose:
+        print(f"HGS completed: {iteration} offspring, {restarts} restarts, best cost {best.cost:.2f}")
+    return best
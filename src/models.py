@@ -1,84 +1,623 @@
+import itertools
 import math
-from typing import List, Optional
-from copy import deepcopy
+import os
+import tempfile
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Above this many nodes the distance matrix is filled row by row on demand
+# instead of being materialised up front (a dense 2000x2000 float64 matrix
+# is already 32 MB).
+DENSE_MATRIX_THRESHOLD = 2000
+
+# Cost charged per unit of time warp (lateness) when time windows are active.
+DEFAULT_TIME_WARP_PENALTY = 10.0
+
+# Time warp below this is floating-point noise, not a violated window.
+TIME_WARP_TOLERANCE = 1e-6
 
 
 class Client:
-    def __init__(self, id: int, x: float, y: float, demand: int):
+    def __init__(self, id: int, x: float, y: float, demand: int,
+                 ready_time: float = 0.0, due_date: float = math.inf, service_time: float = 0.0):
         self.id = id
         self.x = x
         self.y = y
         self.demand = demand
+        self.ready_time = ready_time
+        self.due_date = due_date
+        self.service_time = service_time
     
     def __repr__(self):
         return f"Client({self.id}, demand={self.demand})"
 
 
+class RouteView(Sequence):
+    """
+    Read-only list of Client objects over a vehicle's node-id sequence.
+    
+    Keeps ``vehicle.route`` consumers working while routes are stored as
+    plain integer ids; clients are looked up in the shared node table and
+    never duplicated.
+    """
+    
+    __slots__ = ('_sequence', '_nodes')
+    
+    def __init__(self, sequence: List[int], nodes: Dict[int, Client]):
+        self._sequence = sequence
+        self._nodes = nodes
+    
+    def __len__(self):
+        return len(self._sequence)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._nodes[node] for node in self._sequence[index]]
+        return self._nodes[self._sequence[index]]
+    
+    def __iter__(self):
+        nodes = self._nodes
+        return (nodes[node] for node in self._sequence)
+    
+    def __contains__(self, client):
+        return isinstance(client, Client) and self._nodes.get(client.id) is client \
+            and client.id in self._sequence
+    
+    def __eq__(self, other):
+        return list(self) == list(other)
+    
+    def __repr__(self):
+        return repr(list(self))
+
+
+# Every route mutation takes a fresh stamp from this counter, so two vehicles
+# carrying the same stamp are guaranteed to hold the same route.
+_stamps = itertools.count()
+
+
 class Vehicle:
-    def __init__(self, capacity: int, id: int = 0):
+    def __init__(self, capacity: int, id: int = 0, nodes: Optional[Dict[int, Client]] = None):
         self.id = id
         self.capacity = capacity
-        self.route: List[Client] = []
+        # Without an instance the vehicle keeps a private table of its
+        # clients; an instance's node table is shared and only read.
+        self.nodes: Dict[int, Client] = nodes if nodes is not None else {}
+        self.owns_nodes = nodes is None
+        self.sequence: List[int] = []
         self.load = 0
+        self.stamp = next(_stamps)
+        self.segments = None
+        self.positions = None
+        self.arc_sums = None
+        self.load_sums = None
+        self.distance_cache = None
+    
+    @property
+    def route(self) -> RouteView:
+        return RouteView(self.sequence, self.nodes)
+    
+    @route.setter
+    def route(self, clients: List[Client]):
+        for client in clients:
+            self._register(client)
+        self.sequence = [client.id for client in clients]
+        self.load = sum(client.demand for client in clients)
+        self.touch()
+    
+    def attach(self, nodes: Dict[int, Client]):
+        """Resolve the route through an instance's (shared, read-only) node table."""
+        self.nodes = nodes
+        self.owns_nodes = False
+    
+    def _register(self, client: Client):
+        if self.owns_nodes:
+            self.nodes.setdefault(client.id, client)
+        elif client.id not in self.nodes:
+            raise KeyError(f"Client {client.id} is not a node of the instance")
+    
+    def touch(self):
+        """
+        Mark the route as modified; must follow any direct edit of ``sequence``.
+        
+        Every per-route cache (distance, time-window segments, positions,
+        prefix sums) is keyed by the stamp, so it is rebuilt on next use and
+        routes left untouched keep theirs.
+        """
+        self.stamp = next(_stamps)
+    
+    def position(self, node: int) -> Optional[int]:
+        """Index of ``node`` in the route, from an index rebuilt only after mutations."""
+        cached = self.positions
+        if cached is None or cached[0] != self.stamp:
+            cached = (self.stamp, {n: idx for idx, n in enumerate(self.sequence)})
+            self.positions = cached
+        return cached[1].get(node)
     
     def add_client(self, client: Client) -> bool:
         if self.load + client.demand <= self.capacity:
-            self.route.append(client)
+            self._register(client)
+            self.sequence.append(client.id)
             self.load += client.demand
+            self.touch()
             return True
         return False
     
     def remove_client(self, client: Client):
-        if client in self.route:
-            self.route.remove(client)
-            self.load -= client.demand
+        try:
+            self.sequence.remove(client.id)
+        except ValueError:
+            return
+        self.load -= client.demand
+        self.touch()
     
     def insert_client(self, client: Client, position: int) -> bool:
         if self.load + client.demand <= self.capacity:
-            self.route.insert(position, client)
+            self._register(client)
+            self.sequence.insert(position, client.id)
             self.load += client.demand
+            self.touch()
             return True
         return False
     
     def clear(self):
-        self.route = []
+        self.sequence = []
         self.load = 0
+        self.touch()
+    
+    def copy(self) -> 'Vehicle':
+        clone = Vehicle.__new__(Vehicle)
+        clone.id = self.id
+        clone.capacity = self.capacity
+        clone.nodes = self.nodes
+        clone.owns_nodes = self.owns_nodes
+        clone.sequence = self.sequence[:]
+        clone.load = self.load
+        clone.stamp = self.stamp
+        clone.segments = self.segments
+        clone.positions = self.positions
+        clone.arc_sums = self.arc_sums
+        clone.load_sums = self.load_sums
+        clone.distance_cache = self.distance_cache
+        return clone
+    
+    def __repr__(self):
+        return f"Vehicle({self.id}, load={self.load}/{self.capacity}, clients={len(self.sequence)})"
+
+
+class Instance:
+    """
+    Problem data shared by every solution of one instance.
+    
+    Nodes are addressed by their integer id, which is also the row/column
+    index into ``distance_matrix``. The matrix is built once here (or taken
+    from explicit edge weights, possibly asymmetric: ``D[i, j]`` is the cost
+    of travelling from ``i`` to ``j``) and is the only place distances come
+    from during the search.
+    """
+    
+    def __init__(self, clients: List[Client], depot: Client, capacity: int,
+                 name: str = '', num_vehicles: Optional[int] = None,
+                 dense_threshold: int = DENSE_MATRIX_THRESHOLD,
+                 edge_weight_type: str = 'EUC_2D',
+                 time_warp_penalty: float = DEFAULT_TIME_WARP_PENALTY,
+                 distance_matrix: Optional[np.ndarray] = None,
+                 symmetric: Optional[bool] = None):
+        self.name = name
+        self.clients = clients
+        self.depot = depot
+        self.capacity = capacity
+        self.num_vehicles = num_vehicles
+        self.edge_weight_type = edge_weight_type
+        self.time_warp_penalty = time_warp_penalty
+        
+        self.nodes: Dict[int, Client] = {depot.id: depot}
+        for client in clients:
+            self.nodes[client.id] = client
+        
+        size = max(self.nodes) + 1
+        self.coords = np.zeros((size, 2))
+        self.demands = np.zeros(size, dtype=np.int64)
+        self.ready_times = np.zeros(size)
+        self.due_dates = np.full(size, math.inf)
+        self.service_times = np.zeros(size)
+        for node in self.nodes.values():
+            self.coords[node.id] = (node.x, node.y)
+            self.demands[node.id] = node.demand
+            self.ready_times[node.id] = node.ready_time
+            self.due_dates[node.id] = node.due_date
+            self.service_times[node.id] = node.service_time
+        
+        self.has_time_windows = bool(np.any(self.ready_times > 0) or np.any(np.isfinite(self.due_dates)))
+        self.horizon = depot.due_date
+        # Single-node time-window segments, indexed by node id.
+        self.node_segments: List[Optional[tuple]] = [None] * size
+        for node in self.nodes.values():
+            self.node_segments[node.id] = (node.id, node.id, float(node.service_time), 0.0,
+                                           float(node.ready_time), float(node.due_date))
+        
+        if distance_matrix is not None:
+            ids = np.array(sorted(self.nodes), dtype=np.int64)
+            distance_matrix = np.asarray(distance_matrix, dtype=float)
+            if distance_matrix.shape == (size, size):
+                # Already indexed by id (e.g. memory-mapped from the instance cache): used as is.
+                self.distance_matrix = distance_matrix
+            elif distance_matrix.shape == (len(ids), len(ids)):
+                # Explicit (EDGE_WEIGHT_SECTION) weights list the nodes by increasing id.
+                self.distance_matrix = np.zeros((size, size))
+                self.distance_matrix[np.ix_(ids, ids)] = distance_matrix
+            else:
+                raise ValueError(f"Distance matrix of shape {distance_matrix.shape} for {len(ids)} nodes")
+            if symmetric is None:
+                symmetric = bool(np.array_equal(self.distance_matrix, self.distance_matrix.T))
+            self.symmetric = symmetric
+        else:
+            self.distance_matrix = build_distance_matrix(self.coords, dense_threshold, edge_weight_type)
+            self.symmetric = True
+        self._candidates: Dict[tuple, np.ndarray] = {}
+        # Cache directory of the instance (see ``load_instance``): candidate lists are stored there too.
+        self.cache_path: Optional[str] = None
+    
+    @property
+    def dimension(self) -> int:
+        return len(self.nodes)
+    
+    def distance(self, i: int, j: int) -> float:
+        return float(self.distance_matrix[i, j])
+    
+    def candidate_lists(self, k: int, time_window_weight: float = 0.0) -> np.ndarray:
+        """
+        The ``k`` most promising neighbours of every customer, nearest first.
+        
+        Proximity is the distance, plus ``time_window_weight`` times the
+        waiting and time warp incurred by travelling between the two customers
+        directly (in the cheaper direction). Built once per ``(k, weight)`` and
+        cached, on disk as well when the instance has a ``cache_path``; rows of
+        non-customer ids are filled with -1.
+        """
+        key = (k, time_window_weight)
+        if key in self._candidates:
+            return self._candidates[key]
+        
+        path = None
+        if self.cache_path is not None:
+            path = os.path.join(self.cache_path, f'candidates-{k}-{float(time_window_weight)!r}.npy')
+            try:
+                self._candidates[key] = np.load(path, mmap_mode='r')
+                return self._candidates[key]
+            except (OSError, ValueError):
+                pass
+        
+        ids = np.array([client.id for client in self.clients], dtype=np.int64)
+        k = max(0, min(k, len(ids) - 1))
+        candidates = np.full((len(self.coords), k), -1, dtype=np.int64)
+        ready, due, service = self.ready_times[ids], self.due_dates[ids], self.service_times[ids]
+        
+        # Row blocks bound memory on large (lazily computed) matrices.
+        block = 256
+        for start in range(0, len(ids), block):
+            rows = ids[start:start + block]
+            proximity = np.asarray(self.distance_matrix[rows[:, None], ids[None, :]], dtype=float)
+            if time_window_weight and self.has_time_windows:
+                r = slice(start, start + block)
+                with np.errstate(invalid='ignore'):
+                    outbound = (np.maximum(ready[None, :] - service[r, None] - proximity - due[r, None], 0) +
+                                np.maximum(ready[r, None] + service[r, None] + proximity - due[None, :], 0))
+                    inbound = (np.maximum(ready[r, None] - service[None, :] - proximity - due[None, :], 0) +
+                               np.maximum(ready[None, :] + service[None, :] + proximity - due[r, None], 0))
+                proximity = proximity + time_window_weight * np.nan_to_num(np.minimum(outbound, inbound))
+            proximity[np.arange(len(rows)), np.arange(start, start + len(rows))] = np.inf
+            if k == 0:
+                continue
+            nearest = np.argpartition(proximity, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(proximity, nearest, axis=1), axis=1)
+            candidates[rows] = ids[np.take_along_axis(nearest, order, axis=1)]
+        
+        self._candidates[key] = candidates
+        if path is not None:
+            save_array(path, candidates)
+        return candidates
+    
+    def concatenate(self, *segments: tuple) -> tuple:
+        """
+        Concatenate time-window segments in O(1) per join.
+        
+        A segment is a tuple ``(first, last, duration, time_warp, earliest,
+        latest)`` summarising a node sequence: its total duration including
+        service and waiting, the unavoidable time warp, and the window in which
+        service at ``first`` can start without adding more (Vidal et al., 2013).
+        Travel times are read from the distance matrix.
+        """
+        D = self.distance_matrix
+        first, last, duration, time_warp, earliest, latest = segments[0]
+        for first2, last2, duration2, time_warp2, earliest2, latest2 in segments[1:]:
+            travel = D[last, first2]
+            delta = duration - time_warp + travel
+            wait = max(earliest2 - delta - latest, 0.0)
+            warp = max(earliest + delta - latest2, 0.0)
+            duration += duration2 + travel + wait
+            time_warp += time_warp2 + warp
+            earliest = max(earliest2 - delta, earliest) - wait
+            latest = min(latest2 - delta, latest) + warp
+            last = last2
+        return first, last, duration, time_warp, earliest, latest
+    
+    def route_segments(self, vehicle: Vehicle):
+        """
+        Prefix and suffix time-window segments of a route, cached on the vehicle.
+        
+        ``forward[k]`` covers the depot and the first ``k`` customers;
+        ``backward[k]`` covers customers from position ``k`` back to the
+        depot. The cache is rebuilt in O(len) only when the route's stamp
+        changed.
+        
+        Returns:
+            (forward, backward, time_warp) for the closed route
+        """
+        cached = vehicle.segments
+        if cached is not None and cached[0] == vehicle.stamp:
+            return cached[1], cached[2], cached[3]
+        
+        node_segments = self.node_segments
+        depot_segment = node_segments[self.depot.id]
+        sequence = vehicle.sequence
+        
+        forward = [depot_segment]
+        for node in sequence:
+            forward.append(self.concatenate(forward[-1], node_segments[node]))
+        backward = [depot_segment]
+        for node in reversed(sequence):
+            backward.append(self.concatenate(node_segments[node], backward[-1]))
+        backward.reverse()
+        time_warp = self.concatenate(forward[-1], depot_segment)[3] if sequence else 0.0
+        
+        vehicle.segments = (vehicle.stamp, forward, backward, time_warp)
+        return forward, backward, time_warp
+    
+    def route_distance(self, vehicle: Vehicle) -> float:
+        """Length of ``vehicle``'s closed route, cached on the vehicle until its stamp changes."""
+        cached = vehicle.distance_cache
+        if cached is not None and cached[0] == vehicle.stamp:
+            return cached[1]
+        distance = 0.0
+        if vehicle.sequence:
+            depot = self.depot.id
+            path = [depot] + vehicle.sequence + [depot]
+            distance = float(self.distance_matrix[path[:-1], path[1:]].sum())
+        vehicle.distance_cache = (vehicle.stamp, distance)
+        return distance
+    
+    def route_duration(self, vehicle: Vehicle) -> float:
+        """Duration of ``vehicle``'s closed route (travel, service and waiting), from its cached segments."""
+        if not vehicle.sequence:
+            return 0.0
+        forward, _, _ = self.route_segments(vehicle)
+        return self.concatenate(forward[-1], self.node_segments[self.depot.id])[2]
+    
+    def splice_time_warp(self, vehicle: Vehicle, start: int, end: int, nodes: List[int]) -> float:
+        """
+        Time warp of ``vehicle``'s route with positions ``start..end`` replaced by ``nodes``.
+        
+        ``end = start - 1`` denotes a pure insertion before ``start``. Costs
+        O(len(nodes)) segment joins, independent of the route length.
+        """
+        forward, backward, _ = self.route_segments(vehicle)
+        node_segments = self.node_segments
+        return self.concatenate(forward[start], *[node_segments[node] for node in nodes],
+                                backward[end + 1])[3]
+    
+    def reversal_delta(self, vehicle: Vehicle, i: int, j: int) -> float:
+        """
+        Change in the cost of the arcs inside positions ``i..j`` of the route
+        when that stretch is reversed. Zero on symmetric instances; otherwise
+        read in O(1) from prefix sums of the forward and backward arc costs,
+        cached on the vehicle until its stamp changes.
+        """
+        if self.symmetric:
+            return 0.0
+        cached = vehicle.arc_sums
+        if cached is None or cached[0] != vehicle.stamp:
+            sequence = np.array(vehicle.sequence, dtype=np.int64)
+            D = self.distance_matrix
+            forward = np.concatenate(([0.0], np.cumsum(D[sequence[:-1], sequence[1:]])))
+            backward = np.concatenate(([0.0], np.cumsum(D[sequence[1:], sequence[:-1]])))
+            cached = (vehicle.stamp, (backward - forward).tolist())
+            vehicle.arc_sums = cached
+        change = cached[1]
+        return change[j] - change[i]
+    
+    def load_prefix(self, vehicle: Vehicle) -> List[int]:
+        """
+        Prefix sums of the demands along ``vehicle``'s route: entry ``k`` is
+        the load of its first ``k`` customers, so the demand of any segment or
+        tail is one subtraction. Cached on the vehicle until its stamp changes.
+        """
+        cached = vehicle.load_sums
+        if cached is None or cached[0] != vehicle.stamp:
+            sums = np.cumsum(self.demands[np.array(vehicle.sequence, dtype=np.int64)])
+            cached = (vehicle.stamp, [0] + sums.tolist())
+            vehicle.load_sums = cached
+        return cached[1]
+    
+    def insertion_time_warp(self, vehicle: Vehicle, customers: np.ndarray) -> np.ndarray:
+        """
+        Time warp of ``vehicle``'s route with each of ``customers`` inserted at
+        each position: entry ``[i, p]`` inserts ``customers[i]`` before route
+        position ``p``. The two segment joins are evaluated on arrays, so a
+        whole route is priced in one vectorised pass.
+        """
+        forward, backward, _ = self.route_segments(vehicle)
+        forward = np.array(forward, dtype=float)
+        backward = np.array(backward, dtype=float)
+        D = self.distance_matrix
+        
+        # Prefix (one row per position) joined with each customer...
+        lasts = forward[:, 1].astype(np.int64)
+        travel = np.asarray(D[lasts[None, :], customers[:, None]], dtype=float)
+        duration, warp, earliest, latest = join_segments(
+            forward[None, :, 2], forward[None, :, 3], forward[None, :, 4], forward[None, :, 5],
+            self.service_times[customers][:, None], 0.0,
+            self.ready_times[customers][:, None], self.due_dates[customers][:, None], travel)
+        # ...then with the suffix starting at the same position.
+        firsts = backward[:, 0].astype(np.int64)
+        travel = np.asarray(D[customers[:, None], firsts[None, :]], dtype=float)
+        return join_segments(duration, warp, earliest, latest,
+                             backward[None, :, 2], backward[None, :, 3],
+                             backward[None, :, 4], backward[None, :, 5], travel)[1]
     
     def __repr__(self):
-        return f"Vehicle({self.id}, load={self.load}/{self.capacity}, clients={len(self.route)})"
+        return f"Instance({self.name!r}, clients={len(self.clients)}, capacity={self.capacity})"
+
+
+def join_segments(duration, time_warp, earliest, latest,
+                  duration2, time_warp2, earliest2, latest2, travel):
+    """
+    Array form of the join in ``Instance.concatenate``, without first/last
+    nodes: (duration, time warp, earliest, latest) of each joined segment.
+    """
+    delta = duration - time_warp + travel
+    wait = np.maximum(earliest2 - delta - latest, 0.0)
+    warp = np.maximum(earliest + delta - latest2, 0.0)
+    return (duration + duration2 + travel + wait,
+            time_warp + time_warp2 + warp,
+            np.maximum(earliest2 - delta, earliest) - wait,
+            np.minimum(latest2 - delta, latest) + warp)
 
 
 class Solution:
-    def __init__(self, vehicles: List[Vehicle], depot: Client):
+    """
+    A set of routes. ``cost`` is the search objective: total distance plus,
+    on time-window instances, ``time_warp_penalty`` times the total time warp.
+    """
+    
+    def __init__(self, vehicles: List[Vehicle], depot: Client, instance: Optional[Instance] = None):
+        if instance is None:
+            clients = [client for vehicle in vehicles for client in vehicle.route]
+            capacity = max((vehicle.capacity for vehicle in vehicles), default=0)
+            instance = Instance(clients, depot, capacity)
+        for vehicle in vehicles:
+            vehicle.attach(instance.nodes)
+        self.instance = instance
         self.vehicles = vehicles
         self.depot = depot
         self.cost = 0.0
+        self._owners: Optional[List[int]] = None
         self.calculate_cost()
     
+    @property
+    def distance(self) -> float:
+        # Sum of the per-route cached lengths: only routes modified since
+        # they were last priced are walked again.
+        route_distance = self.instance.route_distance
+        return sum(route_distance(vehicle) for vehicle in self.vehicles)
+    
+    @property
+    def time_warp(self) -> float:
+        if not self.instance.has_time_windows:
+            return 0.0
+        return float(sum(self.instance.route_segments(vehicle)[2] for vehicle in self.vehicles))
+    
     def calculate_cost(self) -> float:
-        total_distance = 0.0
-        for vehicle in self.vehicles:
-            if len(vehicle.route) == 0:
-                continue
-            route_distance = euclidean_distance(self.depot, vehicle.route[0])
-            for i in range(len(vehicle.route) - 1):
-                route_distance += euclidean_distance(vehicle.route[i], vehicle.route[i + 1])
-            route_distance += euclidean_distance(vehicle.route[-1], self.depot)
-            total_distance += route_distance
-        self.cost = total_distance
-        return total_distance
+        """
+        Resynchronise ``cost`` with the routes.
+        
+        Moves keep ``cost`` up to date as a running sum of their deltas; after
+        direct route edits this re-prices only the routes whose stamp changed.
+        """
+        total = self.distance
+        if self.instance.has_time_windows:
+            total += self.instance.time_warp_penalty * self.time_warp
+        self.cost = total
+        return total
     
     def is_feasible(self) -> bool:
         for vehicle in self.vehicles:
             if vehicle.load > vehicle.capacity:
                 return False
-        return True
+        return self.time_warp <= TIME_WARP_TOLERANCE
+    
+    def locate(self, node: int) -> Tuple[int, int]:
+        """
+        (vehicle index, position) of a routed customer.
+        
+        Uses a node -> vehicle index kept current by ``reassign`` and each
+        vehicle's position index; a stale entry (e.g. after ``restore``)
+        triggers a single O(n) rebuild.
+        """
+        owners = self._owners
+        if owners is not None:
+            idx = owners[node]
+            if 0 <= idx < len(self.vehicles):
+                position = self.vehicles[idx].position(node)
+                if position is not None:
+                    return idx, position
+        
+        self._owners = owners = [-1] * len(self.instance.coords)
+        for idx, vehicle in enumerate(self.vehicles):
+            for n in vehicle.sequence:
+                owners[n] = idx
+        idx = owners[node]
+        if idx < 0:
+            raise KeyError(f"Node {node} is not routed")
+        return idx, self.vehicles[idx].position(node)
+    
+    def reassign(self, nodes: List[int], vehicle_index: int):
+        """Record that ``nodes`` now belong to ``vehicles[vehicle_index]``."""
+        owners = self._owners
+        if owners is not None:
+            for node in nodes:
+                owners[node] = vehicle_index
+    
+    def invalidate_owners(self):
+        """Drop the node -> vehicle index after customers moved without ``reassign``."""
+        self._owners = None
     
     def get_num_vehicles_used(self) -> int:
-        return sum(1 for v in self.vehicles if len(v.route) > 0)
+        return sum(1 for v in self.vehicles if len(v.sequence) > 0)
+    
+    def routes(self) -> List[List[int]]:
+        """Node-id sequences of every vehicle, a compact picklable form of the solution."""
+        return [list(vehicle.sequence) for vehicle in self.vehicles]
+    
+    @classmethod
+    def from_routes(cls, instance: Instance, routes: List[List[int]]) -> 'Solution':
+        """Rebuild a solution on ``instance`` from node-id sequences."""
+        vehicles = []
+        for idx, route in enumerate(routes):
+            vehicle = Vehicle(instance.capacity, idx, instance.nodes)
+            vehicle.sequence = list(route)
+            vehicle.load = int(instance.demands[vehicle.sequence].sum()) if route else 0
+            vehicle.touch()
+            vehicles.append(vehicle)
+        return cls(vehicles, instance.depot, instance)
     
-    def copy(self):
-        return deepcopy(self)
+    def copy(self) -> 'Solution':
+        # Flat copy of the id sequences; clients and the instance are shared.
+        clone = Solution.__new__(Solution)
+        clone.instance = self.instance
+        clone.depot = self.depot
+        clone.vehicles = [vehicle.copy() for vehicle in self.vehicles]
+        clone.cost = self.cost
+        clone._owners = None
+        return clone
+    
+    def restore(self, other: 'Solution'):
+        """
+        Make this solution equal to ``other`` in place.
+        
+        Only routes whose stamp differs are copied, so keeping a best-so-far
+        snapshot in sync costs O(routes touched) rather than a full copy.
+        """
+        vehicles = self.vehicles
+        del vehicles[len(other.vehicles):]
+        for idx, vehicle in enumerate(other.vehicles):
+            if idx == len(vehicles):
+                vehicles.append(vehicle.copy())
+            elif vehicles[idx].stamp != vehicle.stamp:
+                vehicles[idx] = vehicle.copy()
+        self.cost = other.cost
     
     def __repr__(self):
         return f"Solution(cost={self.cost:.2f}, vehicles_used={self.get_num_vehicles_used()}/{len(self.vehicles)})"
@@ -96,7 +635,7 @@ def euclidean_distance(node1: Client, node2: Client) -> float:
     Args:
         node1: First node
         node2: Second node
-        
+    
     Returns:
         Rounded Euclidean distance (integer for VRPLIB compatibility)
     """
@@ -104,3 +643,97 @@ def euclidean_distance(node1: Client, node2: Client) -> float:
     dy = node1.y - node2.y
     return round(math.sqrt(dx * dx + dy * dy))
 
+
+# How each TSPLIB/VRPLIB EDGE_WEIGHT_TYPE turns a Euclidean distance into an
+# edge weight. Solomon instances use unrounded distances (EXACT_2D).
+_ROUNDING = {
+    'EUC_2D': np.rint,
+    'FLOOR_2D': np.floor,
+    'CEIL_2D': np.ceil,
+    'EXACT_2D': None,
+}
+
+
+def _euclidean(origins: np.ndarray, targets: np.ndarray, edge_weight_type: str = 'EUC_2D') -> np.ndarray:
+    # Per-axis differences and in-place arithmetic avoid the (n, n, 2)
+    # temporaries of a vectorised norm; the full matrix is built ~5x faster.
+    distances = origins[..., 0] - targets[..., 0]
+    dy = origins[..., 1] - targets[..., 1]
+    distances *= distances
+    dy *= dy
+    distances += dy
+    np.sqrt(distances, out=distances)
+    rounding = _ROUNDING.get(edge_weight_type, np.rint)
+    if rounding is not None:
+        rounding(distances, out=distances)
+    return distances
+
+
+def save_array(path: str, array: np.ndarray) -> bool:
+    """
+    Write ``array`` as a ``.npy`` file through a temporary file and a rename,
+    so concurrent readers never see a partial file. Returns False (leaving
+    nothing behind) when the directory is not writable.
+    """
+    try:
+        fd, tmp = tempfile.mkstemp(suffix='.npy', dir=os.path.dirname(path))
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        return False
+    return True
+
+
+class LazyDistanceMatrix:
+    """
+    Distance matrix for large instances whose rows are computed on first use.
+    
+    Supports the same ``matrix[i, j]`` indexing as a NumPy array, including
+    element-wise fancy indexing with index arrays.
+    """
+    
+    def __init__(self, coords: np.ndarray, edge_weight_type: str = 'EUC_2D'):
+        self.coords = coords
+        self.edge_weight_type = edge_weight_type
+        self.shape = (len(coords), len(coords))
+        self._rows: Dict[int, np.ndarray] = {}
+    
+    def row(self, i: int) -> np.ndarray:
+        row = self._rows.get(i)
+        if row is None:
+            row = _euclidean(self.coords[i], self.coords, self.edge_weight_type)
+            self._rows[i] = row
+        return row
+    
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            return self.row(int(key))
+        i, j = key
+        if isinstance(i, (int, np.integer)):
+            return self.row(int(i))[j]
+        i = np.asarray(i)
+        j = np.asarray(j)
+        return _euclidean(self.coords[i], self.coords[j], self.edge_weight_type)
+
+
+def build_distance_matrix(coords: np.ndarray, dense_threshold: int = DENSE_MATRIX_THRESHOLD,
+                          edge_weight_type: str = 'EUC_2D'):
+    """
+    Build the Euclidean distance matrix for the given coordinates.
+    
+    Args:
+        coords: Array of shape (n, 2) indexed by node id
+        dense_threshold: Largest size for which the full matrix is computed eagerly
+        edge_weight_type: VRPLIB rounding convention (EUC_2D, FLOOR_2D, CEIL_2D, EXACT_2D)
+    
+    Returns:
+        Dense NumPy array, or a LazyDistanceMatrix above the threshold
+    """
+    if len(coords) > dense_threshold:
+        return LazyDistanceMatrix(coords, edge_weight_type)
+    return _euclidean(coords[:, None, :], coords[None, :, :], edge_weight_type)
@@ -0,0 +1,306 @@
+"""
+Parallel simulated annealing: independent multi-start chains over a process
+pool, and a cooperative island model with periodic migration of elites.
+
+The instance (distance matrix and candidate lists included) reaches each
+worker once: with the ``fork`` start method workers inherit it
+copy-on-write, otherwise it is pickled once per process rather than once per
+chain. Workers only exchange seeds, parameters and node-id routes with the
+parent.
+"""
+
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import cycle
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from src.heuristics import construct_solution
+from src.models import Instance, Solution
+from src.rng import spawn_seeds
+from src.solver import GranularNeighborhood, simulated_annealing
+
+
+_worker_instance: Optional[Instance] = None
+
+
+def _init_worker(instance: Instance):
+    global _worker_instance
+    _worker_instance = instance
+
+
+def pool_context():
+    """``fork`` context where available, so workers inherit the instance copy-on-write; else the default."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def _run_chain(instance: Instance, chain: dict, migration=None) -> Tuple[List[List[int]], Dict]:
+    # The construction draws from the random module, the search from its own stream.
+    construction, search = chain['seed_sequence'].spawn(2)
+    random.seed(int(construction.generate_state(1, np.uint64)[0]))
+    start = time.perf_counter()
+    
+    annealing = dict(chain['annealing'])
+    time_limit = annealing.get('time_limit')
+    
+    initial = construct_solution(instance, chain['method'], chain['num_vehicles'],
+                                 chain['clarke_wright'], time_limit=time_limit)
+    neighborhood = None
+    if chain['neighborhood'] is not None:
+        neighborhood = GranularNeighborhood(instance, **chain['neighborhood'])
+    if time_limit is not None:
+        # The budget covers the whole chain, construction included.
+        annealing['time_limit'] = max(0.0, time_limit - (time.perf_counter() - start))
+    best = simulated_annealing(initial, neighborhood=neighborhood, migration=migration, seed=search, **annealing)
+    
+    stats = {
+        'chain': chain['chain'],
+        'seed': chain['seed'],
+        'method': chain['method'],
+        'initial_cost': initial.cost,
+        'best_cost': best.cost,
+        'feasible': best.is_feasible(),
+        'time': time.perf_counter() - start,
+        'pid': os.getpid(),
+    }
+    return best.routes(), stats
+
+
+def _run_worker_chain(chain: dict) -> Tuple[List[List[int]], Dict]:
+    return _run_chain(_worker_instance, chain)
+
+
+def _chain_specs(instance: Instance, chains: int, num_vehicles: int, methods: Sequence[str],
+                 seed: Optional[int], neighborhood: Optional[dict], clarke_wright: Optional[dict],
+                 annealing: dict) -> List[dict]:
+    if seed is None:
+        # Drawn from the random module so that random.seed reproduces the run.
+        seed = random.getrandbits(128)
+    seed, sequences = spawn_seeds(seed, chains)
+    
+    if neighborhood is not None:
+        # Build candidate lists before forking so every worker inherits them.
+        instance.candidate_lists(max(neighborhood.get('max_k') or 0, neighborhood.get('k', 20)),
+                                 neighborhood.get('time_window_weight', 0.0))
+    
+    return [{
+        'chain': i,
+        'seed': seed,
+        'seed_sequence': sequence,
+        'method': method,
+        'num_vehicles': num_vehicles,
+        'clarke_wright': clarke_wright,
+        'neighborhood': neighborhood,
+        'annealing': annealing,
+    } for i, (sequence, method) in enumerate(zip(sequences, cycle(methods)))]
+
+
+def parallel_simulated_annealing(
+    instance: Instance,
+    num_vehicles: int,
+    workers: Optional[int] = None,
+    chains: Optional[int] = None,
+    methods: Sequence[str] = ('clarke_wright',),
+    seed: Optional[int] = None,
+    neighborhood: Optional[dict] = None,
+    clarke_wright: Optional[dict] = None,
+    **annealing
+) -> Tuple[Solution, List[Dict]]:
+    """
+    Run independent simulated annealing chains and keep the best result.
+    
+    Args:
+        instance: Problem instance, shared with the workers
+        num_vehicles: Fleet size for the random / nearest-neighbour constructions
+        workers: Pool size (defaults to the CPU count); 1 runs in-process
+        chains: Number of chains (defaults to ``workers``)
+        methods: Construction methods, assigned to chains round-robin
+        seed: Root of the chains' independent streams (``SeedSequence.spawn``);
+            drawn from the ``random`` module if None
+        neighborhood: ``GranularNeighborhood`` keyword arguments, or None
+            for uniform move sampling
+        clarke_wright: ``heuristics.clarke_wright`` options
+        **annealing: Keyword arguments for ``simulated_annealing``
+        
+    Returns:
+        (best solution, per-chain statistics ordered by chain index)
+    """
+    workers = workers or os.cpu_count() or 1
+    chains = chains or workers
+    specs = _chain_specs(instance, chains, num_vehicles, methods, seed, neighborhood,
+                         clarke_wright, annealing)
+    
+    if workers == 1 or chains == 1:
+        results = [_run_chain(instance, spec) for spec in specs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, chains), mp_context=pool_context(),
+                                 initializer=_init_worker, initargs=(instance,)) as pool:
+            results = list(pool.map(_run_worker_chain, specs))
+    
+    best_routes, _ = min(results, key=lambda result: result[1]['best_cost'])
+    best = Solution.from_routes(instance, best_routes)
+    return best, [stats for _, stats in results]
+
+
+class Mailbox:
+    """
+    Shared-memory slot holding the latest elite solution of one island.
+    
+    Routes are stored flat, separated by -1, in a buffer sized for the worst
+    case (every customer alone plus the empty vehicles), so publishing never
+    allocates and a slow reader can never block a writer.
+    """
+    
+    def __init__(self, size: int, context):
+        self.lock = context.Lock()
+        self.buffer = context.RawArray('l', size)
+        self.length = context.RawValue('l', 0)
+        self.cost = context.RawValue('d', math.inf)
+        self.version = context.RawValue('l', 0)
+    
+    def publish(self, solution: Solution):
+        flat = []
+        for route in solution.routes():
+            flat.extend(route)
+            flat.append(-1)
+        with self.lock:
+            self.buffer[:len(flat)] = flat
+            self.length.value = len(flat)
+            self.cost.value = solution.cost
+            self.version.value += 1
+    
+    def fetch(self) -> Tuple[int, float, Optional[List[List[int]]]]:
+        """(version, cost, routes); routes is None while nothing was published."""
+        with self.lock:
+            version, cost = self.version.value, self.cost.value
+            flat = self.buffer[:self.length.value] if version else None
+        if flat is None:
+            return version, cost, None
+        routes, route = [], []
+        for node in flat:
+            if node < 0:
+                routes.append(route)
+                route = []
+            else:
+                route.append(node)
+        return version, cost, routes
+
+
+TOPOLOGIES = ('ring', 'broadcast')
+
+
+class _Migration:
+    """Migration hook of one island: publish the local best, adopt the best unseen neighbour elite."""
+    
+    def __init__(self, instance: Instance, index: int, mailboxes: List[Mailbox], topology: str):
+        self.instance = instance
+        self.own = mailboxes[index]
+        if topology == 'ring':
+            self.sources = [mailboxes[(index - 1) % len(mailboxes)]]
+        else:
+            self.sources = [mailbox for i, mailbox in enumerate(mailboxes) if i != index]
+        self.seen = [0] * len(self.sources)
+        self.published = math.inf
+        self.sent = 0
+        self.received = 0
+    
+    def __call__(self, best: Solution) -> Optional[Solution]:
+        if best.cost < self.published:
+            self.own.publish(best)
+            self.published = best.cost
+            self.sent += 1
+        
+        migrant = None
+        for i, mailbox in enumerate(self.sources):
+            if mailbox.version.value == self.seen[i] or mailbox.cost.value >= best.cost:
+                continue
+            version, cost, routes = mailbox.fetch()
+            self.seen[i] = version
+            if routes is not None and cost < best.cost and (migrant is None or cost < migrant[0]):
+                migrant = cost, routes
+        if migrant is None:
+            return None
+        self.received += 1
+        return Solution.from_routes(self.instance, migrant[1])
+
+
+def _run_island(instance: Instance, chain: dict, mailboxes: List[Mailbox], topology: str, results):
+    migration = _Migration(instance, chain['chain'], mailboxes, topology)
+    routes, stats = _run_chain(instance, chain, migration)
+    stats['migrants_sent'] = migration.sent
+    stats['migrants_received'] = migration.received
+    results.put((routes, stats))
+
+
+def island_simulated_annealing(
+    instance: Instance,
+    num_vehicles: int,
+    islands: Optional[int] = None,
+    migration_interval: int = 1000,
+    topology: str = 'ring',
+    methods: Sequence[str] = ('clarke_wright',),
+    seed: Optional[int] = None,
+    neighborhood: Optional[dict] = None,
+    clarke_wright: Optional[dict] = None,
+    **annealing
+) -> Tuple[Solution, List[Dict]]:
+    """
+    Island-model simulated annealing: one process per island, with periodic
+    migration of elite solutions through shared-memory mailboxes.
+    
+    Every ``migration_interval`` iterations each island publishes its best
+    solution (when it improved) and looks at its neighbours' mailboxes
+    (the previous island for ``'ring'``, all others for ``'broadcast'``);
+    the cheapest unseen elite replaces the island's current solution when it
+    is cheaper. Migration is asynchronous: no island ever waits for another.
+    
+    Arguments other than ``islands``, ``migration_interval`` and ``topology``
+    are as for ``parallel_simulated_annealing``.
+    
+    Returns:
+        (best solution, per-island statistics ordered by island index)
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown migration topology: {topology}")
+    islands = islands or os.cpu_count() or 1
+    specs = _chain_specs(instance, islands, num_vehicles, methods, seed, neighborhood,
+                         clarke_wright, dict(annealing, migration_interval=migration_interval))
+    
+    context = pool_context() or multiprocessing.get_context()
+    size = 2 * len(instance.clients) + num_vehicles + 1
+    mailboxes = [Mailbox(size, context) for _ in range(islands)]
+    results = context.Queue()
+    processes = [context.Process(target=_run_island, args=(instance, spec, mailboxes, topology, results))
+                 for spec in specs]
+    for process in processes:
+        process.start()
+    try:
+        outcomes = []
+        while len(outcomes) < len(processes):
+            try:
+                outcomes.append(results.get(timeout=1.0))
+            except queue.Empty:
+                failed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Island process exited with code {failed[0]}")
+    except BaseException:
+        # Stop the surviving islands rather than waiting out their budget.
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+    
+    outcomes.sort(key=lambda outcome: outcome[1]['chain'])
+    best_routes, _ = min(outcomes, key=lambda outcome: outcome[1]['best_cost'])
+    best = Solution.from_routes(instance, best_routes)
+    return best, [stats for _, stats in outcomes]
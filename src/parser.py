@@ -1,11 +1,53 @@
-from typing import Dict, List, Tuple
-from src.models import Client
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
+from src.models import Client, Instance, Solution
 
-def parse_vrplib(file_path: str) -> Dict:
-    with open(file_path, 'r') as f:
-        lines = f.readlines()
-    
+
+# Part of every cache key: bump it whenever parsing or the cache layout
+# changes, so that caches written by older versions are ignored.
+PARSER_VERSION = 2
+
+# Cache directory created next to the instance when none is given.
+CACHE_DIRECTORY = '.vrp_cache'
+
+# Column arrays of ``parse_vrplib`` stored in the cache, one .npy file each.
+_CACHED_COLUMNS = ('node_ids', 'coords', 'demands', 'ready_times', 'due_dates', 'service_times')
+
+
+# VRPLIB header keys: data field and converter.
+_HEADER_FIELDS = {
+    'NAME': ('name', str),
+    'COMMENT': ('comment', str),
+    'TYPE': ('type', str),
+    'DIMENSION': ('dimension', int),
+    'CAPACITY': ('capacity', int),
+    'EDGE_WEIGHT_TYPE': ('edge_weight_type', str),
+    'EDGE_WEIGHT_FORMAT': ('edge_weight_format', str),
+    'VEHICLES': ('num_vehicles', int),
+    'SERVICE_TIME': ('service_time', float),
+}
+
+# Numeric VRPLIB sections kept, with their number of columns (0: flat).
+# Other sections (DISPLAY_DATA_SECTION, ...) are skipped.
+_SECTION_COLUMNS = {
+    'NODE_COORD_SECTION': 3,
+    'DEMAND_SECTION': 2,
+    'TIME_WINDOW_SECTION': 3,
+    'SERVICE_TIME_SECTION': 2,
+    'DEPOT_SECTION': 0,
+    'EDGE_WEIGHT_SECTION': 0,
+}
+
+
+def _empty_data(**overrides) -> Dict:
     data = {
         'name': '',
         'comment': '',
@@ -13,91 +55,390 @@ def parse_vrplib(file_path: str) -> Dict:
         'dimension': 0,
         'capacity': 0,
         'edge_weight_type': '',
-        'nodes': [],
-        'demands': [],
+        'edge_weight_format': '',
+        'edge_weights': None,
         'depot': 1,
-        'num_vehicles': None
+        'num_vehicles': None,
+        'service_time': 0.0,
     }
+    data.update(overrides)
+    return data
+
+
+def _numbers(chunks: List[str]) -> np.ndarray:
+    # One bulk conversion for a whole section.
+    return np.fromstring(''.join(chunks), sep=' ') if chunks else np.empty(0)
+
+
+def _non_empty_lines(f) -> Iterator[str]:
+    for line in f:
+        if line.strip():
+            yield line
+
+
+def parse_vrplib(file_path: str) -> Dict:
+    """
+    Parse a VRPLIB or Solomon/Homberger instance into column arrays.
     
-    section = None
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+    The file is streamed once. Header lines are dispatched by key through a
+    dict; the lines of each numeric section are only collected, then
+    converted with one ``np.fromstring`` call per section, so loading is
+    linear in the file size. See ``_columns`` for the returned arrays.
+    """
+    with open(file_path, 'r') as f:
+        lines = _non_empty_lines(f)
+        first = next(lines, '')
+        key = first.partition(':')[0].strip()
+        if first and ':' not in first and key not in _SECTION_COLUMNS:
+            return _parse_solomon(first, lines, f)
         
-        if line.startswith('NAME'):
-            data['name'] = line.split(':')[1].strip()
-        elif line.startswith('COMMENT'):
-            data['comment'] = line.split(':')[1].strip()
-        elif line.startswith('TYPE'):
-            data['type'] = line.split(':')[1].strip()
-        elif line.startswith('DIMENSION'):
-            data['dimension'] = int(line.split(':')[1].strip())
-        elif line.startswith('CAPACITY'):
-            data['capacity'] = int(line.split(':')[1].strip())
-        elif line.startswith('EDGE_WEIGHT_TYPE'):
-            data['edge_weight_type'] = line.split(':')[1].strip()
-        elif line.startswith('NODE_COORD_SECTION'):
-            section = 'nodes'
-        elif line.startswith('DEMAND_SECTION'):
-            section = 'demands'
-        elif line.startswith('DEPOT_SECTION'):
-            section = 'depot'
-        elif line.startswith('EOF'):
-            break
-        elif section == 'nodes':
-            parts = line.split()
-            if len(parts) == 3:
-                node_id, x, y = int(parts[0]), float(parts[1]), float(parts[2])
-                data['nodes'].append((node_id, x, y))
-        elif section == 'demands':
-            parts = line.split()
-            if len(parts) == 2:
-                node_id, demand = int(parts[0]), int(parts[1])
-                data['demands'].append((node_id, demand))
-        elif section == 'depot':
-            if line != '-1':
-                data['depot'] = int(line)
+        data = _empty_data()
+        chunks: Dict[str, List[str]] = {}
+        section = None
+        for line in _chain(first, lines):
+            head = line.lstrip()[0]
+            if not head.isalpha():
+                if section is not None:
+                    section.append(line)
+                continue
+            key, _, value = line.partition(':')
+            key = key.strip()
+            if key == 'EOF':
+                break
+            if key in _SECTION_COLUMNS:
+                section = chunks.setdefault(key, [])
+            elif key.endswith('_SECTION'):
+                section = None
+            else:
+                section = None
+                field = _HEADER_FIELDS.get(key)
+                if field is not None:
+                    data[field[0]] = field[1](value.strip())
+    
+    sections = {key: _numbers(chunk) for key, chunk in chunks.items()}
+    depot = sections.get('DEPOT_SECTION')
+    if depot is not None and len(depot) and depot[0] != -1:
+        data['depot'] = int(depot[0])
+    weights = sections.get('EDGE_WEIGHT_SECTION')
+    if weights is not None and len(weights):
+        data['edge_weights'] = edge_weight_matrix(weights, data['dimension'],
+                                                  data['edge_weight_format'] or 'FULL_MATRIX')
+    
+    tables = {key: values.reshape(-1, _SECTION_COLUMNS[key]) for key, values in sections.items()
+              if _SECTION_COLUMNS[key]}
+    return _columns(data, tables)
+
+
+def _chain(first: str, lines: Iterator[str]) -> Iterator[str]:
+    if first:
+        yield first
+    yield from lines
+
+
+def _parse_solomon(name: str, lines: Iterator[str], f) -> Dict:
+    """
+    Solomon/Homberger tabular instance (e.g. C101.txt, C1_2_1.txt).
+    
+    The customer table columns are: id, x, y, demand, ready time, due date,
+    service time. Node 0 is the depot and distances are unrounded. The
+    table (everything after its column titles) is converted in bulk.
+    """
+    data = _empty_data(name=name.strip(), type='CVRPTW', edge_weight_type='EXACT_2D', depot=0)
+    for line in lines:
+        key = line.strip()
+        if key.startswith('VEHICLE'):
+            next(lines, None)  # column titles
+            number, capacity = next(lines, '0 0').split()[:2]
+            data['num_vehicles'], data['capacity'] = int(number), int(capacity)
+        elif key.startswith('CUSTOMER'):
+            next(lines, None)  # column titles
+            table = np.fromstring(f.read(), sep=' ').reshape(-1, 7)
+            data['dimension'] = len(table)
+            return _columns(data, {
+                'NODE_COORD_SECTION': table[:, :3],
+                'DEMAND_SECTION': table[:, [0, 3]],
+                'TIME_WINDOW_SECTION': table[:, [0, 4, 5]],
+                'SERVICE_TIME_SECTION': table[:, [0, 6]],
+            })
+    raise ValueError(f"No CUSTOMER table in Solomon instance {data['name']!r}")
+
+
+def _columns(data: Dict, tables: Dict[str, np.ndarray]) -> Dict:
+    """
+    Align the section tables on one sorted node id array.
     
+    Adds ``node_ids`` and, in the same order, ``coords`` (n x 2, zeros when
+    the instance has none), ``demands``, ``ready_times``, ``due_dates``
+    (``inf`` without time windows) and ``service_times`` (the SERVICE_TIME
+    default for customers, 0 for the depot unless listed).
+    """
+    ids = [table[:, 0] for table in tables.values()]
+    if ids:
+        node_ids = np.unique(np.concatenate(ids)).astype(np.int64)
+    else:
+        node_ids = np.arange(1, data['dimension'] + 1, dtype=np.int64)
+    n = len(node_ids)
+    
+    def column(key: str, columns, default: float) -> np.ndarray:
+        values = np.full((n, len(columns)), default, dtype=float)
+        table = tables.get(key)
+        if table is not None:
+            values[np.searchsorted(node_ids, table[:, 0].astype(np.int64))] = table[:, columns]
+        return values
+    
+    data['node_ids'] = node_ids
+    data['coords'] = column('NODE_COORD_SECTION', [1, 2], 0.0)
+    data['demands'] = column('DEMAND_SECTION', [1], 0.0)[:, 0].astype(np.int64)
+    windows = column('TIME_WINDOW_SECTION', [1, 2], 0.0)
+    if 'TIME_WINDOW_SECTION' not in tables:
+        windows[:, 1] = math.inf
+    data['ready_times'], data['due_dates'] = windows[:, 0], windows[:, 1]
+    service = column('SERVICE_TIME_SECTION', [1], math.nan)[:, 0]
+    depot = np.searchsorted(node_ids, data['depot'])
+    if depot < n and node_ids[depot] == data['depot'] and math.isnan(service[depot]):
+        service[depot] = 0.0
+    data['service_times'] = np.where(np.isnan(service), data['service_time'], service)
     return data
 
 
-def create_clients_and_depot(data: Dict) -> Tuple[List[Client], Client]:
-    clients = []
-    depot = None
+# Triangular EDGE_WEIGHT_FORMATs: (upper triangle?, diagonal included?).
+# A column-wise lower triangle lists the same entries as the row-wise upper
+# one, and vice versa.
+_TRIANGULAR_FORMATS = {
+    'LOWER_ROW': (False, False),
+    'LOWER_DIAG_ROW': (False, True),
+    'UPPER_ROW': (True, False),
+    'UPPER_DIAG_ROW': (True, True),
+    'LOWER_COL': (True, False),
+    'LOWER_DIAG_COL': (True, True),
+    'UPPER_COL': (False, False),
+    'UPPER_DIAG_COL': (False, True),
+}
+
+
+def edge_weight_matrix(weights: np.ndarray, dimension: int, edge_weight_format: str) -> np.ndarray:
+    """
+    Square matrix from the flat values of an EDGE_WEIGHT_SECTION.
     
-    if len(data['nodes']) == 0 and len(data['demands']) > 0:
-        for node_id, demand in data['demands']:
-            x, y = 0.0, 0.0
-            
-            if node_id == data['depot']:
-                depot = Client(node_id, x, y, 0)
-            else:
-                clients.append(Client(node_id, x, y, demand))
+    FULL_MATRIX keeps the given orientation (row = origin), so asymmetric
+    instances stay asymmetric; triangular formats are mirrored.
+    """
+    if edge_weight_format == 'FULL_MATRIX':
+        expected = dimension * dimension
+    elif edge_weight_format in _TRIANGULAR_FORMATS:
+        upper, diagonal = _TRIANGULAR_FORMATS[edge_weight_format]
+        offset = 0 if diagonal else 1
+        rows, cols = np.triu_indices(dimension, offset) if upper else np.tril_indices(dimension, -offset)
+        expected = len(rows)
     else:
-        for node in data['nodes']:
-            node_id, x, y = node
-            demand = next((d[1] for d in data['demands'] if d[0] == node_id), 0)
-            
-            if node_id == data['depot']:
-                depot = Client(node_id, x, y, 0)
-            else:
-                clients.append(Client(node_id, x, y, demand))
+        raise ValueError(f"Unsupported EDGE_WEIGHT_FORMAT: {edge_weight_format}")
+    if len(weights) != expected:
+        raise ValueError(f"EDGE_WEIGHT_SECTION has {len(weights)} values, "
+                         f"{edge_weight_format} with dimension {dimension} needs {expected}")
     
-    if depot is None:
-        depot_demand = next((d for d in data['demands'] if d[0] == data['depot']), None)
-        if depot_demand:
-            depot = Client(data['depot'], 0.0, 0.0, 0)
+    if edge_weight_format == 'FULL_MATRIX':
+        return weights.reshape(dimension, dimension)
+    matrix = np.zeros((dimension, dimension))
+    matrix[rows, cols] = weights
+    matrix[cols, rows] = weights
+    return matrix
+
+
+def create_clients_and_depot(data: Dict) -> Tuple[List[Client], Client]:
+    """Client objects (customers, depot) from the column arrays of ``parse_vrplib``."""
+    clients = []
+    depot = None
+    depot_id = data['depot']
+    columns = zip(data['node_ids'].tolist(), data['coords'].tolist(), data['demands'].tolist(),
+                  data['ready_times'].tolist(), data['due_dates'].tolist(), data['service_times'].tolist())
+    for node_id, (x, y), demand, ready, due, service in columns:
+        if node_id == depot_id:
+            depot = Client(node_id, x, y, 0, ready, due, service)
         else:
-            raise ValueError("Depot not found in instance data")
+            clients.append(Client(node_id, x, y, demand, ready, due, service))
     
+    if depot is None:
+        raise ValueError("Depot not found in instance data")
     return clients, depot
 
 
-def load_instance(file_path: str) -> Tuple[List[Client], Client, int]:
+def cache_key(file_path: str) -> str:
+    """Hash of the instance file contents and of ``PARSER_VERSION``."""
+    digest = hashlib.sha256(f'parser-{PARSER_VERSION}\n'.encode())
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:20]
+
+
+def _cache_entry(file_path: str, cache_dir: Optional[str]) -> str:
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIRECTORY)
+    return os.path.join(cache_dir, f'{os.path.basename(file_path)}-{cache_key(file_path)}')
+
+
+def _read_cache(entry: str) -> Optional[Instance]:
+    try:
+        with open(os.path.join(entry, 'meta.json')) as f:
+            meta = json.load(f)
+        data = {column: np.load(os.path.join(entry, column + '.npy'), mmap_mode='r')
+                for column in _CACHED_COLUMNS}
+        matrix_path = os.path.join(entry, 'distance_matrix.npy')
+        distance_matrix = np.load(matrix_path, mmap_mode='r') if os.path.exists(matrix_path) else None
+    except (OSError, ValueError, KeyError):
+        return None
+    
+    data['depot'] = meta['depot']
+    clients, depot = create_clients_and_depot(data)
+    instance = Instance(clients, depot, meta['capacity'],
+                        name=meta['name'], num_vehicles=meta['num_vehicles'],
+                        edge_weight_type=meta['edge_weight_type'],
+                        distance_matrix=distance_matrix, symmetric=meta['symmetric'])
+    instance.cache_path = entry
+    return instance
+
+
+def _write_cache(entry: str, data: Dict, instance: Instance) -> bool:
+    # Written to a temporary directory renamed into place, so a concurrent
+    # reader sees either the complete entry or none.
+    parent = os.path.dirname(entry)
+    try:
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    except OSError:
+        return False
+    try:
+        for column in _CACHED_COLUMNS:
+            np.save(os.path.join(tmp, column + '.npy'), data[column])
+        # Large instances keep their lazily computed matrix.
+        if isinstance(instance.distance_matrix, np.ndarray):
+            np.save(os.path.join(tmp, 'distance_matrix.npy'), instance.distance_matrix)
+        meta = {
+            'parser_version': PARSER_VERSION,
+            'name': instance.name,
+            'capacity': instance.capacity,
+            'depot': instance.depot.id,
+            'num_vehicles': instance.num_vehicles,
+            'edge_weight_type': instance.edge_weight_type,
+            'symmetric': instance.symmetric,
+        }
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.rename(tmp, entry)
+    except OSError:
+        # Read-only location, or another process stored the entry first.
+        shutil.rmtree(tmp, ignore_errors=True)
+        return os.path.isdir(entry)
+    
+    # Entries of previous versions of the same file are stale.
+    stem = os.path.basename(entry).rsplit('-', 1)[0]
+    stale = re.compile(re.escape(stem) + r'-[0-9a-f]{20}')
+    for name in os.listdir(parent):
+        if name != os.path.basename(entry) and stale.fullmatch(name):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+    return True
+
+
+def load_instance(file_path: str, cache: bool = False, cache_dir: Optional[str] = None) -> Instance:
+    """
+    Parse an instance file (VRPLIB or Solomon format).
+    
+    With ``cache`` (implied by ``cache_dir``), the parsed columns, the distance
+    matrix and later the candidate lists are stored as ``.npy`` files in
+    ``cache_dir`` (default: ``.vrp_cache`` next to the instance) and
+    memory-mapped on the next load, so processes loading the same instance
+    share the matrix pages through the OS page cache. Entries are keyed by the
+    file contents and ``PARSER_VERSION``; an edited file or a parser upgrade
+    simply misses the cache.
+    """
+    entry = None
+    if cache or cache_dir is not None:
+        entry = _cache_entry(file_path, cache_dir)
+        instance = _read_cache(entry)
+        if instance is not None:
+            return instance
+    
     data = parse_vrplib(file_path)
     clients, depot = create_clients_and_depot(data)
-    capacity = data['capacity']
     
-    return clients, depot, capacity
+    instance = Instance(clients, depot, data['capacity'],
+                        name=data['name'], num_vehicles=data['num_vehicles'],
+                        edge_weight_type=data['edge_weight_type'] or 'EUC_2D',
+                        distance_matrix=data['edge_weights'])
+    if entry is not None and _write_cache(entry, data, instance):
+        instance.cache_path = entry
+    return instance
+
+
+# "Route #1: 21 31 19" (VRPLIB / CVRPLIB), "Route 1 : ..." (LKH-3) and
+# "Route 1: 1 -> 21 -> 1 (Load: ...)" (export_solution).
+_ROUTE_LINE = re.compile(r'^\s*Route\s*#?\s*\d+\s*:(.*)$', re.IGNORECASE)
+
+
+def read_solution_routes(file_path: str, instance: Instance) -> List[List[int]]:
+    """
+    Routes of a solution file as node ids of ``instance``.
+    
+    VRPLIB files number customers 1..n in instance order, without the depot;
+    ``export_solution`` files list node ids, depot included, joined by ``->``.
+    """
+    customers = [client.id for client in instance.clients]
+    depot = instance.depot.id
+    routes = []
+    with open(file_path) as f:
+        for line in f:
+            match = _ROUTE_LINE.match(line)
+            if match is None:
+                continue
+            body = match.group(1)
+            if '->' in body:
+                nodes = [int(token) for token in body.split('(')[0].split('->') if token.strip()]
+                unknown = [node for node in nodes if node not in instance.nodes]
+                route = [node for node in nodes if node != depot]
+            else:
+                numbers = [int(token) for token in body.split()]
+                unknown = [number for number in numbers if not 1 <= number <= len(customers)]
+                route = [customers[number - 1] for number in numbers if not unknown]
+            if unknown:
+                raise ValueError(f"{file_path}: unknown customers {unknown[:5]} for this instance")
+            routes.append(route)
+    if not routes:
+        raise ValueError(f"No route found in {file_path}")
+    return routes
 
+
+def load_solution(file_path: str, instance: Instance,
+                  num_vehicles: Optional[int] = None) -> Tuple[Solution, List[int]]:
+    """
+    Warm start: read a solution file (see ``read_solution_routes``) as a
+    capacity-feasible, possibly partial solution of ``instance``.
+    
+    Repeated customers keep their first visit; on an overloaded route the
+    last customers are unloaded until it fits. Time-window violations are
+    left to the search, which prices them as time warp. Empty vehicles are
+    added up to ``num_vehicles``.
+    
+    Returns:
+        (solution, ids of the customers left out, whether missing from the
+        file or unloaded), for the caller to insert (e.g. ``repair_greedy``)
+    """
+    demands = instance.demands
+    visited = set()
+    routes = []
+    for route in read_solution_routes(file_path, instance):
+        kept = []
+        for node in route:
+            if node not in visited:
+                visited.add(node)
+                kept.append(node)
+        load = int(demands[kept].sum()) if kept else 0
+        while load > instance.capacity:
+            node = kept.pop()
+            visited.discard(node)
+            load -= int(demands[node])
+        routes.append(kept)
+    if num_vehicles is not None:
+        routes += [[] for _ in range(num_vehicles - len(routes))]
+    
+    solution = Solution.from_routes(instance, routes)
+    return solution, [client.id for client in instance.clients if client.id not in visited]
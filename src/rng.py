@@ -0,0 +1,111 @@
+"""
+Block-drawn random numbers for the search hot loops.
+
+``RandomStream`` owns a seeded ``numpy.random.Generator`` and serves draws
+from blocks of uniforms generated in one vectorized call, through the subset
+of the ``random`` module API the move proposers use (``random``,
+``randrange``, ``randint``, ``choice``, ``sample``). Proposers default to the
+``random`` module itself, so either can be passed as their ``rng``.
+
+Integers are scaled from the same uniforms (``int(u * n)``): the bounds of
+positions depend on route lengths that change with every accepted move, so
+they cannot be drawn ahead as integers.
+"""
+
+import random
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class RandomStream:
+    """
+    Seeded generator consumed through pre-drawn blocks of ``block_size``
+    uniforms.
+    
+    Args:
+        seed: Anything ``numpy.random.default_rng`` accepts: an int, a
+            ``SeedSequence`` (e.g. one of ``SeedSequence.spawn``), or None
+            for fresh OS entropy
+        block_size: Uniforms drawn per refill
+    """
+    
+    def __init__(self, seed=None, block_size: int = 4096):
+        self.generator = np.random.default_rng(seed)
+        self.block_size = max(1, block_size)
+        self._refill()
+    
+    @classmethod
+    def from_random(cls, block_size: int = 4096) -> 'RandomStream':
+        """Stream seeded from the ``random`` module, so ``random.seed`` still fixes it."""
+        return cls(random.getrandbits(128), block_size)
+    
+    def _refill(self):
+        # Generator state before the block: enough to redraw it on setstate.
+        self._block_state = self.generator.bit_generator.state
+        self._block = self.generator.random(self.block_size).tolist()
+        self._index = 0
+    
+    def random(self) -> float:
+        index = self._index
+        if index == self.block_size:
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return self._block[index]
+    
+    def randrange(self, stop: int) -> int:
+        index = self._index
+        if index == self.block_size:
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return int(self._block[index] * stop)
+    
+    def randint(self, a: int, b: int) -> int:
+        index = self._index
+        if index == self.block_size:
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return a + int(self._block[index] * (b - a + 1))
+    
+    def choice(self, seq: Sequence) -> Any:
+        index = self._index
+        if index == self.block_size:
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return seq[int(self._block[index] * len(seq))]
+    
+    def sample(self, population: Sequence, k: int) -> List:
+        n = len(population)
+        if not 0 <= k <= n:
+            raise ValueError("Sample larger than population or is negative")
+        if k == 2:
+            i = self.randrange(n)
+            j = self.randrange(n - 1)
+            return [population[i], population[j + 1 if j >= i else j]]
+        pool = list(population)
+        for i in range(k):
+            j = i + self.randrange(n - i)
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+    
+    def getstate(self) -> Tuple[dict, int]:
+        return self._block_state, self._index
+    
+    def setstate(self, state: Tuple[dict, int]):
+        block_state, index = state
+        self.generator.bit_generator.state = block_state
+        self._refill()
+        self._index = index
+
+
+def spawn_seeds(seed: Optional[int], count: int) -> Tuple[int, List[np.random.SeedSequence]]:
+    """
+    Independent seed sequences for ``count`` workers, and the root entropy
+    that reproduces them (fresh OS entropy when ``seed`` is None).
+    """
+    root = np.random.SeedSequence(seed)
+    return root.entropy, root.spawn(count)
@@ -1,141 +1,682 @@
+import bisect
 import random
 import math
-from typing import Callable, List
-from copy import deepcopy
-from src.models import Solution, Client, euclidean_distance
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional
 
+import numpy as np
+from src.checkpoint import read_checkpoint, write_checkpoint
+from src.models import Instance, Solution
+from src.rng import RandomStream
+from src.telemetry import ConvergenceTrace, Telemetry
 
-def swap_move(solution: Solution) -> Solution:
-    new_solution = solution.copy()
-    non_empty_vehicles = [v for v in new_solution.vehicles if len(v.route) > 0]
+
+class Move:
+    """
+    A proposed neighbourhood move.
     
-    if len(non_empty_vehicles) < 2:
-        return new_solution
+    ``delta`` is the change in solution cost the move would cause, computed
+    from the handful of edges it touches. Nothing is copied or mutated until
+    ``apply`` is called.
+    """
     
-    v1, v2 = random.sample(non_empty_vehicles, 2)
-    if len(v1.route) > 0 and len(v2.route) > 0:
-        i1 = random.randint(0, len(v1.route) - 1)
-        i2 = random.randint(0, len(v2.route) - 1)
-        
-        c1, c2 = v1.route[i1], v2.route[i2]
-        
-        if (v1.load - c1.demand + c2.demand <= v1.capacity and 
-            v2.load - c2.demand + c1.demand <= v2.capacity):
-            v1.route[i1] = c2
-            v2.route[i2] = c1
-            v1.load = v1.load - c1.demand + c2.demand
-            v2.load = v2.load - c2.demand + c1.demand
-    
-    new_solution.calculate_cost()
-    return new_solution
+    __slots__ = ('operator', 'delta', '_apply')
+    
+    def __init__(self, operator: str, delta: float, apply: Callable[[Solution], None]):
+        self.operator = operator
+        self.delta = delta
+        self._apply = apply
+    
+    def apply(self, solution: Solution):
+        self._apply(solution)
+        solution.cost += self.delta
+    
+    def __repr__(self):
+        return f"Move({self.operator}, delta={self.delta:.2f})"
 
 
-def relocate_move(solution: Solution) -> Solution:
-    new_solution = solution.copy()
-    non_empty_vehicles = [v for v in new_solution.vehicles if len(v.route) > 0]
+# Iterations between two clock reads when a time limit is set.
+CLOCK_CHECK_INTERVAL = 64
+
+
+def _non_empty_indices(solution: Solution) -> List[int]:
+    return [idx for idx, v in enumerate(solution.vehicles) if len(v.sequence) > 0]
+
+
+def _time_warp_delta(instance, splices) -> float:
+    """
+    Penalised change in time warp for a move given as route splices.
     
-    if len(non_empty_vehicles) < 1:
-        return new_solution
+    Each splice is ``(vehicle, start, end, nodes)``: positions ``start..end``
+    of the vehicle's route replaced by ``nodes`` (see
+    ``Instance.splice_time_warp``).
+    """
+    change = 0.0
+    for vehicle, start, end, nodes in splices:
+        change += instance.splice_time_warp(vehicle, start, end, nodes) - instance.route_segments(vehicle)[2]
+    return instance.time_warp_penalty * change
+
+
+def _cannot_improve(instance, delta: float, vehicles, max_delta: Optional[float]) -> bool:
+    """
+    Whether a move's distance delta alone rules it out against ``max_delta``:
+    time warp can at best drop to zero on the routes involved.
+    """
+    if max_delta is None:
+        return False
+    if instance.has_time_windows:
+        delta -= instance.time_warp_penalty * sum(instance.route_segments(v)[2] for v in vehicles)
+    return delta >= max_delta
+
+
+def evaluate_swap(solution: Solution, a: int, i1: int, b: int, i2: int,
+                  max_delta: Optional[float] = None) -> Optional[Move]:
+    """
+    Exchange the customers at ``vehicles[a][i1]`` and ``vehicles[b][i2]`` (a != b).
     
-    v1 = random.choice(non_empty_vehicles)
-    v2 = random.choice(new_solution.vehicles)
+    Like every evaluator, returns None for a capacity-infeasible move and,
+    when ``max_delta`` is given, for a move that cannot have a delta below
+    it (checked on distance before any time-window work).
+    """
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    route1, route2 = v1.sequence, v2.sequence
+    u, v = route1[i1], route2[i2]
     
-    if len(v1.route) > 0:
-        i1 = random.randint(0, len(v1.route) - 1)
-        client = v1.route[i1]
-        
-        if v2.load + client.demand <= v2.capacity:
-            v1.route.pop(i1)
-            v1.load -= client.demand
-            
-            if len(v2.route) > 0:
-                i2 = random.randint(0, len(v2.route))
-                v2.route.insert(i2, client)
-            else:
-                v2.route.append(client)
-            v2.load += client.demand
+    nodes = solution.instance.nodes
+    demand_u, demand_v = nodes[u].demand, nodes[v].demand
+    load1 = v1.load - demand_u + demand_v
+    load2 = v2.load - demand_v + demand_u
+    if load1 > v1.capacity or load2 > v2.capacity:
+        return None
     
-    new_solution.calculate_cost()
-    return new_solution
+    D = solution.instance.distance_matrix
+    depot = solution.depot.id
+    p1 = route1[i1 - 1] if i1 > 0 else depot
+    n1 = route1[i1 + 1] if i1 < len(route1) - 1 else depot
+    p2 = route2[i2 - 1] if i2 > 0 else depot
+    n2 = route2[i2 + 1] if i2 < len(route2) - 1 else depot
+    delta = (D[p1, v] + D[v, n1] - D[p1, u] - D[u, n1] +
+             D[p2, u] + D[u, n2] - D[p2, v] - D[v, n2])
+    if _cannot_improve(solution.instance, delta, (v1, v2), max_delta):
+        return None
+    if solution.instance.has_time_windows:
+        delta += _time_warp_delta(solution.instance, [(v1, i1, i1, [v]), (v2, i2, i2, [u])])
+    
+    def apply(sol: Solution):
+        w1, w2 = sol.vehicles[a], sol.vehicles[b]
+        w1.sequence[i1], w2.sequence[i2] = w2.sequence[i2], w1.sequence[i1]
+        w1.load, w2.load = load1, load2
+        w1.touch()
+        w2.touch()
+        sol.reassign([u], b)
+        sol.reassign([v], a)
+    
+    return Move('swap', float(delta), apply)
 
 
-def two_opt_move(solution: Solution) -> Solution:
-    new_solution = solution.copy()
-    non_empty_vehicles = [v for v in new_solution.vehicles if len(v.route) > 0]
+def evaluate_relocate(solution: Solution, a: int, i1: int, b: int, i2: int,
+                      max_delta: Optional[float] = None) -> Optional[Move]:
+    """
+    Move the customer at ``vehicles[a][i1]`` to position ``i2`` of ``vehicles[b]``.
     
-    if len(non_empty_vehicles) < 1:
-        return new_solution
+    ``i2`` indexes the target route as it is after the removal, so for
+    ``a == b`` it ranges over ``0..len - 1``.
+    """
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    route1, route2 = v1.sequence, v2.sequence
+    u = route1[i1]
+    demand = solution.instance.nodes[u].demand
     
-    vehicle = random.choice(non_empty_vehicles)
-    route = vehicle.route
+    if a != b and v2.load + demand > v2.capacity:
+        return None
     
-    if len(route) > 3:
-        i = random.randint(0, len(route) - 2)
-        j = random.randint(i + 1, len(route) - 1)
-        vehicle.route[i:j+1] = list(reversed(vehicle.route[i:j+1]))
+    D = solution.instance.distance_matrix
+    depot = solution.depot.id
+    p = route1[i1 - 1] if i1 > 0 else depot
+    n = route1[i1 + 1] if i1 < len(route1) - 1 else depot
+    delta = D[p, n] - D[p, u] - D[u, n]
     
-    new_solution.calculate_cost()
-    return new_solution
+    if a == b:
+        remaining = len(route1) - 1
+        prev_idx, next_idx = i2 - 1, i2
+        if prev_idx >= i1:
+            prev_idx += 1
+        if next_idx >= i1:
+            next_idx += 1
+        before = route1[prev_idx] if i2 > 0 else depot
+        after = route1[next_idx] if i2 < remaining else depot
+    else:
+        before = route2[i2 - 1] if i2 > 0 else depot
+        after = route2[i2] if i2 < len(route2) else depot
+    delta += D[before, u] + D[u, after] - D[before, after]
+    if _cannot_improve(solution.instance, delta, (v1,) if a == b else (v1, v2), max_delta):
+        return None
+    
+    if solution.instance.has_time_windows:
+        if a != b:
+            splices = [(v1, i1, i1, []), (v2, i2, i2 - 1, [u])]
+        elif i2 >= i1:
+            splices = [(v1, i1, i2, route1[i1 + 1:i2 + 1] + [u])]
+        else:
+            splices = [(v1, i2, i1, [u] + route1[i2:i1])]
+        delta += _time_warp_delta(solution.instance, splices)
+    
+    def apply(sol: Solution):
+        w1, w2 = sol.vehicles[a], sol.vehicles[b]
+        w2.sequence.insert(i2, w1.sequence.pop(i1))
+        w1.load -= demand
+        w2.load += demand
+        w1.touch()
+        w2.touch()
+        sol.reassign([u], b)
+    
+    return Move('relocate', float(delta), apply)
 
 
-def or_opt_move(solution: Solution) -> Solution:
-    new_solution = solution.copy()
-    non_empty_vehicles = [v for v in new_solution.vehicles if len(v.route) > 0]
+def evaluate_two_opt(solution: Solution, a: int, i: int, j: int,
+                     max_delta: Optional[float] = None) -> Optional[Move]:
+    """Reverse positions ``i..j`` (i < j) of ``vehicles[a]``."""
+    route = solution.vehicles[a].sequence
     
-    if len(non_empty_vehicles) < 1:
-        return new_solution
+    D = solution.instance.distance_matrix
+    depot = solution.depot.id
+    p = route[i - 1] if i > 0 else depot
+    n = route[j + 1] if j < len(route) - 1 else depot
+    first, last = route[i], route[j]
+    delta = D[p, last] + D[first, n] - D[p, first] - D[last, n]
+    # On asymmetric matrices the reversed arcs inside the segment change cost too.
+    delta += solution.instance.reversal_delta(solution.vehicles[a], i, j)
+    if _cannot_improve(solution.instance, delta, (solution.vehicles[a],), max_delta):
+        return None
+    if solution.instance.has_time_windows:
+        delta += _time_warp_delta(solution.instance,
+                                  [(solution.vehicles[a], i, j, route[i:j + 1][::-1])])
     
-    v1 = random.choice(non_empty_vehicles)
+    def apply(sol: Solution):
+        vehicle = sol.vehicles[a]
+        r = vehicle.sequence
+        r[i:j + 1] = r[i:j + 1][::-1]
+        vehicle.touch()
     
-    if len(v1.route) > 2:
-        length = random.randint(1, min(3, len(v1.route) - 1))
-        i = random.randint(0, len(v1.route) - length)
-        segment = v1.route[i:i+length]
-        
-        remaining = v1.route[:i] + v1.route[i+length:]
-        if len(remaining) > 0:
-            insert_pos = random.randint(0, len(remaining))
-            v1.route = remaining[:insert_pos] + segment + remaining[insert_pos:]
+    return Move('two_opt', float(delta), apply)
+
+
+def evaluate_or_opt(solution: Solution, a: int, i: int, length: int, insert_pos: int,
+                    max_delta: Optional[float] = None) -> Optional[Move]:
+    """
+    Move the segment of ``length`` customers starting at ``i`` within ``vehicles[a]``.
     
-    new_solution.calculate_cost()
-    return new_solution
+    ``insert_pos`` indexes the route with the segment removed.
+    """
+    route = solution.vehicles[a].sequence
+    remaining = len(route) - length
+    
+    D = solution.instance.distance_matrix
+    depot = solution.depot.id
+    first, last = route[i], route[i + length - 1]
+    p = route[i - 1] if i > 0 else depot
+    n = route[i + length] if i + length < len(route) else depot
+    delta = D[p, n] - D[p, first] - D[last, n]
+    
+    # Neighbours of the insertion point, mapped back onto the original route.
+    prev_idx = insert_pos - 1 if insert_pos - 1 < i else insert_pos - 1 + length
+    next_idx = insert_pos if insert_pos < i else insert_pos + length
+    before = route[prev_idx] if insert_pos > 0 else depot
+    after = route[next_idx] if insert_pos < remaining else depot
+    delta += D[before, first] + D[last, after] - D[before, after]
+    if _cannot_improve(solution.instance, delta, (solution.vehicles[a],), max_delta):
+        return None
+    
+    if solution.instance.has_time_windows:
+        segment = route[i:i + length]
+        if insert_pos <= i:
+            splice = (solution.vehicles[a], insert_pos, i + length - 1, segment + route[insert_pos:i])
+        else:
+            splice = (solution.vehicles[a], i, insert_pos + length - 1,
+                      route[i + length:insert_pos + length] + segment)
+        delta += _time_warp_delta(solution.instance, [splice])
+    
+    def apply(sol: Solution):
+        vehicle = sol.vehicles[a]
+        r = vehicle.sequence
+        segment = r[i:i + length]
+        del r[i:i + length]
+        r[insert_pos:insert_pos] = segment
+        vehicle.touch()
+    
+    return Move('or_opt', float(delta), apply)
 
 
-def cross_exchange_move(solution: Solution) -> Solution:
-    new_solution = solution.copy()
-    non_empty_vehicles = [v for v in new_solution.vehicles if len(v.route) > 0]
+def evaluate_cross_exchange(solution: Solution, a: int, i1: int, len1: int,
+                            b: int, i2: int, len2: int, max_delta: Optional[float] = None) -> Optional[Move]:
+    """Exchange segment ``i1..i1+len1-1`` of ``vehicles[a]`` with ``i2..i2+len2-1`` of ``vehicles[b]``."""
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    route1, route2 = v1.sequence, v2.sequence
     
-    if len(non_empty_vehicles) < 2:
-        return new_solution
+    prefix1, prefix2 = solution.instance.load_prefix(v1), solution.instance.load_prefix(v2)
+    demand1 = prefix1[i1 + len1] - prefix1[i1]
+    demand2 = prefix2[i2 + len2] - prefix2[i2]
+    load1 = v1.load - demand1 + demand2
+    load2 = v2.load - demand2 + demand1
+    if load1 > v1.capacity or load2 > v2.capacity:
+        return None
     
-    v1, v2 = random.sample(non_empty_vehicles, 2)
+    D = solution.instance.distance_matrix
+    depot = solution.depot.id
+    p1 = route1[i1 - 1] if i1 > 0 else depot
+    n1 = route1[i1 + len1] if i1 + len1 < len(route1) else depot
+    p2 = route2[i2 - 1] if i2 > 0 else depot
+    n2 = route2[i2 + len2] if i2 + len2 < len(route2) else depot
+    f1, l1 = route1[i1], route1[i1 + len1 - 1]
+    f2, l2 = route2[i2], route2[i2 + len2 - 1]
+    delta = (D[p1, f2] + D[l2, n1] - D[p1, f1] - D[l1, n1] +
+             D[p2, f1] + D[l1, n2] - D[p2, f2] - D[l2, n2])
+    if _cannot_improve(solution.instance, delta, (v1, v2), max_delta):
+        return None
+    if solution.instance.has_time_windows:
+        delta += _time_warp_delta(solution.instance, [
+            (v1, i1, i1 + len1 - 1, route2[i2:i2 + len2]),
+            (v2, i2, i2 + len2 - 1, route1[i1:i1 + len1]),
+        ])
     
-    if len(v1.route) > 1 and len(v2.route) > 1:
-        len1 = random.randint(1, min(2, len(v1.route)))
-        len2 = random.randint(1, min(2, len(v2.route)))
-        
-        i1 = random.randint(0, len(v1.route) - len1)
-        i2 = random.randint(0, len(v2.route) - len2)
-        
-        seg1 = v1.route[i1:i1+len1]
-        seg2 = v2.route[i2:i2+len2]
-        
-        demand1 = sum(c.demand for c in seg1)
-        demand2 = sum(c.demand for c in seg2)
-        
-        new_load1 = v1.load - demand1 + demand2
-        new_load2 = v2.load - demand2 + demand1
-        
-        if new_load1 <= v1.capacity and new_load2 <= v2.capacity:
-            v1.route = v1.route[:i1] + seg2 + v1.route[i1+len1:]
-            v2.route = v2.route[:i2] + seg1 + v2.route[i2+len2:]
-            v1.load = new_load1
-            v2.load = new_load2
+    def apply(sol: Solution):
+        w1, w2 = sol.vehicles[a], sol.vehicles[b]
+        seg1 = w1.sequence[i1:i1 + len1]
+        seg2 = w2.sequence[i2:i2 + len2]
+        w1.sequence[i1:i1 + len1] = seg2
+        w2.sequence[i2:i2 + len2] = seg1
+        w1.load, w2.load = load1, load2
+        w1.touch()
+        w2.touch()
+        sol.reassign(seg1, b)
+        sol.reassign(seg2, a)
+    
+    return Move('cross_exchange', float(delta), apply)
+
+
+def evaluate_two_opt_star(solution: Solution, a: int, i: int, b: int, j: int,
+                          max_delta: Optional[float] = None) -> Optional[Move]:
+    """
+    Exchange the tails of ``vehicles[a]`` after position ``i`` and of
+    ``vehicles[b]`` after position ``j`` (a != b; -1 exchanges whole routes).
     
-    new_solution.calculate_cost()
+    O(1) whatever the tail lengths: tail loads come from the routes' load
+    prefix sums and the time warp of each new route is one join of a cached
+    prefix segment with the other route's cached suffix segment.
+    """
+    instance = solution.instance
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    route1, route2 = v1.sequence, v2.sequence
+    
+    prefix1, prefix2 = instance.load_prefix(v1), instance.load_prefix(v2)
+    head1, head2 = prefix1[i + 1], prefix2[j + 1]
+    load1 = head1 + v2.load - head2
+    load2 = head2 + v1.load - head1
+    if load1 > v1.capacity or load2 > v2.capacity:
+        return None
+    
+    D = instance.distance_matrix
+    depot = solution.depot.id
+    u1 = route1[i] if i >= 0 else depot
+    n1 = route1[i + 1] if i + 1 < len(route1) else depot
+    u2 = route2[j] if j >= 0 else depot
+    n2 = route2[j + 1] if j + 1 < len(route2) else depot
+    delta = D[u1, n2] + D[u2, n1] - D[u1, n1] - D[u2, n2]
+    if _cannot_improve(instance, delta, (v1, v2), max_delta):
+        return None
+    if instance.has_time_windows:
+        forward1, backward1, warp1 = instance.route_segments(v1)
+        forward2, backward2, warp2 = instance.route_segments(v2)
+        delta += instance.time_warp_penalty * (
+            instance.concatenate(forward1[i + 1], backward2[j + 1])[3]
+            + instance.concatenate(forward2[j + 1], backward1[i + 1])[3] - warp1 - warp2)
+    
+    def apply(sol: Solution):
+        w1, w2 = sol.vehicles[a], sol.vehicles[b]
+        tail1 = w1.sequence[i + 1:]
+        tail2 = w2.sequence[j + 1:]
+        w1.sequence[i + 1:] = tail2
+        w2.sequence[j + 1:] = tail1
+        w1.load, w2.load = load1, load2
+        w1.touch()
+        w2.touch()
+        sol.reassign(tail1, b)
+        sol.reassign(tail2, a)
+    
+    return Move('two_opt_star', float(delta), apply)
+
+
+def evaluate_inter_or_opt(solution: Solution, a: int, i: int, length: int, b: int, j: int,
+                          reverse: bool = False, max_delta: Optional[float] = None) -> Optional[Move]:
+    """
+    Move the segment of ``length`` customers starting at ``vehicles[a][i]``
+    before position ``j`` of ``vehicles[b]`` (a != b), reversed if ``reverse``.
+    
+    The segment load is read from the load prefix sums and, on asymmetric
+    instances, the cost of reversing it from the arc prefix sums, so the
+    evaluation does not depend on the route lengths.
+    """
+    instance = solution.instance
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    route1, route2 = v1.sequence, v2.sequence
+    
+    prefix1 = instance.load_prefix(v1)
+    demand = prefix1[i + length] - prefix1[i]
+    if v2.load + demand > v2.capacity:
+        return None
+    
+    D = instance.distance_matrix
+    depot = solution.depot.id
+    first, last = route1[i], route1[i + length - 1]
+    p = route1[i - 1] if i > 0 else depot
+    n = route1[i + length] if i + length < len(route1) else depot
+    before = route2[j - 1] if j > 0 else depot
+    after = route2[j] if j < len(route2) else depot
+    delta = D[p, n] - D[p, first] - D[last, n] - D[before, after]
+    if reverse:
+        delta += D[before, last] + D[first, after] + instance.reversal_delta(v1, i, i + length - 1)
+    else:
+        delta += D[before, first] + D[last, after]
+    if _cannot_improve(instance, delta, (v1, v2), max_delta):
+        return None
+    
+    segment = route1[i:i + length]
+    if reverse:
+        segment.reverse()
+    if instance.has_time_windows:
+        delta += _time_warp_delta(instance, [(v1, i, i + length - 1, []), (v2, j, j - 1, segment)])
+    
+    def apply(sol: Solution):
+        w1, w2 = sol.vehicles[a], sol.vehicles[b]
+        del w1.sequence[i:i + length]
+        w2.sequence[j:j] = segment
+        w1.load -= demand
+        w2.load += demand
+        w1.touch()
+        w2.touch()
+        sol.reassign(segment, b)
+    
+    return Move('inter_or_opt', float(delta), apply)
+
+
+def propose_swap(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 2:
+        return None
+    
+    a, b = rng.sample(candidates, 2)
+    i1 = rng.randint(0, len(solution.vehicles[a].sequence) - 1)
+    i2 = rng.randint(0, len(solution.vehicles[b].sequence) - 1)
+    return evaluate_swap(solution, a, i1, b, i2)
+
+
+def propose_relocate(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 1:
+        return None
+    
+    a = rng.choice(candidates)
+    b = rng.randrange(len(solution.vehicles))
+    i1 = rng.randint(0, len(solution.vehicles[a].sequence) - 1)
+    # Insertion position is drawn on the target route as it is after removal.
+    target_length = len(solution.vehicles[b].sequence) - (1 if a == b else 0)
+    i2 = rng.randint(0, target_length)
+    return evaluate_relocate(solution, a, i1, b, i2)
+
+
+def propose_two_opt(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 1:
+        return None
+    
+    a = rng.choice(candidates)
+    route = solution.vehicles[a].sequence
+    if len(route) <= 3:
+        return None
+    
+    i = rng.randint(0, len(route) - 2)
+    j = rng.randint(i + 1, len(route) - 1)
+    return evaluate_two_opt(solution, a, i, j)
+
+
+def propose_or_opt(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 1:
+        return None
+    
+    a = rng.choice(candidates)
+    route = solution.vehicles[a].sequence
+    if len(route) <= 2:
+        return None
+    
+    length = rng.randint(1, min(3, len(route) - 1))
+    i = rng.randint(0, len(route) - length)
+    insert_pos = rng.randint(0, len(route) - length)
+    return evaluate_or_opt(solution, a, i, length, insert_pos)
+
+
+def propose_cross_exchange(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 2:
+        return None
+    
+    a, b = rng.sample(candidates, 2)
+    route1, route2 = solution.vehicles[a].sequence, solution.vehicles[b].sequence
+    if len(route1) <= 1 or len(route2) <= 1:
+        return None
+    
+    len1 = rng.randint(1, min(2, len(route1)))
+    len2 = rng.randint(1, min(2, len(route2)))
+    i1 = rng.randint(0, len(route1) - len1)
+    i2 = rng.randint(0, len(route2) - len2)
+    return evaluate_cross_exchange(solution, a, i1, len1, b, i2, len2)
+
+
+def propose_two_opt_star(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 2:
+        return None
+    
+    a, b = rng.sample(candidates, 2)
+    i = rng.randint(-1, len(solution.vehicles[a].sequence) - 1)
+    j = rng.randint(-1, len(solution.vehicles[b].sequence) - 1)
+    if i == j == -1:
+        return None
+    return evaluate_two_opt_star(solution, a, i, b, j)
+
+
+def propose_inter_or_opt(solution: Solution, rng=random) -> Optional[Move]:
+    candidates = _non_empty_indices(solution)
+    if len(candidates) < 1 or len(solution.vehicles) < 2:
+        return None
+    
+    a = rng.choice(candidates)
+    # Any other vehicle, empty ones included, can receive the segment.
+    b = rng.randrange(len(solution.vehicles) - 1)
+    if b >= a:
+        b += 1
+    route1 = solution.vehicles[a].sequence
+    length = rng.randint(1, min(3, len(route1)))
+    i = rng.randint(0, len(route1) - length)
+    j = rng.randint(0, len(solution.vehicles[b].sequence))
+    reverse = length > 1 and rng.random() < 0.5
+    return evaluate_inter_or_opt(solution, a, i, length, b, j, reverse)
+
+
+PROPOSERS = [propose_swap, propose_relocate, propose_two_opt, propose_or_opt, propose_cross_exchange,
+             propose_two_opt_star, propose_inter_or_opt]
+
+
+class GranularNeighborhood:
+    """
+    k-nearest candidate lists restricting move generation (granular search).
+    
+    Granular proposers draw a customer ``u`` and one of its ``k`` candidate
+    neighbours ``v`` and only build moves that create the edge ``(u, v)``, so
+    proposals stay between customers that can plausibly be adjacent.
+    
+    With ``refresh='adaptive'`` the active list length doubles (up to
+    ``max_k``) each time the search stagnates and drops back to ``k`` when a
+    new best solution is found; ``'static'`` keeps ``k`` fixed.
+    """
+    
+    def __init__(self, instance: Instance, k: int = 20, time_window_weight: float = 0.0,
+                 max_k: Optional[int] = None, refresh: str = 'static'):
+        if refresh not in ('static', 'adaptive'):
+            raise ValueError(f"Unknown refresh policy: {refresh}")
+        self.base_k = k
+        self.k = k
+        self.max_k = max(max_k or k, k)
+        self.refresh = refresh
+        self.candidates = instance.candidate_lists(self.max_k, time_window_weight).tolist()
+        self.customers = [client.id for client in instance.clients]
+    
+    def sample(self, rng=random):
+        u = rng.choice(self.customers)
+        candidates = self.candidates[u]
+        return u, candidates[rng.randrange(min(self.k, len(candidates)))]
+    
+    def widen(self):
+        if self.refresh == 'adaptive':
+            self.k = min(self.k * 2, self.max_k)
+    
+    def reset(self):
+        self.k = self.base_k
+    
+    def proposers(self) -> List[Callable]:
+        return [partial(proposer, neighborhood=self) for proposer in GRANULAR_PROPOSERS]
+
+
+def propose_granular_swap(solution: Solution, neighborhood: GranularNeighborhood,
+                          rng=random) -> Optional[Move]:
+    # Swap u with a route neighbour of v, putting u next to v.
+    u, v = neighborhood.sample(rng)
+    a, i1 = solution.locate(u)
+    b, j = solution.locate(v)
+    i2 = j + rng.choice((-1, 1))
+    if a == b or not 0 <= i2 < len(solution.vehicles[b].sequence):
+        return None
+    return evaluate_swap(solution, a, i1, b, i2)
+
+
+def propose_granular_relocate(solution: Solution, neighborhood: GranularNeighborhood,
+                              rng=random) -> Optional[Move]:
+    # Reinsert u directly before or after v.
+    u, v = neighborhood.sample(rng)
+    a, i1 = solution.locate(u)
+    b, j = solution.locate(v)
+    if a == b and j > i1:
+        j -= 1
+    return evaluate_relocate(solution, a, i1, b, j + rng.randint(0, 1))
+
+
+def propose_granular_two_opt(solution: Solution, neighborhood: GranularNeighborhood,
+                             rng=random) -> Optional[Move]:
+    # Reverse the stretch between u and v so they become adjacent.
+    u, v = neighborhood.sample(rng)
+    a, i = solution.locate(u)
+    b, j = solution.locate(v)
+    if a != b:
+        return None
+    i, j = min(i, j), max(i, j)
+    if j - i < 2:
+        return None
+    return evaluate_two_opt(solution, a, i + 1, j)
+
+
+def propose_granular_cross_exchange(solution: Solution, neighborhood: GranularNeighborhood,
+                                    rng=random) -> Optional[Move]:
+    # Exchange the segment after u with a segment starting at v, linking u -> v.
+    u, v = neighborhood.sample(rng)
+    a, i = solution.locate(u)
+    b, i2 = solution.locate(v)
+    route1, route2 = solution.vehicles[a].sequence, solution.vehicles[b].sequence
+    i1 = i + 1
+    if a == b or i1 >= len(route1):
+        return None
+    len1 = rng.randint(1, min(2, len(route1) - i1))
+    len2 = rng.randint(1, min(2, len(route2) - i2))
+    return evaluate_cross_exchange(solution, a, i1, len1, b, i2, len2)
+
+
+def propose_granular_or_opt(solution: Solution, neighborhood: GranularNeighborhood,
+                            rng=random) -> Optional[Move]:
+    # Move the segment starting at u to just after v in the same route.
+    u, v = neighborhood.sample(rng)
+    a, i = solution.locate(u)
+    b, j = solution.locate(v)
+    route = solution.vehicles[a].sequence
+    if a != b or len(route) <= 2:
+        return None
+    length = rng.randint(1, min(3, len(route) - i))
+    if i <= j < i + length:
+        return None
+    insert_pos = j + 1 if j < i else j + 1 - length
+    return evaluate_or_opt(solution, a, i, length, insert_pos)
+
+
+def propose_granular_two_opt_star(solution: Solution, neighborhood: GranularNeighborhood,
+                                  rng=random) -> Optional[Move]:
+    # Exchange the tail after u with the tail starting at v, linking u -> v.
+    u, v = neighborhood.sample(rng)
+    a, i = solution.locate(u)
+    b, j = solution.locate(v)
+    if a == b:
+        return None
+    return evaluate_two_opt_star(solution, a, i, b, j - 1)
+
+
+def propose_granular_inter_or_opt(solution: Solution, neighborhood: GranularNeighborhood,
+                                  rng=random) -> Optional[Move]:
+    # Move the segment starting at v (or ending at v, reversed) to just after
+    # u in another route, linking u -> v.
+    u, v = neighborhood.sample(rng)
+    b, j = solution.locate(u)
+    a, i = solution.locate(v)
+    if a == b:
+        return None
+    reverse = rng.random() < 0.5
+    if reverse:
+        length = rng.randint(1, min(3, i + 1))
+        i -= length - 1
+    else:
+        length = rng.randint(1, min(3, len(solution.vehicles[a].sequence) - i))
+    return evaluate_inter_or_opt(solution, a, i, length, b, j + 1, reverse and length > 1)
+
+
+GRANULAR_PROPOSERS = [propose_granular_swap, propose_granular_relocate, propose_granular_two_opt,
+                      propose_granular_or_opt, propose_granular_cross_exchange,
+                      propose_granular_two_opt_star, propose_granular_inter_or_opt]
+
+
+def _apply_to_copy(solution: Solution, move: Optional[Move]) -> Solution:
+    new_solution = solution.copy()
+    if move is not None:
+        move.apply(new_solution)
     return new_solution
 
 
+def swap_move(solution: Solution) -> Solution:
+    return _apply_to_copy(solution, propose_swap(solution))
+
+
+def relocate_move(solution: Solution) -> Solution:
+    return _apply_to_copy(solution, propose_relocate(solution))
+
+
+def two_opt_move(solution: Solution) -> Solution:
+    return _apply_to_copy(solution, propose_two_opt(solution))
+
+
+def or_opt_move(solution: Solution) -> Solution:
+    return _apply_to_copy(solution, propose_or_opt(solution))
+
+
+def cross_exchange_move(solution: Solution) -> Solution:
+    return _apply_to_copy(solution, propose_cross_exchange(solution))
+
+
 def generate_neighbor(solution: Solution, operators: List[Callable] = None) -> Solution:
     if operators is None:
         operators = [swap_move, relocate_move, two_opt_move, or_opt_move, cross_exchange_move]
@@ -144,29 +685,330 @@ def generate_neighbor(solution: Solution, operators: List[Callable] = None) -> S
     return operator(solution)
 
 
-def local_search(solution: Solution, max_iterations: int = 100) -> Solution:
+def operator_name(proposer: Callable) -> str:
+    """Operator name of a (possibly granular, partially applied) proposer."""
+    name = getattr(proposer, 'func', proposer).__name__
+    return name.replace('propose_', '', 1).replace('granular_', '', 1)
+
+
+def propose_neighbor(solution: Solution, proposers: List[Callable] = None, rng=random) -> Optional[Move]:
+    if proposers is None:
+        proposers = PROPOSERS
+    
+    proposer = proposers[rng.randrange(len(proposers))]
+    return proposer(solution, rng=rng)
+
+
+# Minimum cost decrease for a move to count as improving in local search.
+IMPROVEMENT_EPSILON = 1e-7
+
+
+def _improvement_bound(solution: Solution, vehicles) -> float:
+    # Distance delta a move must beat to possibly improve: time warp on the
+    # routes involved can at best drop to zero.
+    instance = solution.instance
+    bound = -IMPROVEMENT_EPSILON
+    if instance.has_time_windows:
+        bound += instance.time_warp_penalty * sum(instance.route_segments(v)[2] for v in vehicles)
+    return bound
+
+
+def _route_path(solution: Solution, route: List[int]) -> np.ndarray:
+    depot = solution.depot.id
+    return np.array([depot] + route + [depot], dtype=np.int64)
+
+
+def _relocate_moves(solution: Solution, a: int, b: int):
+    # Distance deltas of every (customer, insertion point) pair are screened
+    # in one vectorised pass; only promising moves are evaluated exactly.
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    D = solution.instance.distance_matrix
+    path1 = _route_path(solution, v1.sequence)
+    path2 = _route_path(solution, v2.sequence)
+    prev1, nodes1, next1 = path1[:-2], path1[1:-1], path1[2:]
+    before, after = path2[:-1], path2[1:]
+    
+    removal = D[prev1, next1] - D[prev1, nodes1] - D[nodes1, next1]
+    insertion = (D[before[None, :], nodes1[:, None]] + D[nodes1[:, None], after[None, :]]
+                 - D[before, after][None, :])
+    fits = solution.instance.demands[nodes1] + v2.load <= v2.capacity
+    promising = (removal[:, None] + insertion < _improvement_bound(solution, (v1, v2))) & fits[:, None]
+    for i1, i2 in np.argwhere(promising).tolist():
+        yield evaluate_relocate(solution, a, i1, b, i2, -IMPROVEMENT_EPSILON)
+
+
+def _exchange_moves(solution: Solution, a: int, b: int, len1: int, len2: int):
+    # Segment exchanges screened like relocations; len1 = len2 = 1 is a swap.
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    D = solution.instance.distance_matrix
+    path1 = _route_path(solution, v1.sequence)
+    path2 = _route_path(solution, v2.sequence)
+    count1 = len(path1) - 1 - len1
+    count2 = len(path2) - 1 - len2
+    if count1 <= 0 or count2 <= 0:
+        return
+    p1, f1, l1, n1 = path1[:count1], path1[1:count1 + 1], path1[len1:count1 + len1], path1[len1 + 1:]
+    p2, f2, l2, n2 = path2[:count2], path2[1:count2 + 1], path2[len2:count2 + len2], path2[len2 + 1:]
+    
+    removed = (D[p1, f1] + D[l1, n1])[:, None] + (D[p2, f2] + D[l2, n2])[None, :]
+    added = (D[p1[:, None], f2[None, :]] + D[l2[None, :], n1[:, None]] +
+             D[p2[None, :], f1[:, None]] + D[l1[:, None], n2[None, :]])
+    promising = added - removed < _improvement_bound(solution, (v1, v2))
+    for i1, i2 in np.argwhere(promising).tolist():
+        if len1 == len2 == 1:
+            yield evaluate_swap(solution, a, i1, b, i2, -IMPROVEMENT_EPSILON)
+        else:
+            yield evaluate_cross_exchange(solution, a, i1, len1, b, i2, len2, -IMPROVEMENT_EPSILON)
+
+
+def _swap_moves(solution: Solution, a: int, b: int):
+    return _exchange_moves(solution, a, b, 1, 1)
+
+
+def _two_opt_moves(solution: Solution, a: int):
+    length = len(solution.vehicles[a].sequence)
+    for i in range(length - 1):
+        for j in range(i + 1, length):
+            yield evaluate_two_opt(solution, a, i, j, -IMPROVEMENT_EPSILON)
+
+
+def _two_opt_star_moves(solution: Solution, a: int, b: int):
+    # Cut i of a route is the edge path[i] -> path[i + 1], i.e. the tail after
+    # position i - 1; loads of the exchanged routes come from prefix sums.
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    D = solution.instance.distance_matrix
+    path1 = _route_path(solution, v1.sequence)
+    path2 = _route_path(solution, v2.sequence)
+    head1 = np.array(solution.instance.load_prefix(v1))
+    head2 = np.array(solution.instance.load_prefix(v2))
+    
+    delta = (D[path1[:-1, None], path2[None, 1:]] + D[path2[None, :-1], path1[1:, None]]
+             - D[path1[:-1], path1[1:]][:, None] - D[path2[:-1], path2[1:]][None, :])
+    fits = ((head1[:, None] + (v2.load - head2)[None, :] <= v1.capacity) &
+            (head2[None, :] + (v1.load - head1)[:, None] <= v2.capacity))
+    promising = (delta < _improvement_bound(solution, (v1, v2))) & fits
+    # Exchanging two whole routes or two empty tails changes nothing.
+    promising[0, 0] = promising[-1, -1] = False
+    for i, j in np.argwhere(promising).tolist():
+        yield evaluate_two_opt_star(solution, a, i - 1, b, j - 1, -IMPROVEMENT_EPSILON)
+
+
+def _or_opt_moves(solution: Solution, a: int, max_length: int = 3):
+    length = len(solution.vehicles[a].sequence)
+    for segment in range(1, min(max_length, length - 1) + 1):
+        for i in range(length - segment + 1):
+            for insert_pos in range(length - segment + 1):
+                if insert_pos != i:
+                    yield evaluate_or_opt(solution, a, i, segment, insert_pos, -IMPROVEMENT_EPSILON)
+
+
+def _inter_or_opt_moves(solution: Solution, a: int, b: int, max_length: int = 3):
+    # Segments of 2..max_length customers of route a inserted, in both
+    # orientations, at every point of route b (single customers are
+    # relocations), screened in one vectorised pass per length.
+    instance = solution.instance
+    v1, v2 = solution.vehicles[a], solution.vehicles[b]
+    D = instance.distance_matrix
+    path1 = _route_path(solution, v1.sequence)
+    path2 = _route_path(solution, v2.sequence)
+    before, after = path2[:-1], path2[1:]
+    prefix = np.array(instance.load_prefix(v1))
+    bound = _improvement_bound(solution, (v1, v2))
+    for length in range(2, max_length + 1):
+        count = len(path1) - 1 - length
+        if count <= 0:
+            return
+        p, f, l, n = path1[:count], path1[1:count + 1], path1[length:count + length], path1[length + 1:]
+        removal = (D[p, n] - D[p, f] - D[l, n])[:, None] - D[before, after][None, :]
+        forward = removal + D[before[None, :], f[:, None]] + D[l[:, None], after[None, :]]
+        backward = removal + D[before[None, :], l[:, None]] + D[f[:, None], after[None, :]]
+        if not instance.symmetric:
+            backward += np.array([instance.reversal_delta(v1, i, i + length - 1) for i in range(count)])[:, None]
+        fits = (v2.load + prefix[length:] - prefix[:-length] <= v2.capacity)[:, None]
+        for reverse, delta in ((False, forward), (True, backward)):
+            for i, j in np.argwhere((delta < bound) & fits).tolist():
+                yield evaluate_inter_or_opt(solution, a, i, length, b, j, reverse, -IMPROVEMENT_EPSILON)
+
+
+def _cross_exchange_moves(solution: Solution, a: int, b: int, max_length: int = 3):
+    for len1 in range(1, max_length + 1):
+        for len2 in range(1, max_length + 1):
+            if len1 == 1 and len2 == 1:
+                continue  # plain swap
+            yield from _exchange_moves(solution, a, b, len1, len2)
+
+
+# Local search neighbourhoods in VND order: name -> (scope, move enumerator).
+# 'route' enumerates within one route, 'pair' over unordered route pairs and
+# 'ordered' over ordered pairs (source, target).
+LOCAL_SEARCH_OPERATORS = {
+    'relocate': ('ordered', _relocate_moves),
+    'swap': ('pair', _swap_moves),
+    'two_opt': ('route', _two_opt_moves),
+    'two_opt_star': ('pair', _two_opt_star_moves),
+    'or_opt': ('route', _or_opt_moves),
+    'inter_or_opt': ('ordered', _inter_or_opt_moves),
+    'cross_exchange': ('pair', _cross_exchange_moves),
+}
+
+
+def _search_units(solution: Solution, scope: str):
+    vehicles = solution.vehicles
+    routed = [idx for idx, v in enumerate(vehicles) if v.sequence]
+    if scope == 'route':
+        for a in routed:
+            yield (a,)
+        return
+    # Empty vehicles are interchangeable, so only the first one is a target.
+    empty = next((idx for idx, v in enumerate(vehicles) if not v.sequence), None)
+    targets = routed + ([empty] if empty is not None else [])
+    for a in routed:
+        for b in targets:
+            if a == b or (scope == 'pair' and b < a and b != empty):
+                continue
+            yield (a, b)
+
+
+def _best_local_move(solution: Solution, operator: str, policy: str, checked: dict,
+                     deadline: Optional[float]) -> Optional[Move]:
+    scope, enumerate_moves = LOCAL_SEARCH_OPERATORS[operator]
+    vehicles = solution.vehicles
+    best = None
+    for unit in _search_units(solution, scope):
+        # Don't-look bits: a unit whose routes are unchanged since it was
+        # last found without an improving move is skipped.
+        stamps = tuple(vehicles[idx].stamp for idx in unit)
+        key = (operator, unit)
+        if checked.get(key) == stamps:
+            continue
+        if deadline is not None and time.perf_counter() >= deadline:
+            return best
+        
+        improving = False
+        for move in enumerate_moves(solution, *unit):
+            if move is not None and move.delta < -IMPROVEMENT_EPSILON:
+                if policy == 'first':
+                    return move
+                improving = True
+                if best is None or move.delta < best.delta:
+                    best = move
+        if not improving:
+            checked[key] = stamps
+    return best
+
+
+def local_search(solution: Solution, max_iterations: Optional[int] = None,
+                 time_limit: Optional[float] = None, policy: str = 'first',
+                 operators: Optional[List[str]] = None) -> Solution:
+    """
+    Variable neighbourhood descent over exhaustively enumerated moves.
+    
+    Neighbourhoods (``LOCAL_SEARCH_OPERATORS`` order by default) are scanned
+    in turn with delta evaluation; an improving move is applied and the
+    descent restarts from the first neighbourhood. ``policy='first'`` applies
+    the first improving move found, ``'best'`` the best of the whole
+    neighbourhood. Route-level don't-look bits skip routes and route pairs
+    unchanged since they were last found without improving moves.
+    
+    Without ``max_iterations`` (improving moves applied) or ``time_limit``
+    cutting it short, the result is a local optimum for every neighbourhood.
+    """
+    if policy not in ('first', 'best'):
+        raise ValueError(f"Unknown improvement policy: {policy}")
+    operators = list(operators or LOCAL_SEARCH_OPERATORS)
     current = solution.copy()
-    improved = True
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    checked = {}
     iteration = 0
+    k = 0
     
-    while improved and iteration < max_iterations:
-        improved = False
-        best_neighbor = current
-        
-        for _ in range(10):
-            neighbor = generate_neighbor(current)
-            if neighbor.cost < best_neighbor.cost:
-                best_neighbor = neighbor
-                improved = True
-        
-        if improved:
-            current = best_neighbor
-        
+    while k < len(operators) and (max_iterations is None or iteration < max_iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        move = _best_local_move(current, operators[k], policy, checked, deadline)
+        if move is None:
+            k += 1
+            continue
+        move.apply(current)
         iteration += 1
+        k = 0
     
+    current.calculate_cost()
     return current
 
 
+class AdaptiveSelection:
+    """
+    Roulette-wheel operator selection adapted to runtime success.
+    
+    Each operator is rewarded by the cost improvement its accepted moves
+    brought, per second spent proposing (and applying) them, so operators
+    that mostly produce infeasible or useless moves lose weight. Every
+    ``segment`` iterations the reward rates are scaled to [0, 1] by the best
+    one and blended into the weights with ``reaction_factor``; weights never
+    fall below ``min_weight`` so no operator is starved.
+    """
+    
+    def __init__(self, count: int, reaction_factor: float = 0.1, segment: int = 500,
+                 min_weight: float = 0.05):
+        self.weights = [1.0] * count
+        self.reaction_factor = reaction_factor
+        self.segment = max(1, segment)
+        self.min_weight = min_weight
+        self._gain = [0.0] * count
+        self._time = [0.0] * count
+        self._remaining = self.segment
+        self._rebuild()
+    
+    def _rebuild(self):
+        self._cumulative = []
+        total = 0.0
+        for weight in self.weights:
+            total += weight
+            self._cumulative.append(total)
+        self._total = total
+    
+    def choose(self, rng=random) -> int:
+        return bisect.bisect(self._cumulative, rng.random() * self._total)
+    
+    def credit(self, operator: int, gain: float, seconds: float):
+        """Account one iteration of ``operator``: cost ``gain`` (>= 0) in ``seconds``."""
+        self._gain[operator] += gain
+        self._time[operator] += seconds
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._update()
+    
+    def _update(self):
+        rates = [gain / seconds if seconds > 0 else 0.0 for gain, seconds in zip(self._gain, self._time)]
+        best = max(rates)
+        if best > 0:
+            reaction = self.reaction_factor
+            for operator, seconds in enumerate(self._time):
+                if seconds > 0:
+                    # Operators not drawn in this segment keep their weight.
+                    weight = (1 - reaction) * self.weights[operator] + reaction * rates[operator] / best
+                    self.weights[operator] = max(weight, self.min_weight)
+            self._rebuild()
+        self._gain = [0.0] * len(self.weights)
+        self._time = [0.0] * len(self.weights)
+        self._remaining = self.segment
+    
+    def get_state(self) -> Dict:
+        return {'weights': list(self.weights), 'gain': list(self._gain), 'time': list(self._time),
+                'remaining': self._remaining}
+    
+    def set_state(self, state: Dict):
+        self.weights = list(state['weights'])
+        self._gain = list(state['gain'])
+        self._time = list(state['time'])
+        self._remaining = state['remaining']
+        self._rebuild()
+
+
+OPERATOR_SELECTIONS = ('uniform', 'adaptive')
+
+
 def acceptance_probability(current_cost: float, new_cost: float, temperature: float) -> float:
     if new_cost < current_cost:
         return 1.0
@@ -179,47 +1021,254 @@ def simulated_annealing(
     initial_solution: Solution,
     initial_temp: float = 1000,
     cooling_rate: float = 0.995,
-    max_iter: int = 10000,
+    max_iter: Optional[int] = 10000,
     min_temp: float = 0.1,
-    verbose: bool = False
+    verbose: bool = False,
+    neighborhood: Optional[GranularNeighborhood] = None,
+    migration: Optional[Callable[[Solution], Optional[Solution]]] = None,
+    migration_interval: int = 1000,
+    time_limit: Optional[float] = None,
+    stats: Optional[Dict] = None,
+    telemetry: Optional[Telemetry] = None,
+    operator_selection: str = 'uniform',
+    reaction_factor: float = 0.1,
+    selection_segment: int = 500,
+    trace: Optional[ConvergenceTrace] = None,
+    checkpoint: Optional[str] = None,
+    checkpoint_interval: float = 5.0,
+    resume: bool = False,
+    seed=None
 ) -> Solution:
+    """
+    Simulated annealing over delta-evaluated moves.
+    
+    With ``time_limit`` (seconds) the search runs until the deadline (or
+    ``max_iter``, None meaning unbounded) and ``cooling_rate`` is ignored:
+    every ``CLOCK_CHECK_INTERVAL`` iterations the temperature is set on the
+    geometric schedule from ``initial_temp`` to ``min_temp`` over the elapsed
+    fraction of the budget, and the per-iteration factor is re-derived from
+    the measured iteration rate so ``min_temp`` is reached at the deadline.
+    
+    ``migration`` (island model) is called with the best solution every
+    ``migration_interval`` iterations; a solution it returns replaces the
+    current one when it is cheaper.
+    
+    ``stats``, when given, receives the number of ``iterations``, the
+    ``elapsed`` seconds and the ``time_to_best``. ``telemetry`` collects
+    per-operator counters and the cost trajectory; without it no bookkeeping
+    is done.
+    
+    ``operator_selection='adaptive'`` draws operators by roulette wheel on
+    ``AdaptiveSelection`` weights (improvement per second, updated every
+    ``selection_segment`` iterations with ``reaction_factor``) instead of
+    uniformly; the weights are reported in the telemetry samples.
+    
+    ``trace`` receives a bounded log of the current and best cost.
+    
+    All draws come from a ``RandomStream`` seeded with ``seed`` (an int or a
+    ``SeedSequence``); without one it is seeded from the ``random`` module,
+    so ``random.seed`` still fixes a run.
+    
+    With a ``checkpoint`` path, the full search state (current and best
+    routes and costs, temperature, cooling rate, iteration, stagnation
+    counter, stream state, neighbourhood size, operator weights, elapsed time)
+    is written atomically every ``checkpoint_interval`` seconds and at the
+    end. ``resume=True`` continues from that file when it exists: under an
+    iteration budget the resumed run matches an uninterrupted one bit for
+    bit; a time limit counts the time already spent. Telemetry covers the
+    resumed part only.
+    """
+    if operator_selection not in OPERATOR_SELECTIONS:
+        raise ValueError(f"Unknown operator selection: {operator_selection}")
     current_solution = initial_solution.copy()
     best_solution = current_solution.copy()
+    proposers = neighborhood.proposers() if neighborhood is not None else PROPOSERS
+    rng = RandomStream(seed) if seed is not None else RandomStream.from_random()
     
     temperature = initial_temp
     iteration = 0
     stagnation_counter = 0
     last_improvement = 0
     
-    while iteration < max_iter and temperature > min_temp:
-        neighbor = generate_neighbor(current_solution)
+    selection = None
+    if operator_selection == 'adaptive':
+        selection = AdaptiveSelection(len(proposers), reaction_factor, selection_segment)
+    
+    start = best_time = time.perf_counter()
+    fingerprint = (initial_solution.instance.name, len(initial_solution.instance.clients))
+    state = read_checkpoint(checkpoint) if checkpoint is not None and resume else None
+    if state is not None:
+        if tuple(state['instance']) != fingerprint:
+            raise ValueError(f"{checkpoint} was written for instance {state['instance']}, not {fingerprint}")
+        instance = initial_solution.instance
+        current_solution = Solution.from_routes(instance, state['current'])
+        current_solution.cost = state['current_cost']
+        best_solution = Solution.from_routes(instance, state['best'])
+        best_solution.cost = state['best_cost']
+        temperature, cooling_rate = state['temperature'], state['cooling_rate']
+        iteration, stagnation_counter = state['iteration'], state['stagnation']
+        last_improvement = state['last_improvement']
+        if neighborhood is not None:
+            neighborhood.k = state['neighborhood_k']
+        if selection is not None and state['selection'] is not None:
+            selection.set_state(state['selection'])
+        rng.setstate(state['random_state'])
+        start -= state['elapsed']
+        best_time = start + state['time_to_best']
+        if verbose:
+            print(f"Resumed from {checkpoint} at iteration {iteration}, best {best_solution.cost:.2f}")
+    
+    if telemetry is not None:
+        telemetry.begin([operator_name(proposer) for proposer in proposers], iteration)
+        proposed, infeasible, accepted_moves, improving = (telemetry.proposed, telemetry.infeasible,
+                                                           telemetry.accepted, telemetry.improving)
+        delta_sum, timed, timed_seconds = telemetry.delta_sum, telemetry.timed, telemetry.timed_seconds
+        # Samples stay on multiples of sample_interval across a resume.
+        timing_interval = telemetry.timing_interval
+        next_sample = -(-iteration // telemetry.sample_interval) * telemetry.sample_interval
+    
+    def save_checkpoint():
+        write_checkpoint(checkpoint, {
+            'instance': fingerprint,
+            'current': current_solution.routes(),
+            'current_cost': current_solution.cost,
+            'best': best_solution.routes(),
+            'best_cost': best_solution.cost,
+            'temperature': temperature,
+            'cooling_rate': cooling_rate,
+            'iteration': iteration,
+            'stagnation': stagnation_counter,
+            'last_improvement': last_improvement,
+            'neighborhood_k': neighborhood.k if neighborhood is not None else None,
+            'selection': selection.get_state() if selection is not None else None,
+            'random_state': rng.getstate(),
+            'elapsed': time.perf_counter() - start,
+            'time_to_best': best_time - start,
+        })
+    
+    next_checkpoint = time.perf_counter() + checkpoint_interval if checkpoint is not None else None
+    deadline = None
+    if time_limit is not None:
+        deadline = start + time_limit
+        log_ratio = math.log(min_temp / initial_temp)
+    next_trace = iteration if trace is not None else None
+    
+    while (max_iter is None or iteration < max_iter) and (temperature > min_temp or deadline is not None):
+        if deadline is not None and iteration % CLOCK_CHECK_INTERVAL == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            elapsed = now - start
+            fraction = elapsed / time_limit
+            temperature = initial_temp * math.exp(log_ratio * fraction)
+            if iteration > 0:
+                remaining_iterations = max(1.0, iteration * (deadline - now) / elapsed)
+                cooling_rate = math.exp(log_ratio * (1.0 - fraction) / remaining_iterations)
+        
+        if iteration == next_trace:
+            next_trace = trace.record(iteration, current_solution.cost, best_solution.cost)
+        if next_checkpoint is not None and iteration % CLOCK_CHECK_INTERVAL == 0:
+            now = time.perf_counter()
+            if now >= next_checkpoint:
+                save_checkpoint()
+                next_checkpoint = now + checkpoint_interval
         
-        current_cost = current_solution.cost
-        neighbor_cost = neighbor.cost
+        if selection is not None:
+            operator = selection.choose(rng)
+            tick = time.perf_counter()
+            move = proposers[operator](current_solution, rng=rng)
+        else:
+            # Same draw as propose_neighbor, keeping the operator index.
+            operator = rng.randrange(len(proposers))
+            if telemetry is not None:
+                tick = time.perf_counter() if iteration % timing_interval == 0 else None
+            move = proposers[operator](current_solution, rng=rng)
         
-        if acceptance_probability(current_cost, neighbor_cost, temperature) > random.random():
-            current_solution = neighbor
+        accepted = False
+        if move is None:
+            # Infeasible proposal: the neighbour is the current solution itself.
+            stagnation_counter += 1
+        elif move.delta < 0 or acceptance_probability(current_solution.cost, current_solution.cost + move.delta,
+                                                      temperature) > rng.random():
+            accepted = True
+            move.apply(current_solution)
             
             if current_solution.cost < best_solution.cost:
-                best_solution = current_solution.copy()
+                best_solution.restore(current_solution)
+                best_time = time.perf_counter()
                 last_improvement = iteration
                 stagnation_counter = 0
+                if neighborhood is not None:
+                    neighborhood.reset()
                 if verbose and iteration % 500 == 0:
                     print(f"Iteration {iteration}: New best = {best_solution.cost:.2f}")
             else:
                 stagnation_counter += 1
         
         if stagnation_counter > 1000:
-            current_solution = generate_neighbor(best_solution)
-            current_solution = generate_neighbor(current_solution)
+            current_solution.restore(best_solution)
+            for _ in range(2):
+                kick = propose_neighbor(current_solution, rng=rng)
+                if kick is not None:
+                    kick.apply(current_solution)
             stagnation_counter = 0
+            if neighborhood is not None:
+                neighborhood.widen()
+        
+        if migration is not None and iteration % migration_interval == migration_interval - 1:
+            migrant = migration(best_solution)
+            if migrant is not None and migrant.cost < current_solution.cost:
+                current_solution.restore(migrant)
+                stagnation_counter = 0
+                if migrant.cost < best_solution.cost:
+                    best_solution.restore(migrant)
+                    best_time = time.perf_counter()
+        
+        if selection is not None:
+            gain = -move.delta if accepted and move.delta < 0 else 0.0
+            selection.credit(operator, gain, time.perf_counter() - tick)
+        
+        if telemetry is not None:
+            # Counted inline: a call per iteration would cost more than the counting.
+            proposed[operator] += 1
+            if move is None:
+                infeasible[operator] += 1
+            else:
+                delta_sum[operator] += move.delta
+                if accepted:
+                    accepted_moves[operator] += 1
+                    if move.delta < 0:
+                        improving[operator] += 1
+            if tick is not None:
+                timed[operator] += 1
+                timed_seconds[operator] += time.perf_counter() - tick
+            if iteration == next_sample:
+                telemetry.sample(iteration, current_solution.cost, best_solution.cost, temperature,
+                                 selection.weights if selection is not None else None)
+                next_sample += telemetry.sample_interval
         
         temperature *= cooling_rate
+        if deadline is not None and temperature < min_temp:
+            # Keep searching cold until the deadline rather than stopping early.
+            temperature = min_temp
         iteration += 1
     
+    if checkpoint is not None:
+        save_checkpoint()
+    # Drop any floating-point drift accumulated from summing deltas.
+    best_solution.calculate_cost()
+    if trace is not None:
+        trace.record(iteration, current_solution.cost, best_solution.cost)
+    if stats is not None:
+        stats.update(iterations=iteration, elapsed=time.perf_counter() - start,
+                     time_to_best=best_time - start)
+    if telemetry is not None:
+        telemetry.finish(iteration, best_solution.cost, time_to_best=best_time - start,
+                         weights=list(selection.weights) if selection is not None else None)
+    
     if verbose:
         print(f"Optimization completed. Best cost: {best_solution.cost:.2f}")
-        print(f"Last improvement at iteration: {last_improvement}")
+        print(f"Last improvement at iteration: {last_improvement} (of {iteration})")
     
     return best_solution
 
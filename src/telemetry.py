@@ -0,0 +1,234 @@
+"""
+Search telemetry: per-operator counters, iteration rate and cost trajectory.
+
+A ``Telemetry`` object is passed to the search (``simulated_annealing(...,
+telemetry=...)``), which records every proposal into it; without one the
+search skips all bookkeeping. Trajectory samples and the final summary can
+be streamed to a JSONL file as they are produced.
+
+A ``ConvergenceTrace`` (``trace=...`` of the SA, ALNS and HGS engines) is
+the lighter, bounded record of current and best cost for plotting.
+"""
+
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class OperatorStats:
+    """Counters of one operator, as reported."""
+    
+    __slots__ = ('name', 'proposed', 'infeasible', 'accepted', 'improving', 'average_delta', 'time')
+    
+    def __init__(self, name: str, proposed: int, infeasible: int, accepted: int, improving: int,
+                 average_delta: Optional[float], time: float):
+        self.name = name
+        self.proposed = proposed
+        self.infeasible = infeasible
+        self.accepted = accepted
+        self.improving = improving
+        self.average_delta = average_delta
+        self.time = time
+    
+    def as_dict(self) -> Dict:
+        return {
+            'operator': self.name,
+            'proposed': self.proposed,
+            'infeasible': self.infeasible,
+            'accepted': self.accepted,
+            'improving': self.improving,
+            'average_delta': self.average_delta,
+            'time': self.time,
+        }
+
+
+class Telemetry:
+    """
+    Statistics surface of one search run.
+    
+    The search increments the per-operator counter lists itself (indexed by
+    operator, see ``begin``): a method call per iteration would cost more
+    than the counting. Time is measured on one iteration in
+    ``timing_interval`` and extrapolated to all proposals of the operator.
+    
+    Args:
+        path: JSONL file receiving a ``sample`` record every
+            ``sample_interval`` iterations and a final ``summary`` record
+        sample_interval: Iterations between two trajectory samples (current
+            and best cost, temperature, iterations per second)
+        timing_interval: Iterations between two timed iterations
+    """
+    
+    def __init__(self, path: Optional[str] = None, sample_interval: int = 1000, timing_interval: int = 8):
+        self.path = path
+        self.sample_interval = max(1, sample_interval)
+        self.timing_interval = max(1, timing_interval)
+        self.names: List[str] = []
+        self.proposed: List[int] = []
+        self.infeasible: List[int] = []
+        self.accepted: List[int] = []
+        self.improving: List[int] = []
+        self.delta_sum: List[float] = []
+        self.timed: List[int] = []
+        self.timed_seconds: List[float] = []
+        self.trajectory: List[Dict] = []
+        self.iterations = 0
+        self.elapsed = 0.0
+        self.best_cost = None
+        self.extra: Dict = {}
+        self.first_iteration = 0
+        self._start = None
+        self._last_sample = (0, 0.0)
+        self._file = None
+    
+    def begin(self, operators: Sequence[str], iteration: int = 0):
+        """
+        Start a run over the named operators; counters are indexed in this
+        order. ``iteration`` is the first iteration (non-zero on a resume).
+        """
+        self.names = list(operators)
+        for counter in ('proposed', 'infeasible', 'accepted', 'improving', 'timed'):
+            setattr(self, counter, [0] * len(self.names))
+        self.delta_sum = [0.0] * len(self.names)
+        self.timed_seconds = [0.0] * len(self.names)
+        self.trajectory = []
+        self._start = time.perf_counter()
+        self.first_iteration = iteration
+        self._last_sample = (iteration, self._start)
+        if self.path is not None:
+            self._file = open(self.path, 'w')
+    
+    def sample(self, iteration: int, current_cost: float, best_cost: float,
+               temperature: Optional[float] = None, weights: Optional[Sequence[float]] = None):
+        now = time.perf_counter()
+        last_iteration, last_time = self._last_sample
+        rate = (iteration - last_iteration) / (now - last_time) if now > last_time else 0.0
+        self._last_sample = (iteration, now)
+        point = {
+            'iteration': iteration,
+            'time': now - self._start,
+            'current_cost': current_cost,
+            'best_cost': best_cost,
+            'temperature': temperature,
+            'iterations_per_second': rate,
+        }
+        if weights is not None:
+            # Operator selection weights, in operator order.
+            point['weights'] = list(weights)
+        self.trajectory.append(point)
+        self._write({'type': 'sample', **point})
+    
+    def finish(self, iterations: int, best_cost: float, **extra):
+        """Close the run; ``extra`` entries are added to the summary."""
+        self.iterations = iterations
+        self.elapsed = time.perf_counter() - self._start
+        self.best_cost = best_cost
+        self.extra = extra
+        self._write({'type': 'summary', **self.summary(trajectory=False)})
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    @property
+    def iterations_per_second(self) -> float:
+        return (self.iterations - self.first_iteration) / self.elapsed if self.elapsed > 0 else 0.0
+    
+    @property
+    def operators(self) -> List[OperatorStats]:
+        operators = []
+        for index, name in enumerate(self.names):
+            evaluated = self.proposed[index] - self.infeasible[index]
+            timed = self.timed[index]
+            operators.append(OperatorStats(
+                name, self.proposed[index], self.infeasible[index], self.accepted[index],
+                self.improving[index], self.delta_sum[index] / evaluated if evaluated else None,
+                self.timed_seconds[index] * self.proposed[index] / timed if timed else 0.0))
+        return operators
+    
+    def summary(self, trajectory: bool = True) -> Dict:
+        summary = {
+            'iterations': self.iterations,
+            'elapsed': self.elapsed,
+            'iterations_per_second': self.iterations_per_second,
+            'best_cost': self.best_cost,
+            'operators': [stats.as_dict() for stats in self.operators],
+            **self.extra,
+        }
+        if trajectory:
+            summary['trajectory'] = self.trajectory
+        return summary
+    
+    def report(self) -> str:
+        """Per-operator table, for printing."""
+        weights = self.extra.get('weights')
+        lines = [f"{'operator':<16}{'proposed':>10}{'infeasible':>12}{'accepted':>10}"
+                 f"{'improving':>11}{'avg delta':>12}{'time (s)':>10}" + (f"{'weight':>8}" if weights else '')]
+        for index, stats in enumerate(self.operators):
+            average = f"{stats.average_delta:.2f}" if stats.average_delta is not None else '—'
+            lines.append(f"{stats.name:<16}{stats.proposed:>10}{stats.infeasible:>12}{stats.accepted:>10}"
+                         f"{stats.improving:>11}{average:>12}{stats.time:>10.2f}"
+                         + (f"{weights[index]:>8.2f}" if weights else ''))
+        lines.append(f"{self.iterations} iterations in {self.elapsed:.2f}s "
+                     f"({self.iterations_per_second:.0f} it/s)")
+        return '\n'.join(lines)
+    
+    def _write(self, record: Dict):
+        if self._file is not None:
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+
+
+class ConvergenceTrace:
+    """
+    Bounded convergence log: rows of (iteration, current cost, best cost).
+    
+    A row is kept every ``stride`` iterations. When the ``capacity`` rows are
+    used, every other row is dropped and the stride doubles, so a run of any
+    length ends with between ``capacity / 2`` and ``capacity`` evenly spaced
+    rows. The best-cost column is a running minimum updated in O(1) per row.
+    
+    Engines call ``record`` only once the iteration reaches the value it
+    last returned, which keeps the per-iteration cost to one comparison.
+    """
+    
+    COLUMNS = ('iteration', 'current_cost', 'best_cost')
+    
+    def __init__(self, capacity: int = 4096, stride: int = 1):
+        self.capacity = max(2, capacity)
+        self.stride = max(1, stride)
+        self.best = math.inf
+        self._rows = np.empty((self.capacity, len(self.COLUMNS)))
+        self._size = 0
+    
+    def record(self, iteration: int, current_cost: float, best_cost: Optional[float] = None) -> int:
+        """Add a row; returns the next iteration to record."""
+        self.best = min(self.best, current_cost if best_cost is None else best_cost)
+        size = self._size
+        if size and self._rows[size - 1, 0] == iteration:
+            size -= 1  # same iteration recorded again (final state): overwrite
+        elif size == self.capacity:
+            kept = self._rows[:size:2].copy()
+            size = len(kept)
+            self._rows[:size] = kept
+            self.stride *= 2
+        self._rows[size] = (iteration, current_cost, self.best)
+        self._size = size + 1
+        return iteration + self.stride
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def as_array(self) -> np.ndarray:
+        """The rows as a ``(len, 3)`` array, columns in ``COLUMNS`` order."""
+        return self._rows[:self._size].copy()
+    
+    def to_csv(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savetxt(path, self.as_array(), delimiter=',', header=','.join(self.COLUMNS),
+                   comments='', fmt=('%d', '%.6f', '%.6f'))
@@ -1,49 +1,89 @@
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import numpy as np
-from typing import List, Optional
+from typing import Optional, Sequence, Union
 from src.models import Solution
+from src.telemetry import ConvergenceTrace
 
 
-def plot_solution(solution: Solution, title: str = "VRP Solution", save_path: Optional[str] = None, show: bool = False):
+# Customer ids are drawn only up to this many customers; beyond, the labels
+# are unreadable and dominate rendering time.
+LABEL_THRESHOLD = 150
+
+# Routes listed in the legend; the others are summarised in one entry.
+MAX_LEGEND_ENTRIES = 20
+
+
+def _route_geometry(solution: Solution):
+    """Used routes as (vehicle index, vehicle, depot-to-depot node id path)."""
+    depot = solution.depot.id
+    return [(idx, vehicle, [depot] + vehicle.sequence + [depot])
+            for idx, vehicle in enumerate(solution.vehicles) if vehicle.sequence]
+
+
+def plot_solution(solution: Solution, title: str = "VRP Solution", save_path: Optional[str] = None,
+                  show: bool = False, label_threshold: int = LABEL_THRESHOLD,
+                  max_legend: int = MAX_LEGEND_ENTRIES, dpi: int = 150):
+    """
+    Draw the routes with matplotlib.
+    
+    All route edges form a single ``LineCollection`` and all customers a
+    single scatter, so the artist count does not grow with the instance.
+    Customer ids are written only up to ``label_threshold`` customers and
+    the legend lists at most ``max_legend`` routes.
+    """
     fig, ax = plt.subplots(figsize=(12, 9))
     
     depot = solution.depot
+    coords = solution.instance.coords
     colors = plt.cm.tab20(np.linspace(0, 1, len(solution.vehicles)))
+    routes = _route_geometry(solution)
     
     # Dépôt
-    ax.scatter(depot.x, depot.y, c='red', s=400, marker='s', 
+    ax.scatter(depot.x, depot.y, c='red', s=400, marker='s',
                label='Dépôt', zorder=5, edgecolors='black', linewidth=2)
     
-    # Routes
-    for idx, vehicle in enumerate(solution.vehicles):
-        if len(vehicle.route) == 0:
-            continue
-        
-        route_x = [depot.x] + [client.x for client in vehicle.route] + [depot.x]
-        route_y = [depot.y] + [client.y for client in vehicle.route] + [depot.y]
+    # Routes : une arête par segment, couleur de la route répétée
+    if routes:
+        paths = [np.array(path) for _, _, path in routes]
+        segments = np.concatenate([np.stack((coords[path[:-1]], coords[path[1:]]), axis=1) for path in paths])
+        edge_colors = np.concatenate([np.repeat(colors[idx][None, :], len(path) - 1, axis=0)
+                                      for (idx, _, _), path in zip(routes, paths)])
+        width = 2.5 if len(segments) <= 500 else 1.0
+        ax.add_collection(LineCollection(segments, colors=edge_colors, linewidths=width, alpha=0.7))
         
-        ax.plot(route_x, route_y, c=colors[idx], linewidth=2.5, alpha=0.7, 
-                label=f'V{vehicle.id + 1} ({vehicle.load}/{vehicle.capacity})')
-        
-        for client in vehicle.route:
-            ax.scatter(client.x, client.y, c=[colors[idx]], s=150, 
-                       zorder=3, edgecolors='black', linewidth=0.5)
-            ax.annotate(str(client.id), (client.x, client.y), 
-                        fontsize=9, ha='center', va='center', fontweight='bold')
+        customers = np.concatenate([path[1:-1] for path in paths])
+        customer_colors = np.concatenate([np.repeat(colors[idx][None, :], len(vehicle.sequence), axis=0)
+                                          for idx, vehicle, _ in routes])
+        labelled = len(customers) <= label_threshold
+        ax.scatter(coords[customers, 0], coords[customers, 1], c=customer_colors, s=150 if labelled else 12,
+                   zorder=3, edgecolors='black', linewidth=0.5 if labelled else 0)
+        if labelled:
+            for node, (x, y) in zip(customers.tolist(), coords[customers].tolist()):
+                ax.text(x, y, str(node), fontsize=9, ha='center', va='center', fontweight='bold')
+    
+    handles = [Line2D([], [], color=colors[idx], linewidth=2.5,
+                      label=f'V{vehicle.id + 1} ({vehicle.load}/{vehicle.capacity})')
+               for idx, vehicle, _ in routes[:max_legend]]
+    if len(routes) > max_legend:
+        handles.append(Line2D([], [], color='none', label=f'+{len(routes) - max_legend} routes'))
+    depot_handle, _ = ax.get_legend_handles_labels()
     
-    ax.set_title(f'{title}\nDistance: {solution.cost:.2f} | Véhicules: {solution.get_num_vehicles_used()}', 
+    ax.set_title(f'{title}\nDistance: {solution.distance:.2f} | Véhicules: {solution.get_num_vehicles_used()}',
                  fontsize=14, fontweight='bold')
     ax.set_xlabel('X', fontsize=12)
     ax.set_ylabel('Y', fontsize=12)
-    ax.legend(loc='best', fontsize=9, ncol=2)
+    ax.autoscale_view()
+    ax.legend(handles=depot_handle + handles, loc='upper right', fontsize=9, ncol=2)
     ax.grid(True, alpha=0.3, linestyle='--')
     
     plt.tight_layout()
     
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.savefig(save_path, dpi=dpi)
         print(f"Figure saved to {save_path}")
     
     if show:
@@ -52,13 +92,85 @@ def plot_solution(solution: Solution, title: str = "VRP Solution", save_path: Op
         plt.close()
 
 
-def plot_convergence(costs: List[float], title: str = "Convergence", save_path: Optional[str] = None):
-    plt.figure(figsize=(12, 6))
+def plot_solution_plotly(solution: Solution, title: str = "VRP Solution", save_path: Optional[str] = None,
+                         show: bool = False, label_threshold: int = LABEL_THRESHOLD,
+                         max_legend: int = MAX_LEGEND_ENTRIES):
+    """
+    Interactive view of the routes with Plotly WebGL traces (``Scattergl``).
+    
+    One line trace per route and one marker trace for all customers, with
+    the customer id and demand on hover. ``save_path`` ending in ``.html``
+    writes a standalone page; other extensions export an image (requires
+    kaleido). Plotly is optional and imported only here.
+    """
+    try:
+        import plotly.graph_objects as go
+    except ImportError as exc:
+        raise ImportError("plot_solution_plotly requires plotly (pip install plotly)") from exc
+    
+    depot = solution.depot
+    coords = solution.instance.coords
+    demands = solution.instance.demands
+    colors = plt.cm.tab20(np.linspace(0, 1, len(solution.vehicles)))
+    css = [f'rgb({int(r * 255)},{int(g * 255)},{int(b * 255)})' for r, g, b, _ in colors]
+    routes = _route_geometry(solution)
     
-    iterations = range(len(costs))
-    plt.plot(iterations, costs, linewidth=2, color='blue', alpha=0.7, label='Coût actuel')
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=[depot.x], y=[depot.y], mode='markers', name='Dépôt',
+                               marker=dict(size=16, color='red', symbol='square',
+                                           line=dict(color='black', width=2))))
+    for rank, (idx, vehicle, path) in enumerate(routes):
+        fig.add_trace(go.Scattergl(
+            x=coords[path, 0], y=coords[path, 1], mode='lines', line=dict(color=css[idx], width=2),
+            name=f'V{vehicle.id + 1} ({vehicle.load}/{vehicle.capacity})', hoverinfo='name',
+            showlegend=rank < max_legend))
     
-    best_costs = [min(costs[:i+1]) for i in range(len(costs))]
+    if routes:
+        customers = np.concatenate([path[1:-1] for _, _, path in routes])
+        labelled = len(customers) <= label_threshold
+        fig.add_trace(go.Scattergl(
+            x=coords[customers, 0], y=coords[customers, 1], mode='markers+text' if labelled else 'markers',
+            marker=dict(size=9 if labelled else 5,
+                        color=[css[idx] for idx, vehicle, _ in routes for _ in vehicle.sequence]),
+            text=[str(node) for node in customers] if labelled else None, textposition='top center',
+            hovertext=[f'Client {node}<br>Demand: {demands[node]}' for node in customers],
+            hoverinfo='text', showlegend=False))
+    
+    fig.update_layout(
+        title=f'{title}<br>Distance: {solution.distance:.2f} | '
+              f'Véhicules: {solution.get_num_vehicles_used()}',
+        xaxis_title='X', yaxis_title='Y', hovermode='closest', height=800)
+    
+    if save_path:
+        if save_path.endswith('.html'):
+            fig.write_html(save_path)
+        else:
+            fig.write_image(save_path)
+        print(f"Figure saved to {save_path}")
+    if show:
+        fig.show()
+    return fig
+
+
+def plot_convergence(costs: Union[Sequence[float], ConvergenceTrace], title: str = "Convergence",
+                     save_path: Optional[str] = None, show: bool = True, dpi: int = 150):
+    """
+    Current and best cost against iterations.
+    
+    ``costs`` is either one cost per iteration or a ``ConvergenceTrace``
+    (its recorded iterations and running best are used as is); the best
+    curve of a plain list is a running minimum, linear in its length.
+    """
+    if isinstance(costs, ConvergenceTrace):
+        rows = costs.as_array()
+        iterations, current, best_costs = rows[:, 0], rows[:, 1], rows[:, 2]
+    else:
+        current = np.asarray(costs, dtype=float)
+        iterations = np.arange(len(current))
+        best_costs = np.minimum.accumulate(current) if len(current) else current
+    
+    plt.figure(figsize=(12, 6))
+    plt.plot(iterations, current, linewidth=2, color='blue', alpha=0.7, label='Coût actuel')
     plt.plot(iterations, best_costs, linewidth=2.5, color='red', label='Meilleur coût')
     
     plt.title(title, fontsize=14, fontweight='bold')
@@ -69,18 +181,24 @@ def plot_convergence(costs: List[float], title: str = "Convergence", save_path:
     plt.tight_layout()
     
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.savefig(save_path, dpi=dpi)
     
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close()
 
 
 def print_solution_details(solution: Solution):
     print("\n" + "="*70)
     print(f"SOLUTION VRP - DÉTAILS")
     print("="*70)
-    print(f"Distance Totale: {solution.cost:.2f}")
+    print(f"Distance Totale: {solution.distance:.2f}")
     print(f"Véhicules Utilisés: {solution.get_num_vehicles_used()}/{len(solution.vehicles)}")
     print(f"Faisable (Capacité): {all(v.load <= v.capacity for v in solution.vehicles)}")
+    if solution.instance.has_time_windows:
+        print(f"Violation Fenêtres (time warp): {solution.time_warp:.2f}")
+        print(f"Faisable (Fenêtres): {solution.is_feasible()}")
     print("\n" + "-"*70)
     print("ROUTES:")
     print("-"*70)
@@ -98,6 +216,9 @@ def print_solution_details(solution: Solution):
 def export_solution(solution: Solution, filename: str):
     with open(filename, 'w') as f:
         f.write(f"Cost: {solution.cost:.2f}\n")
+        if solution.instance.has_time_windows:
+            f.write(f"Distance: {solution.distance:.2f}\n")
+            f.write(f"Time warp: {solution.time_warp:.2f}\n")
         f.write(f"Vehicles used: {solution.get_num_vehicles_used()}\n\n")
         
         for idx, vehicle in enumerate(solution.vehicles):
@@ -1,13 +1,12 @@
 from src.parser import parse_vrplib, create_clients_and_depot
 
-data = parse_vrplib('instance/VRPLIB/tests/data/C101.txt')
+data = parse_vrplib('data/C101.txt')
 print(f"Name: {data['name']}")
 print(f"Depot: {data['depot']}")
 print(f"Capacity: {data['capacity']}")
-print(f"Nodes: {len(data['nodes'])}")
-print(f"First 3 nodes: {data['nodes'][:3]}")
-print(f"Time windows: {len(data['time_windows'])}")
-print(f"First 3 TW: {data['time_windows'][:3]}")
+print(f"Nodes: {len(data['node_ids'])}")
+print(f"First 3 nodes: {data['coords'][:3].tolist()}")
+print(f"First 3 TW: {list(zip(data['ready_times'][:3].tolist(), data['due_dates'][:3].tolist()))}")
 
 clients, depot = create_clients_and_depot(data)
 print(f"\nParsed {len(clients)} clients")
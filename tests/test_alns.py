@@ -0,0 +1,92 @@
+import random
+import unittest
+import numpy as np
+from src.parser import load_instance
+from src.heuristics import generate_clarke_wright_solution
+from src.alns import (DESTROY_OPERATORS, REPAIR_OPERATORS, InsertionCache, alns, remove_nodes,
+                      repair_greedy)
+
+
+def clarke_wright(path):
+    instance = load_instance(path)
+    return instance, generate_clarke_wright_solution(instance.clients, instance.depot,
+                                                     instance.capacity, instance)
+
+
+class TestALNS(unittest.TestCase):
+    
+    def assertValidSolution(self, instance, solution):
+        routed = sorted(node for vehicle in solution.vehicles for node in vehicle.sequence)
+        self.assertEqual(routed, sorted(client.id for client in instance.clients))
+        for vehicle in solution.vehicles:
+            self.assertEqual(vehicle.load, int(instance.demands[vehicle.sequence].sum()))
+        self.assertTrue(solution.is_feasible())
+    
+    def insertion_cost(self, solution, vehicle, customer, position):
+        instance = solution.instance
+        path = [solution.depot.id] + vehicle.sequence + [solution.depot.id]
+        before, after = path[position], path[position + 1]
+        delta = (instance.distance(before, customer) + instance.distance(customer, after)
+                 - instance.distance(before, after))
+        if instance.has_time_windows:
+            warp = instance.splice_time_warp(vehicle, position, position - 1, [customer])
+            delta += instance.time_warp_penalty * (warp - instance.route_segments(vehicle)[2])
+        return delta
+    
+    def test_destroy_repair_keeps_every_client(self):
+        random.seed(0)
+        for path in ('data/A-n32-k5.vrp', 'data/C101.txt'):
+            instance, solution = clarke_wright(path)
+            for destroy in DESTROY_OPERATORS.values():
+                for repair in REPAIR_OPERATORS.values():
+                    candidate = solution.copy()
+                    removed = destroy(candidate, 10)
+                    self.assertTrue(removed)
+                    self.assertFalse(set(removed) & {node for v in candidate.vehicles for node in v.sequence})
+                    repair(candidate, removed)
+                    candidate.calculate_cost()
+                    self.assertValidSolution(instance, candidate)
+    
+    def test_cache_matches_brute_force(self):
+        random.seed(1)
+        for path in ('data/A-n32-k5.vrp', 'data/C101.txt'):
+            instance, solution = clarke_wright(path)
+            removed = DESTROY_OPERATORS['random'](solution, 8)
+            cache = InsertionCache(solution, removed)
+            for row, customer in enumerate(cache.pending):
+                for column, vehicle_index in enumerate(cache.columns):
+                    vehicle = solution.vehicles[vehicle_index]
+                    if vehicle.load + instance.demands[customer] > vehicle.capacity:
+                        self.assertEqual(cache.costs[row, column], np.inf)
+                        continue
+                    best = min(self.insertion_cost(solution, vehicle, int(customer), position)
+                               for position in range(len(vehicle.sequence) + 1))
+                    self.assertAlmostEqual(cache.costs[row, column], best, places=6)
+    
+    def test_remove_nodes_updates_loads(self):
+        instance, solution = clarke_wright('data/A-n32-k5.vrp')
+        remove_nodes(solution, [2, 3, 4])
+        for vehicle in solution.vehicles:
+            self.assertEqual(vehicle.load, int(instance.demands[vehicle.sequence].sum()))
+        repair_greedy(solution, [2, 3, 4])
+        solution.calculate_cost()
+        self.assertValidSolution(instance, solution)
+    
+    def test_alns_improves_cvrp(self):
+        random.seed(2)
+        instance, initial = clarke_wright('data/A-n32-k5.vrp')
+        best = alns(initial, max_iter=300)
+        self.assertValidSolution(instance, best)
+        self.assertLess(best.cost, initial.cost)
+        self.assertAlmostEqual(best.cost, best.calculate_cost())
+    
+    def test_alns_time_windows_and_time_limit(self):
+        random.seed(3)
+        instance, initial = clarke_wright('data/C101.txt')
+        best = alns(initial, max_iter=None, time_limit=1.0)
+        self.assertValidSolution(instance, best)
+        self.assertLessEqual(best.cost, initial.cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
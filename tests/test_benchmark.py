@@ -0,0 +1,72 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from src.benchmark import FIELDS, format_row, reference_cost, run_benchmark, solution_file_cost, write_report
+
+
+class TestBenchmark(unittest.TestCase):
+    
+    def test_reference_costs(self):
+        self.assertEqual(reference_cost('data/A-n32-k5.vrp'), 784)
+        self.assertEqual(reference_cost('data/cvrplib/Vrp-Set-Solomon/C101.txt'), 827.3)
+        # No .sol next to the LKH-3 copy: found in data/.
+        self.assertEqual(reference_cost('data/lkh-3/CVRP/INSTANCES/P-n16-k8.vrp'), 450)
+        self.assertIsNone(reference_cost('data/lkh-3/CVRP/INSTANCES/Bre-1.vrp'))
+    
+    def test_cost_from_lkh_file_name(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'X-n573-k30.50718.sol')
+        shutil.copy('data/lkh-3/CVRP/SOLUTIONS/X-n573-k30.50718.sol', path)
+        self.assertEqual(solution_file_cost(path), 50718)
+        open(os.path.join(directory, 'X-n573-k30.vrp'), 'w').close()
+        self.assertEqual(reference_cost(os.path.join(directory, 'X-n573-k30.vrp'), ()), 50718)
+    
+    def test_run_and_report(self):
+        for algorithm in ('sa', 'alns'):
+            rows = run_benchmark(['data/E-n13-k4.vrp', 'data/A-n32-k5.vrp'], seeds=[0, 1],
+                                 algorithm=algorithm, max_iter=200, workers=1)
+            self.assertEqual([(row['instance'], row['seed']) for row in rows],
+                             [('E-n13-k4', 0), ('E-n13-k4', 1), ('A-n32-k5', 0), ('A-n32-k5', 1)])
+            for row in rows:
+                self.assertEqual(set(row), set(FIELDS))
+                self.assertTrue(row['feasible'])
+                self.assertEqual(row['iterations'], 200)
+                self.assertGreaterEqual(row['gap'], -1e-9)
+                self.assertAlmostEqual(row['gap'], 100 * (row['cost'] - row['bks']) / row['bks'], places=3)
+                self.assertLessEqual(row['time_to_best'], row['time'])
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        write_report(rows, os.path.join(directory, 'report.csv'))
+        write_report(rows, os.path.join(directory, 'report.json'))
+        with open(os.path.join(directory, 'report.csv')) as f:
+            table = list(csv.DictReader(f))
+        with open(os.path.join(directory, 'report.json')) as f:
+            self.assertEqual(json.load(f), rows)
+        self.assertEqual([float(row['cost']) for row in table], [row['cost'] for row in rows])
+    
+    def test_bad_instance_becomes_an_error_row(self):
+        paths = ['data/E-n13-k4.vrp', 'data/NoColonSpecification.txt', 'data/empty.txt']
+        for workers in (1, 2):
+            rows = run_benchmark(paths, max_iter=100, workers=workers)
+            self.assertEqual([row['instance'] for row in rows], ['E-n13-k4', 'NoColonSpecification', 'empty'])
+            self.assertIsNone(rows[0]['error'])
+            self.assertTrue(rows[0]['feasible'])
+            self.assertIn('capacity', rows[1]['error'])
+            self.assertIsNotNone(rows[2]['error'])
+            self.assertIsNone(rows[1]['cost'])
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        write_report(rows, os.path.join(directory, 'report.csv'))
+        with open(os.path.join(directory, 'report.csv')) as f:
+            self.assertEqual([row['error'] for row in csv.DictReader(f)][:2], ['', rows[1]['error']])
+        self.assertIn('failed', format_row(rows[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
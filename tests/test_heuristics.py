@@ -0,0 +1,65 @@
+import unittest
+from src.parser import load_instance
+from src.heuristics import compute_savings, generate_clarke_wright_solution
+
+
+class TestClarkeWright(unittest.TestCase):
+    
+    def assertValidSolution(self, instance, solution):
+        routed = sorted(node for vehicle in solution.vehicles for node in vehicle.sequence)
+        self.assertEqual(routed, sorted(client.id for client in instance.clients))
+        self.assertTrue(solution.is_feasible())
+    
+    def test_savings_sorted_and_correct(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        clients, depot = instance.clients, instance.depot
+        first, second, savings = compute_savings(instance, clients)
+        self.assertEqual(len(savings), len(clients) * (len(clients) - 1) // 2)
+        self.assertTrue((savings[:-1] >= savings[1:]).all())
+        i, j = clients[first[0]], clients[second[0]]
+        expected = instance.distance(depot.id, i.id) + instance.distance(depot.id, j.id) - instance.distance(i.id, j.id)
+        self.assertAlmostEqual(savings[0], expected)
+    
+    def test_granular_savings_is_subset(self):
+        instance = load_instance('data/X-n101-k25.vrp')
+        full = set(zip(*compute_savings(instance, instance.clients)[:2]))
+        granular = set(zip(*compute_savings(instance, instance.clients, granular_k=10)[:2]))
+        self.assertTrue(granular < full)
+        self.assertGreaterEqual(len(granular), 10 * len(instance.clients) // 2)
+    
+    def test_variants_on_cvrp(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        parallel = generate_clarke_wright_solution(instance.clients, instance.depot, instance.capacity, instance)
+        self.assertValidSolution(instance, parallel)
+        self.assertAlmostEqual(parallel.cost, 842.0)
+        for kwargs in ({'variant': 'sequential'}, {'granular_k': 10}):
+            solution = generate_clarke_wright_solution(
+                instance.clients, instance.depot, instance.capacity, instance, **kwargs)
+            self.assertValidSolution(instance, solution)
+    
+    def test_variants_respect_time_windows(self):
+        instance = load_instance('data/C101.txt')
+        for variant in ('parallel', 'sequential'):
+            solution = generate_clarke_wright_solution(
+                instance.clients, instance.depot, instance.capacity, instance, variant=variant)
+            self.assertValidSolution(instance, solution)
+            self.assertEqual(solution.time_warp, 0.0)
+    
+    def test_expired_time_limit_returns_complete_solution(self):
+        instance = load_instance('data/C101.txt')
+        for variant in ('parallel', 'sequential'):
+            solution = generate_clarke_wright_solution(
+                instance.clients, instance.depot, instance.capacity, instance,
+                variant=variant, time_limit=0.0)
+            self.assertValidSolution(instance, solution)
+            self.assertEqual(len(solution.vehicles), len(instance.clients))
+    
+    def test_unknown_variant(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        with self.assertRaises(ValueError):
+            generate_clarke_wright_solution(instance.clients, instance.depot, instance.capacity,
+                                            instance, variant='hybrid')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import unittest
+import numpy as np
+from src.parser import load_instance
+from src.models import Solution
+from src.heuristics import generate_clarke_wright_solution
+from src.hgs import (broken_pairs_distance, hybrid_genetic_search, neighbours, order_crossover,
+                     random_solution, split)
+
+
+def brute_force_split(instance, tour):
+    # Every way of cutting the tour, priced by the solution itself.
+    best = np.inf
+    n = len(tour)
+    for cuts in range(1 << (n - 1)):
+        routes, route = [], [int(tour[0])]
+        for k in range(1, n):
+            if cuts >> (k - 1) & 1:
+                routes.append(route)
+                route = []
+            route.append(int(tour[k]))
+        routes.append(route)
+        if all(instance.demands[r].sum() <= instance.capacity for r in routes):
+            best = min(best, Solution.from_routes(instance, routes).calculate_cost())
+    return best
+
+
+class TestHGS(unittest.TestCase):
+    
+    def test_split_is_optimal(self):
+        rng = np.random.default_rng(0)
+        for path in ('data/A-n32-k5.vrp', 'data/C101.txt'):
+            instance = load_instance(path)
+            ids = np.array([client.id for client in instance.clients])
+            for _ in range(3):
+                tour = rng.permutation(ids)[:10]
+                routes = split(instance, tour)
+                self.assertEqual([node for route in routes for node in route], tour.tolist())
+                cost = Solution.from_routes(instance, routes).calculate_cost()
+                self.assertAlmostEqual(cost, brute_force_split(instance, tour), places=6)
+    
+    def test_split_respects_capacity(self):
+        instance = load_instance('data/X-n101-k25.vrp')
+        tour = np.random.default_rng(1).permutation([client.id for client in instance.clients])
+        solution = Solution.from_routes(instance, split(instance, tour))
+        self.assertTrue(solution.is_feasible())
+    
+    def test_order_crossover(self):
+        rng = np.random.default_rng(2)
+        parent1, parent2 = rng.permutation(np.arange(1, 21)), rng.permutation(np.arange(1, 21))
+        child = order_crossover(parent1, parent2, 5, 12)
+        self.assertEqual(sorted(child.tolist()), list(range(1, 21)))
+        self.assertEqual(child[5:13].tolist(), parent1[5:13].tolist())
+        rest = [node for node in np.roll(parent2, -13).tolist() if node not in parent1[5:13]]
+        self.assertEqual(np.roll(child, -13)[:len(rest)].tolist(), rest)
+    
+    def test_broken_pairs_distance(self):
+        random.seed(3)
+        instance = load_instance('data/A-n32-k5.vrp')
+        customers = np.array([client.id for client in instance.clients])
+        solution = generate_clarke_wright_solution(instance.clients, instance.depot, instance.capacity, instance)
+        reversed_routes = Solution.from_routes(instance, [route[::-1] for route in solution.routes()])
+        other = random_solution(instance, 5)
+        first, second, third = neighbours(solution), neighbours(reversed_routes), neighbours(other)
+        self.assertEqual(broken_pairs_distance(*first, *second, customers), 0.0)
+        distance = broken_pairs_distance(*first, *third, customers)
+        self.assertGreater(distance, 0.0)
+        self.assertLessEqual(distance, 1.0)
+        self.assertEqual(distance, broken_pairs_distance(*third, *first, customers))
+    
+    def test_hgs_improves(self):
+        random.seed(4)
+        instance = load_instance('data/A-n32-k5.vrp')
+        initial = generate_clarke_wright_solution(instance.clients, instance.depot, instance.capacity, instance)
+        best = hybrid_genetic_search(initial, max_iter=20, population_size=5, generation_size=5)
+        routed = sorted(node for vehicle in best.vehicles for node in vehicle.sequence)
+        self.assertEqual(routed, sorted(client.id for client in instance.clients))
+        self.assertTrue(best.is_feasible())
+        self.assertLess(best.cost, initial.cost)
+        self.assertAlmostEqual(best.cost, best.calculate_cost())
+
+
+if __name__ == '__main__':
+    unittest.main()
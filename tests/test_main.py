@@ -0,0 +1,28 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestMain(unittest.TestCase):
+    
+    def test_config_without_seed(self):
+        # Configurations written before solver.seed existed must still run.
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'config.yaml')
+        with open(path, 'w') as f:
+            f.write("solver:\n  initial_temperature: 100\n  cooling_rate: 0.999\n")
+        result = subprocess.run([sys.executable, 'main.py', 'data/E-n13-k4.vrp', '--config', path,
+                                 '--iterations', '500', '--no-plot'],
+                                cwd=ROOT, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Best solution cost', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
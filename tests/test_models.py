@@ -1,9 +1,9 @@
 import unittest
-from src.models import Client, Vehicle, Solution, euclidean_distance
+from src.models import Client, Vehicle, Solution, Instance, LazyDistanceMatrix, euclidean_distance
 
 
 class TestModels(unittest.TestCase):
-    
+
     def setUp(self):
         self.depot = Client(0, 0, 0, 0)
         self.client1 = Client(1, 3, 4, 10)
@@ -67,6 +67,119 @@ class TestModels(unittest.TestCase):
         
         vehicle1.load = 150
         self.assertFalse(solution.is_feasible())
+    
+    
+    def test_instance_distance_matrix(self):
+        clients = [self.client1, self.client2, self.client3]
+        instance = Instance(clients, self.depot, 100)
+        
+        for a in [self.depot] + clients:
+            for b in [self.depot] + clients:
+                self.assertEqual(instance.distance(a.id, b.id), euclidean_distance(a, b))
+    
+    def test_lazy_distance_matrix(self):
+        clients = [self.client1, self.client2, self.client3]
+        dense = Instance(clients, self.depot, 100)
+        lazy = Instance(clients, self.depot, 100, dense_threshold=0)
+        
+        self.assertIsInstance(lazy.distance_matrix, LazyDistanceMatrix)
+        self.assertEqual(lazy.distance(1, 3), dense.distance(1, 3))
+        self.assertEqual(list(lazy.distance_matrix[[0, 1], [2, 3]]),
+                         list(dense.distance_matrix[[0, 1], [2, 3]]))
+    
+    def test_solution_copy_shares_instance(self):
+        vehicle = Vehicle(capacity=100)
+        vehicle.add_client(self.client1)
+        solution = Solution([vehicle], self.depot)
+        
+        clone = solution.copy()
+        self.assertIs(clone.instance, solution.instance)
+        self.assertEqual(clone.cost, solution.cost)
+        self.assertIs(clone.vehicles[0].route[0], self.client1)
+    
+    def test_solution_restore_copies_touched_routes_only(self):
+        vehicle1 = Vehicle(capacity=100, id=0)
+        vehicle1.add_client(self.client1)
+        vehicle2 = Vehicle(capacity=100, id=1)
+        vehicle2.add_client(self.client2)
+        vehicle2.add_client(self.client3)
+        best = Solution([vehicle1, vehicle2], self.depot)
+        
+        current = best.copy()
+        current.vehicles[1].remove_client(self.client3)
+        current.vehicles[0].add_client(self.client3)
+        current.calculate_cost()
+        
+        untouched = best.copy()
+        kept = untouched.vehicles[0]
+        untouched.vehicles[1].clear()
+        untouched.restore(best)
+        self.assertIs(untouched.vehicles[0], kept)
+        self.assertEqual(untouched.vehicles[1].sequence, [2, 3])
+        
+        best.restore(current)
+        self.assertEqual(best.vehicles[0].route, [self.client1, self.client3])
+        self.assertEqual(best.vehicles[1].load, 15)
+        self.assertEqual(best.cost, current.cost)
+    
+    
+    def test_time_window_segments(self):
+        depot = Client(0, 0, 0, 0, 0, 100)
+        early = Client(1, 3, 4, 10, ready_time=20, due_date=30, service_time=5)
+        late = Client(2, 6, 8, 10, ready_time=0, due_date=22, service_time=5)
+        vehicle = Vehicle(capacity=100)
+        vehicle.add_client(early)
+        vehicle.add_client(late)
+        solution = Solution([vehicle], depot)
+        
+        # Depart at 15, serve client 1 at 20-25, arrive at client 2 at 30: 8 late.
+        self.assertAlmostEqual(solution.time_warp, 8.0)
+        self.assertFalse(solution.is_feasible())
+        self.assertAlmostEqual(solution.cost, solution.distance + 8.0 * solution.instance.time_warp_penalty)
+        
+        # Serving client 2 first removes the time warp.
+        self.assertAlmostEqual(solution.instance.splice_time_warp(vehicle, 0, 1, [2, 1]), 0.0)
+        # Depart at 15, 8 late at client 2, back at 30 + 5 + 10 = 45.
+        self.assertAlmostEqual(solution.instance.route_duration(vehicle), 30.0)
+    
+    def test_route_caches_follow_mutations(self):
+        vehicle1 = Vehicle(capacity=100, id=0)
+        vehicle1.add_client(self.client1)
+        vehicle1.add_client(self.client2)
+        vehicle2 = Vehicle(capacity=100, id=1)
+        vehicle2.add_client(self.client3)
+        solution = Solution([vehicle1, vehicle2], self.depot)
+        instance = solution.instance
+        self.assertAlmostEqual(instance.route_distance(vehicle1), 20.0)
+        self.assertAlmostEqual(instance.route_distance(vehicle2), 30.0)
+        kept = vehicle2.distance_cache
+        
+        vehicle1.remove_client(self.client3)  # not on this route: no-op
+        self.assertAlmostEqual(solution.calculate_cost(), 50.0)
+        vehicle1.remove_client(self.client1)
+        self.assertEqual((vehicle1.sequence, vehicle1.load), ([2], 15))
+        vehicle1.insert_client(self.client3, 0)
+        self.assertAlmostEqual(solution.calculate_cost(), 15.0 + 5.0 + 10.0 + 30.0)
+        self.assertIs(vehicle2.distance_cache, kept)
+        self.assertEqual(solution.copy().vehicles[1].distance_cache, kept)
+    
+    def test_route_assignment_leaves_instance_nodes_alone(self):
+        vehicle = Vehicle(capacity=100)
+        vehicle.add_client(self.client1)
+        solution = Solution([vehicle, Vehicle(capacity=100, id=1)], self.depot)
+        nodes = dict(solution.instance.nodes)
+        stranger = Client(9, 1, 1, 5)
+        copy = solution.copy()
+        for target in (solution.vehicles[1], copy.vehicles[1]):
+            with self.assertRaises(KeyError):
+                target.add_client(stranger)
+            with self.assertRaises(KeyError):
+                target.route = [self.client1, stranger]
+            with self.assertRaises(KeyError):
+                target.insert_client(stranger, 0)
+        self.assertEqual(solution.instance.nodes, nodes)
+        copy.vehicles[1].route = [self.client1]
+        self.assertEqual(list(copy.vehicles[1].route), [self.client1])
 
 
 if __name__ == '__main__':
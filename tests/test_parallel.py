@@ -0,0 +1,92 @@
+import multiprocessing
+import time
+import unittest
+from src.parser import load_instance
+from src.heuristics import generate_clarke_wright_solution, generate_random_solution
+from src.parallel import Mailbox, island_simulated_annealing, parallel_simulated_annealing
+from src.solver import simulated_annealing
+
+
+class TestParallelAnnealing(unittest.TestCase):
+    
+    def setUp(self):
+        self.instance = load_instance('data/A-n32-k5.vrp')
+        self.options = dict(num_vehicles=5, chains=3, methods=('clarke_wright', 'nearest_neighbor'),
+                            seed=3, neighborhood={'k': 10}, initial_temp=100, max_iter=2000)
+    
+    def test_returns_best_chain_and_stats(self):
+        best, stats = parallel_simulated_annealing(self.instance, workers=2, **self.options)
+        self.assertEqual([s['chain'] for s in stats], [0, 1, 2])
+        self.assertEqual([s['method'] for s in stats], ['clarke_wright', 'nearest_neighbor', 'clarke_wright'])
+        self.assertEqual([s['seed'] for s in stats], [3, 3, 3])
+        self.assertAlmostEqual(best.cost, min(s['best_cost'] for s in stats))
+        self.assertAlmostEqual(best.calculate_cost(), best.cost)
+        routed = sorted(node for vehicle in best.vehicles for node in vehicle.sequence)
+        self.assertEqual(routed, sorted(client.id for client in self.instance.clients))
+        self.assertIs(best.instance, self.instance)
+    
+    def test_chains_are_reproducible_across_pool_sizes(self):
+        _, pooled = parallel_simulated_annealing(self.instance, workers=3, **self.options)
+        _, inline = parallel_simulated_annealing(self.instance, workers=1, **self.options)
+        self.assertEqual([s['best_cost'] for s in pooled], [s['best_cost'] for s in inline])
+
+
+
+class TestIslandModel(unittest.TestCase):
+    
+    def setUp(self):
+        self.instance = load_instance('data/A-n32-k5.vrp')
+    
+    def test_mailbox_round_trip(self):
+        solution = generate_random_solution(self.instance.clients, self.instance.depot, 7,
+                                            self.instance.capacity, self.instance)
+        mailbox = Mailbox(2 * len(self.instance.clients) + 8, multiprocessing.get_context())
+        self.assertIsNone(mailbox.fetch()[2])
+        mailbox.publish(solution)
+        version, cost, routes = mailbox.fetch()
+        self.assertEqual(version, 1)
+        self.assertAlmostEqual(cost, solution.cost)
+        self.assertEqual(routes, solution.routes())
+    
+    def test_annealing_adopts_cheaper_migrant(self):
+        elite = generate_clarke_wright_solution(self.instance.clients, self.instance.depot,
+                                                self.instance.capacity, self.instance)
+        start = generate_random_solution(self.instance.clients, self.instance.depot, 7,
+                                         self.instance.capacity, self.instance)
+        calls = []
+        
+        def migration(best):
+            calls.append(best.cost)
+            return elite
+        
+        best = simulated_annealing(start, initial_temp=1, min_temp=0.5, max_iter=100,
+                                   migration=migration, migration_interval=10)
+        self.assertTrue(calls)
+        self.assertLessEqual(best.cost, elite.cost)
+    
+    def test_islands_exchange_and_return_best(self):
+        for topology in ('ring', 'broadcast'):
+            best, stats = island_simulated_annealing(
+                self.instance, 5, islands=3, migration_interval=200, topology=topology,
+                methods=('random', 'clarke_wright'), seed=1, initial_temp=100, max_iter=2000)
+            self.assertEqual([s['chain'] for s in stats], [0, 1, 2])
+            self.assertAlmostEqual(best.cost, min(s['best_cost'] for s in stats))
+            self.assertTrue(best.is_feasible())
+            self.assertTrue(all(s['migrants_sent'] > 0 for s in stats))
+            self.assertGreater(sum(s['migrants_received'] for s in stats), 0)
+    
+    def test_failed_island_stops_the_others(self):
+        start = time.perf_counter()
+        with self.assertRaises(RuntimeError):
+            # Island 1 fails at construction; the others would run for a minute.
+            island_simulated_annealing(self.instance, 5, islands=3, methods=('clarke_wright', 'unknown'),
+                                       seed=0, max_iter=None, time_limit=60)
+        self.assertLess(time.perf_counter() - start, 30)
+    
+    def test_unknown_topology(self):
+        with self.assertRaises(ValueError):
+            island_simulated_annealing(self.instance, 5, islands=2, topology='star')
+
+
+if __name__ == '__main__':
+    unittest.main()
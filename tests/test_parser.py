@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import math
+from src.parser import load_instance, load_solution, read_solution_routes, edge_weight_matrix, parse_vrplib
+from src.alns import repair_greedy
+from src.models import Solution
+from src.visualization import export_solution
+
+
+def load_solution_routes(path):
+    # VRPLIB .sol files number customers from 1, the depot being node 1.
+    with open(path) as f:
+        return [[int(node) + 1 for node in line.split(':')[1].split()]
+                for line in f if line.startswith('Route')]
+
+
+class TestEdgeWeights(unittest.TestCase):
+
+    def setUp(self):
+        self.symmetric = np.array([[0, 1, 2, 3],
+                                   [1, 0, 4, 5],
+                                   [2, 4, 0, 6],
+                                   [3, 5, 6, 0]], dtype=float)
+    
+    def test_triangular_formats(self):
+        M = self.symmetric
+        flat = {
+            'LOWER_ROW': [1, 2, 4, 3, 5, 6],
+            'UPPER_ROW': [1, 2, 3, 4, 5, 6],
+            'LOWER_DIAG_ROW': [0, 1, 0, 2, 4, 0, 3, 5, 6, 0],
+            'UPPER_DIAG_ROW': [0, 1, 2, 3, 0, 4, 5, 0, 6, 0],
+            'LOWER_COL': [1, 2, 3, 4, 5, 6],
+            'UPPER_COL': [1, 2, 4, 3, 5, 6],
+        }
+        for edge_weight_format, values in flat.items():
+            matrix = edge_weight_matrix(np.array(values, dtype=float), 4, edge_weight_format)
+            np.testing.assert_array_equal(matrix, M, err_msg=edge_weight_format)
+    
+    def test_full_matrix_keeps_direction(self):
+        asymmetric = self.symmetric.copy()
+        asymmetric[0, 1] = 7
+        matrix = edge_weight_matrix(asymmetric.ravel(), 4, 'FULL_MATRIX')
+        np.testing.assert_array_equal(matrix, asymmetric)
+    
+    def test_invalid_sections(self):
+        with self.assertRaises(ValueError):
+            edge_weight_matrix(np.zeros(5), 4, 'LOWER_ROW')
+        with self.assertRaises(ValueError):
+            edge_weight_matrix(np.zeros(16), 4, 'FUNCTION')
+    
+    def test_explicit_instances_match_known_solutions(self):
+        for name, cost in (('ORTEC-n242-k12', 123750), ('E-n13-k4', 247)):
+            instance = load_instance(f'data/{name}.vrp')
+            self.assertTrue(instance.symmetric)
+            solution = Solution.from_routes(instance, load_solution_routes(f'data/{name}.sol'))
+            self.assertEqual(solution.calculate_cost(), cost)
+            self.assertTrue(solution.is_feasible())
+    
+    def test_asymmetric_full_matrix(self):
+        instance = load_instance('data/euro-neurips/ORTEC-VRPTW-ASYM-00c5356f-d1-n258-k12.txt')
+        self.assertFalse(instance.symmetric)
+        self.assertTrue(instance.has_time_windows)
+        D = instance.distance_matrix
+        self.assertEqual((D[1, 2], D[2, 1]), (1908, 1994))
+        self.assertEqual(len(instance.clients), 258)
+
+
+
+class TestColumnParser(unittest.TestCase):
+
+    def test_solomon_columns(self):
+        data = parse_vrplib('data/C101.txt')
+        self.assertEqual((data['name'], data['capacity'], data['num_vehicles'], data['depot']), ('C101', 200, 25, 0))
+        self.assertEqual(data['node_ids'].tolist(), list(range(101)))
+        self.assertEqual(data['coords'][1].tolist(), [45, 68])
+        self.assertEqual(data['demands'][1], 10)
+        self.assertEqual((data['ready_times'][1], data['due_dates'][1], data['service_times'][1]), (912, 967, 90))
+        self.assertEqual(data['service_times'][0], 0)
+    
+    def test_vrplib_columns(self):
+        data = parse_vrplib('data/lkh-3/CVRPTW/INSTANCES/C101.25.3.vrptw')
+        self.assertEqual(data['node_ids'][0], 1)
+        self.assertEqual(len(data['node_ids']), data['dimension'])
+        # SERVICE_TIME applies to customers, not to the depot.
+        self.assertEqual(data['service_times'][0], 0)
+        self.assertTrue((data['service_times'][1:] == data['service_time']).all())
+        self.assertTrue(math.isfinite(data['due_dates'][0]))
+    
+    def test_sections_without_coordinates(self):
+        data = parse_vrplib('data/E-n13-k4.vrp')
+        self.assertEqual(data['coords'].shape, (13, 2))
+        self.assertFalse(data['coords'].any())
+        self.assertTrue(np.isinf(data['due_dates']).all())
+        self.assertEqual(data['edge_weights'].shape, (13, 13))
+    
+    def test_header_without_colon(self):
+        instance = load_instance('data/NoColonSpecification.txt')
+        self.assertEqual(instance.depot.id, 1)
+        self.assertEqual(instance.clients, [])
+
+
+
+class TestInstanceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+    
+    def copy(self, path):
+        target = os.path.join(self.directory, os.path.basename(path))
+        shutil.copy(path, target)
+        return target
+    
+    def test_cached_instance_matches_parsed(self):
+        for path in ('data/C101.txt', 'data/E-n13-k4.vrp',
+                     'data/euro-neurips/ORTEC-VRPTW-ASYM-00c5356f-d1-n258-k12.txt'):
+            parsed = load_instance(path)
+            load_instance(path, cache_dir=self.directory)
+            cached = load_instance(path, cache_dir=self.directory)
+            self.assertFalse(cached.distance_matrix.flags.writeable)  # mapped read-only
+            np.testing.assert_array_equal(cached.distance_matrix, parsed.distance_matrix)
+            for column in ('coords', 'demands', 'ready_times', 'due_dates', 'service_times'):
+                np.testing.assert_array_equal(getattr(cached, column), getattr(parsed, column))
+            self.assertEqual((cached.name, cached.capacity, cached.depot.id, cached.symmetric),
+                             (parsed.name, parsed.capacity, parsed.depot.id, parsed.symmetric))
+    
+    def test_candidate_lists_are_cached(self):
+        path = self.copy('data/A-n32-k5.vrp')
+        expected = load_instance(path, cache=True).candidate_lists(5)
+        self.assertTrue(os.path.isdir(os.path.join(self.directory, '.vrp_cache')))
+        candidates = load_instance(path, cache=True).candidate_lists(5)
+        self.assertIsInstance(candidates, np.memmap)
+        np.testing.assert_array_equal(candidates, expected)
+    
+    def test_modified_file_invalidates_cache(self):
+        path = self.copy('data/A-n32-k5.vrp')
+        cache_dir = os.path.join(self.directory, 'cache')
+        self.assertEqual(load_instance(path, cache_dir=cache_dir).capacity, 100)
+        with open(path) as f:
+            text = f.read()
+        with open(path, 'w') as f:
+            f.write(text.replace('CAPACITY : 100', 'CAPACITY : 120'))
+        self.assertEqual(load_instance(path, cache_dir=cache_dir).capacity, 120)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+
+
+class TestLoadSolution(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+    
+    def write(self, text):
+        path = os.path.join(self.directory, 'warm.sol')
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+    
+    def test_bundled_solutions(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        self.assertEqual(read_solution_routes('data/A-n32-k5.sol', instance), load_solution_routes('data/A-n32-k5.sol'))
+        solution, unrouted = load_solution('data/A-n32-k5.sol', instance, num_vehicles=6)
+        self.assertEqual((solution.cost, len(solution.vehicles), unrouted), (784, 6, []))
+        # LKH-3 layout ("Route 1 : ...") next to a copy of its instance.
+        instance = load_instance('data/lkh-3/CVRP/INSTANCES/P-n16-k8.vrp')
+        solution, _ = load_solution('data/P-n16-k8.sol', instance)
+        self.assertEqual(solution.cost, 450)
+        self.assertTrue(solution.is_feasible())
+    
+    def test_exported_solution_round_trip(self):
+        instance = load_instance('data/C101.txt')
+        original, _ = load_solution('data/C101.sol', instance)
+        path = os.path.join(self.directory, 'exported.txt')
+        export_solution(original, path)
+        self.assertEqual(load_solution(path, instance)[0].routes(), original.routes())
+    
+    def test_incomplete_solution_is_repaired(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        # Route 1 is overloaded (and repeats 12), route 2 of the original is missing.
+        path = self.write("Route #1: 21 31 19 17 13 7 26 12 1 16 30 12\nRoute #2: 27 24\nCost 1\n")
+        solution, unrouted = load_solution(path, instance, num_vehicles=5)
+        self.assertTrue(solution.is_feasible())
+        self.assertEqual(sorted(unrouted), sorted(set(client.id for client in instance.clients)
+                                                  - {node for route in solution.routes() for node in route}))
+        repair_greedy(solution, unrouted)
+        solution.calculate_cost()
+        routed = sorted(node for route in solution.routes() for node in route)
+        self.assertEqual(routed, sorted(client.id for client in instance.clients))
+        self.assertTrue(solution.is_feasible())
+        # The head of the overloaded route is kept in order.
+        kept = [node for node in solution.vehicles[0].sequence if node in (22, 32, 20, 18, 14, 8)]
+        self.assertEqual(kept, [22, 32, 20, 18, 14, 8])
+        self.assertAlmostEqual(solution.cost, solution.distance)
+        
+        with self.assertRaises(ValueError):
+            load_solution(self.write("Route #1: 5 40\n"), instance)
+        with self.assertRaises(ValueError):
+            load_solution(self.write("Cost 784\n"), instance)
+
+if __name__ == '__main__':
+    unittest.main()
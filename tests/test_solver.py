@@ -0,0 +1,358 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+from src.checkpoint import read_checkpoint
+from src.parser import load_instance
+from src.telemetry import Telemetry
+from src.heuristics import construct_solution, generate_random_solution
+from src.solver import (PROPOSERS, AdaptiveSelection, GranularNeighborhood, local_search, simulated_annealing,
+                        evaluate_relocate, evaluate_swap, evaluate_two_opt, evaluate_two_opt_star,
+                        evaluate_or_opt, evaluate_inter_or_opt, evaluate_cross_exchange)
+
+
+class TestMoveDeltas(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(7)
+        self.instance = load_instance('data/A-n32-k5.vrp')
+        self.solution = generate_random_solution(
+            self.instance.clients, self.instance.depot, 6, self.instance.capacity, self.instance)
+    
+    def test_delta_matches_full_recomputation(self):
+        for proposer in PROPOSERS:
+            for _ in range(200):
+                move = proposer(self.solution)
+                if move is None:
+                    continue
+                before = self.solution.cost
+                move.apply(self.solution)
+                self.assertAlmostEqual(self.solution.cost, before + move.delta, places=6)
+                self.assertAlmostEqual(self.solution.calculate_cost(), before + move.delta, places=6)
+                self.assertTrue(self.solution.is_feasible())
+    
+    def test_moves_keep_every_client_routed(self):
+        for proposer in PROPOSERS:
+            for _ in range(100):
+                move = proposer(self.solution)
+                if move is not None:
+                    move.apply(self.solution)
+        routed = sorted(c.id for v in self.solution.vehicles for c in v.route)
+        self.assertEqual(routed, sorted(c.id for c in self.instance.clients))
+    
+    def test_granular_moves(self):
+        neighborhood = GranularNeighborhood(self.instance, k=5, max_k=10, refresh='adaptive')
+        for proposer in neighborhood.proposers():
+            for _ in range(200):
+                move = proposer(self.solution)
+                if move is None:
+                    continue
+                before = self.solution.cost
+                move.apply(self.solution)
+                self.assertAlmostEqual(self.solution.calculate_cost(), before + move.delta, places=6)
+        routed = sorted(c.id for v in self.solution.vehicles for c in v.route)
+        self.assertEqual(routed, sorted(c.id for c in self.instance.clients))
+        
+        neighborhood.widen()
+        self.assertEqual(neighborhood.k, 10)
+        neighborhood.reset()
+        self.assertEqual(neighborhood.k, 5)
+    
+    def test_candidate_lists_are_nearest_first(self):
+        candidates = self.instance.candidate_lists(4)
+        D = self.instance.distance_matrix
+        for client in self.instance.clients:
+            row = candidates[client.id]
+            self.assertNotIn(client.id, row)
+            self.assertNotIn(self.instance.depot.id, row)
+            others = sorted(D[client.id, c.id] for c in self.instance.clients if c is not client)
+            self.assertEqual([D[client.id, n] for n in row], others[:4])
+    
+    def test_simulated_annealing_improves(self):
+        best = simulated_annealing(self.solution, max_iter=3000)
+        self.assertLessEqual(best.cost, self.solution.cost)
+        self.assertAlmostEqual(best.cost, best.calculate_cost(), places=6)
+    
+    def test_simulated_annealing_respects_time_limit(self):
+        start = time.perf_counter()
+        best = simulated_annealing(self.solution, max_iter=None, time_limit=0.3, cooling_rate=0.5)
+        elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLess(elapsed, 0.5)
+        self.assertLess(best.cost, self.solution.cost)
+        self.assertTrue(best.is_feasible())
+    
+    def test_local_search_respects_time_limit(self):
+        best = local_search(self.solution, max_iterations=10 ** 6, time_limit=0.0)
+        self.assertEqual(best.cost, self.solution.cost)
+
+
+
+class TestTimeWindowDeltas(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(11)
+        self.instance = load_instance('data/C101.txt')
+        self.solution = generate_random_solution(
+            self.instance.clients, self.instance.depot, self.instance.num_vehicles, self.instance.capacity, self.instance)
+    
+    def test_delta_includes_time_warp_change(self):
+        self.assertGreater(self.solution.time_warp, 0)
+        for proposer in PROPOSERS:
+            for _ in range(200):
+                move = proposer(self.solution)
+                if move is None:
+                    continue
+                before = self.solution.cost
+                move.apply(self.solution)
+                self.assertAlmostEqual(self.solution.calculate_cost(), before + move.delta, places=4)
+    
+    def test_simulated_annealing_reduces_time_warp(self):
+        best = simulated_annealing(self.solution, max_iter=20000, cooling_rate=0.9995)
+        self.assertLess(best.time_warp, 0.01 * self.solution.time_warp)
+
+
+class TestAsymmetricDeltas(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(13)
+        self.instance = load_instance('data/euro-neurips/ORTEC-VRPTW-ASYM-00c5356f-d1-n258-k12.txt')
+        self.solution = construct_solution(self.instance, 'nearest_neighbor', 12)
+        self.solution.calculate_cost()
+    
+    def test_two_opt_charges_reversed_arcs(self):
+        self.assertFalse(self.instance.symmetric)
+        for a, vehicle in enumerate(self.solution.vehicles):
+            length = len(vehicle.sequence)
+            for i in range(0, length - 1, 3):
+                for j in range(i + 1, length, 4):
+                    move = evaluate_two_opt(self.solution, a, i, j)
+                    candidate = self.solution.copy()
+                    move.apply(candidate)
+                    self.assertAlmostEqual(candidate.calculate_cost(), self.solution.cost + move.delta, places=4)
+    
+    def test_delta_matches_full_recomputation(self):
+        for proposer in PROPOSERS:
+            for _ in range(100):
+                move = proposer(self.solution)
+                if move is None:
+                    continue
+                before = self.solution.cost
+                move.apply(self.solution)
+                self.assertAlmostEqual(self.solution.calculate_cost(), before + move.delta, places=4)
+
+
+def exhaustive_moves(solution):
+    """Every move of the VND neighbourhoods, evaluated without any screening."""
+    vehicles = solution.vehicles
+    for a, v1 in enumerate(vehicles):
+        n1 = len(v1.sequence)
+        for i in range(n1 - 1):
+            for j in range(i + 1, n1):
+                yield evaluate_two_opt(solution, a, i, j)
+        for length in range(1, min(3, n1 - 1) + 1):
+            for i in range(n1 - length + 1):
+                for pos in range(n1 - length + 1):
+                    if pos != i:
+                        yield evaluate_or_opt(solution, a, i, length, pos)
+        for b, v2 in enumerate(vehicles):
+            if a == b:
+                continue
+            n2 = len(v2.sequence)
+            for i1 in range(n1):
+                for i2 in range(n2 + 1):
+                    yield evaluate_relocate(solution, a, i1, b, i2)
+                for i2 in range(n2):
+                    yield evaluate_swap(solution, a, i1, b, i2)
+            for i in range(-1, n1):
+                for j in range(-1, n2):
+                    yield evaluate_two_opt_star(solution, a, i, b, j)
+            for length in range(2, min(3, n1) + 1):
+                for i in range(n1 - length + 1):
+                    for j in range(n2 + 1):
+                        yield evaluate_inter_or_opt(solution, a, i, length, b, j)
+                        yield evaluate_inter_or_opt(solution, a, i, length, b, j, reverse=True)
+            for len1 in range(1, 4):
+                for len2 in range(1, 4):
+                    for i1 in range(n1 - len1 + 1):
+                        for i2 in range(n2 - len2 + 1):
+                            yield evaluate_cross_exchange(solution, a, i1, len1, b, i2, len2)
+
+
+class TestLocalSearch(unittest.TestCase):
+
+    def test_two_opt_star_delta(self):
+        for path, seed in (('data/A-n32-k5.vrp', 3), ('data/C101.txt', 5)):
+            random.seed(seed)
+            instance = load_instance(path)
+            solution = generate_random_solution(instance.clients, instance.depot, instance.num_vehicles or 6,
+                                                instance.capacity, instance)
+            for _ in range(300):
+                a, b = random.sample(range(len(solution.vehicles)), 2)
+                i = random.randint(-1, len(solution.vehicles[a].sequence) - 1)
+                j = random.randint(-1, len(solution.vehicles[b].sequence) - 1)
+                move = evaluate_two_opt_star(solution, a, i, b, j)
+                if move is None:
+                    continue
+                before = solution.cost
+                move.apply(solution)
+                self.assertAlmostEqual(solution.calculate_cost(), before + move.delta, places=4)
+                self.assertTrue(all(v.load <= v.capacity for v in solution.vehicles))
+    
+    def test_inter_or_opt_delta(self):
+        for path, seed in (('data/A-n32-k5.vrp', 3), ('data/C101.txt', 5),
+                           ('data/euro-neurips/ORTEC-VRPTW-ASYM-00c5356f-d1-n258-k12.txt', 7)):
+            random.seed(seed)
+            instance = load_instance(path)
+            solution = generate_random_solution(instance.clients, instance.depot, instance.num_vehicles or 6,
+                                                instance.capacity, instance)
+            for _ in range(300):
+                a, b = random.sample(range(len(solution.vehicles)), 2)
+                route1 = solution.vehicles[a].sequence
+                if not route1:
+                    continue
+                length = random.randint(1, min(3, len(route1)))
+                i = random.randint(0, len(route1) - length)
+                j = random.randint(0, len(solution.vehicles[b].sequence))
+                move = evaluate_inter_or_opt(solution, a, i, length, b, j, reverse=random.random() < 0.5)
+                if move is None:
+                    continue
+                before = solution.cost
+                move.apply(solution)
+                self.assertAlmostEqual(solution.calculate_cost(), before + move.delta, places=4)
+                self.assertTrue(all(v.load <= v.capacity for v in solution.vehicles))
+    
+    def test_result_is_a_local_optimum(self):
+        for path, method in (('data/A-n32-k5.vrp', 'random'), ('data/C101.txt', 'clarke_wright')):
+            random.seed(1)
+            instance = load_instance(path)
+            initial = construct_solution(instance, method, instance.num_vehicles or 6)
+            for policy in ('first', 'best'):
+                best = local_search(initial, policy=policy)
+                self.assertLess(best.cost, initial.cost)
+                self.assertAlmostEqual(best.cost, best.calculate_cost(), places=6)
+                routed = sorted(node for v in best.vehicles for node in v.sequence)
+                self.assertEqual(routed, sorted(c.id for c in instance.clients))
+                if path.endswith('.vrp'):
+                    for move in exhaustive_moves(best):
+                        self.assertFalse(move is not None and move.delta < -1e-7, move)
+    
+    def test_limits(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        random.seed(2)
+        initial = generate_random_solution(instance.clients, instance.depot, 6, instance.capacity, instance)
+        self.assertEqual(local_search(initial, max_iterations=0).cost, initial.cost)
+        self.assertLess(local_search(initial, max_iterations=1).cost, initial.cost)
+        with self.assertRaises(ValueError):
+            local_search(initial, policy='random')
+
+
+
+class TestAdaptiveSelection(unittest.TestCase):
+
+    def test_weights_follow_improvement_rate(self):
+        random.seed(0)
+        selection = AdaptiveSelection(3, reaction_factor=0.5, segment=30)
+        for _ in range(10):
+            for operator, gain in enumerate((0.0, 5.0, 1.0)):
+                for _ in range(10):
+                    selection.credit(operator, gain, 1e-5)
+        self.assertEqual(selection.weights[0], selection.min_weight)
+        self.assertGreater(selection.weights[1], selection.weights[2])
+        draws = [selection.choose() for _ in range(2000)]
+        self.assertGreater(draws.count(1), draws.count(2))
+        self.assertGreater(draws.count(0), 0)
+    
+    def test_adaptive_annealing(self):
+        random.seed(1)
+        instance = load_instance('data/C101.txt')
+        initial = construct_solution(instance, 'clarke_wright', 10)
+        telemetry = Telemetry()
+        best = simulated_annealing(initial, initial_temp=100, cooling_rate=0.999, max_iter=3000,
+                                   operator_selection='adaptive', selection_segment=200,
+                                   telemetry=telemetry)
+        self.assertEqual(len(telemetry.trajectory[-1]['weights']), len(PROPOSERS))
+        self.assertEqual(len(telemetry.summary()['weights']), len(PROPOSERS))
+        self.assertLessEqual(best.cost, initial.cost)
+        self.assertAlmostEqual(best.cost, best.calculate_cost())
+        with self.assertRaises(ValueError):
+            simulated_annealing(initial, max_iter=10, operator_selection='greedy')
+
+
+
+class Preempted(Exception):
+    pass
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'run.ckpt')
+    
+    def anneal(self, instance, initial, neighborhood=False, kill_at=None, **kwargs):
+        calls = []
+        
+        def migration(best):
+            # Called every 100 iterations: simulates the job being killed.
+            calls.append(best)
+            if kill_at is not None and len(calls) * 100 >= kill_at:
+                raise Preempted()
+        
+        granular = GranularNeighborhood(instance, k=5, max_k=20, refresh='adaptive') if neighborhood else None
+        return simulated_annealing(initial, initial_temp=100, cooling_rate=0.9995, max_iter=6000,
+                                   neighborhood=granular, migration=migration, migration_interval=100,
+                                   **kwargs)
+    
+    def test_resume_is_bit_for_bit(self):
+        for path, neighborhood in (('data/A-n32-k5.vrp', False), ('data/C101.txt', True)):
+            instance = load_instance(path)
+            random.seed(3)
+            initial = construct_solution(instance, 'clarke_wright', instance.num_vehicles or 6)
+            state = random.getstate()
+            expected = self.anneal(instance, initial, neighborhood)
+            
+            random.setstate(state)
+            with self.assertRaises(Preempted):
+                self.anneal(instance, initial, neighborhood, kill_at=3500,
+                            checkpoint=self.path, checkpoint_interval=0.0)
+            self.assertTrue(os.path.exists(self.path))
+            self.assertEqual(os.listdir(self.directory), ['run.ckpt'])
+            
+            random.seed(99)  # the RNG state comes from the checkpoint
+            resumed = self.anneal(instance, initial, neighborhood, checkpoint=self.path, resume=True)
+            self.assertEqual(resumed.routes(), expected.routes())
+            self.assertEqual(resumed.cost, expected.cost)
+            os.remove(self.path)
+    
+    def test_resume_with_telemetry(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        initial = construct_solution(instance, 'clarke_wright', 6)
+        random.seed(2)
+        with self.assertRaises(Preempted):
+            self.anneal(instance, initial, kill_at=3500, checkpoint=self.path, checkpoint_interval=0.0)
+        resumed_at = read_checkpoint(self.path)['iteration']
+        telemetry = Telemetry(sample_interval=500)
+        self.anneal(instance, initial, checkpoint=self.path, resume=True, telemetry=telemetry)
+        first = -(-resumed_at // 500) * 500
+        self.assertEqual([point['iteration'] for point in telemetry.trajectory], list(range(first, 6000, 500)))
+        self.assertTrue(all(point['iterations_per_second'] > 0 for point in telemetry.trajectory))
+        self.assertEqual(sum(telemetry.proposed), 6000 - resumed_at)
+        self.assertGreater(telemetry.iterations_per_second, 0)
+    
+    def test_resume_without_checkpoint_starts_fresh(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        initial = construct_solution(instance, 'clarke_wright', 6)
+        random.seed(1)
+        expected = self.anneal(instance, initial)
+        random.seed(1)
+        self.assertEqual(self.anneal(instance, initial, checkpoint=self.path, resume=True).routes(), expected.routes())
+        with self.assertRaises(ValueError):
+            other = load_instance('data/E-n13-k4.vrp')
+            self.anneal(other, construct_solution(other, 'clarke_wright', 4), checkpoint=self.path, resume=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.parser import load_instance
+from src.alns import alns
+from src.heuristics import generate_clarke_wright_solution
+from src.solver import GranularNeighborhood, simulated_annealing
+from src.telemetry import ConvergenceTrace, Telemetry
+from src.visualization import plot_convergence
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.instance = load_instance('data/A-n32-k5.vrp')
+        self.initial = generate_clarke_wright_solution(self.instance.clients, self.instance.depot,
+                                                       self.instance.capacity, self.instance)
+    
+    def anneal(self, telemetry=None, neighborhood=None):
+        random.seed(0)
+        return simulated_annealing(self.initial, initial_temp=500, cooling_rate=0.9999, max_iter=5000,
+                                   neighborhood=neighborhood, telemetry=telemetry)
+    
+    def test_counters(self):
+        telemetry = Telemetry(sample_interval=500)
+        best = self.anneal(telemetry)
+        self.assertEqual(telemetry.iterations, 5000)
+        self.assertEqual([stats.name for stats in telemetry.operators],
+                         ['swap', 'relocate', 'two_opt', 'or_opt', 'cross_exchange', 'two_opt_star',
+                          'inter_or_opt'])
+        self.assertEqual(sum(stats.proposed for stats in telemetry.operators), 5000)
+        for stats in telemetry.operators:
+            self.assertLessEqual(stats.infeasible, stats.proposed)
+            self.assertLessEqual(stats.accepted, stats.proposed - stats.infeasible)
+            self.assertLessEqual(stats.improving, stats.accepted)
+            self.assertGreater(stats.time, 0.0)
+        self.assertEqual([point['iteration'] for point in telemetry.trajectory], list(range(0, 5000, 500)))
+        best_costs = [point['best_cost'] for point in telemetry.trajectory]
+        self.assertEqual(best_costs, sorted(best_costs, reverse=True))
+        self.assertEqual(telemetry.summary()['best_cost'], best.cost)
+    
+    def test_search_is_unchanged(self):
+        neighborhood = GranularNeighborhood(self.instance, k=10)
+        for kwargs in ({}, {'neighborhood': neighborhood}):
+            without = self.anneal(**kwargs)
+            telemetry = Telemetry()
+            self.assertEqual(self.anneal(telemetry, **kwargs).routes(), without.routes())
+        self.assertEqual([stats.name for stats in telemetry.operators],
+                         ['swap', 'relocate', 'two_opt', 'or_opt', 'cross_exchange', 'two_opt_star',
+                          'inter_or_opt'])
+    
+    def test_jsonl_stream(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'telemetry.jsonl')
+        self.anneal(Telemetry(path=path, sample_interval=1000))
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['type'] for record in records], ['sample'] * 5 + ['summary'])
+        self.assertEqual(records[-1]['iterations'], 5000)
+        self.assertEqual(len(records[-1]['operators']), 7)
+
+
+
+class TestConvergenceTrace(unittest.TestCase):
+
+    def test_bounded_downsampling(self):
+        trace = ConvergenceTrace(capacity=1000)
+        costs = 1000.0 + 100.0 * np.sin(np.arange(10 ** 6) / 5000.0) + np.arange(10 ** 6) % 7
+        best = np.minimum.accumulate(costs)
+        next_iteration = 0
+        for iteration in range(10 ** 6):
+            if iteration == next_iteration:
+                next_iteration = trace.record(iteration, costs[iteration], best[iteration])
+        rows = trace.as_array()
+        self.assertGreaterEqual(len(rows), 500)
+        self.assertLessEqual(len(rows), 1000)
+        self.assertEqual(set(np.diff(rows[:, 0])), {trace.stride})
+        iterations = rows[:, 0].astype(int)
+        np.testing.assert_array_equal(rows[:, 1], costs[iterations])
+        np.testing.assert_array_equal(rows[:, 2], best[iterations])
+        
+        # Without engine-supplied best costs, the best is over recorded rows.
+        trace = ConvergenceTrace(capacity=4)
+        for iteration, cost in enumerate((5.0, 3.0, 4.0, 1.0, 2.0)):
+            trace.record(iteration, cost)
+        self.assertEqual(trace.as_array()[:, 2].tolist(), [5.0, 3.0, 1.0])
+    
+    def test_annealing_trace_and_export(self):
+        instance = load_instance('data/A-n32-k5.vrp')
+        initial = generate_clarke_wright_solution(instance.clients, instance.depot, instance.capacity, instance)
+        random.seed(0)
+        trace = ConvergenceTrace(capacity=64)
+        best = simulated_annealing(initial, initial_temp=500, cooling_rate=0.9999, max_iter=5000, trace=trace)
+        rows = trace.as_array()
+        self.assertLessEqual(len(rows), 64)
+        self.assertEqual((rows[0, 0], rows[-1, 0]), (0, 5000))
+        self.assertEqual(rows[0, 1], initial.cost)
+        self.assertAlmostEqual(rows[-1, 2], best.cost)
+        self.assertTrue(np.all(np.diff(rows[:, 2]) <= 0))
+        
+        random.seed(0)
+        trace = ConvergenceTrace()
+        alns(initial, max_iter=50, trace=trace)
+        self.assertEqual(trace.as_array()[:, 0].tolist(), list(range(51)))
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'trace.csv')
+        trace.to_csv(path)
+        table = np.loadtxt(path, delimiter=',', skiprows=1)
+        np.testing.assert_allclose(table, trace.as_array(), atol=1e-6)
+        plot_convergence(trace, save_path=os.path.join(directory, 'trace.png'), show=False)
+        plot_convergence(list(table[:, 1]), show=False)
+        self.assertTrue(os.path.exists(os.path.join(directory, 'trace.png')))
+
+if __name__ == '__main__':
+    unittest.main()
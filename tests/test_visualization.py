@@ -0,0 +1,55 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from src.parser import load_instance
+from src.heuristics import construct_solution
+from src.visualization import plot_solution
+
+
+class TestPlotSolution(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+    
+    def render(self, path, vehicles, method='clarke_wright', **kwargs):
+        instance = load_instance(path)
+        solution = construct_solution(instance, method, vehicles)
+        save_path = os.path.join(self.directory, 'plot.png')
+        plot_solution(solution, save_path=save_path, show=True, **kwargs)
+        self.assertGreater(os.path.getsize(save_path), 0)
+        ax = plt.gcf().axes[0]
+        plt.close('all')
+        return solution, ax
+    
+    def test_small_instance_is_labelled(self):
+        solution, ax = self.render('data/A-n32-k5.vrp', 5)
+        collections = [c for c in ax.collections if isinstance(c, LineCollection)]
+        self.assertEqual(len(collections), 1)
+        self.assertEqual(len(collections[0].get_segments()),
+                         sum(len(v.sequence) + 1 for v in solution.vehicles if v.sequence))
+        self.assertEqual(len(ax.texts), len(solution.instance.clients))
+        self.assertEqual(len(ax.get_legend().get_texts()), 1 + solution.get_num_vehicles_used())
+    
+    def test_title_shows_distance(self):
+        # On CVRPTW the cost adds the time-warp penalty; the title reports the distance.
+        solution, ax = self.render('data/C101.txt', 25, method='random')
+        self.assertGreater(solution.cost, solution.distance)
+        self.assertIn(f'Distance: {solution.distance:.2f}', ax.get_title())
+    
+    def test_large_instance_skips_labels_and_caps_legend(self):
+        solution, ax = self.render('data/X-n101-k25.vrp', 26, label_threshold=50, max_legend=10)
+        self.assertGreater(solution.get_num_vehicles_used(), 10)
+        self.assertEqual(len(ax.texts), 0)
+        labels = [text.get_text() for text in ax.get_legend().get_texts()]
+        self.assertEqual(len(labels), 1 + 10 + 1)
+        self.assertEqual(labels[-1], f'+{solution.get_num_vehicles_used() - 10} routes')
+
+
+if __name__ == '__main__':
+    unittest.main()